@@ -31,7 +31,7 @@ Scan = farpy.scan.Scan2D(rootScanFolder)  # Initialise the scan object
 Scan.readNamelist()     # Read the namelist of the simulations
 Scan.readGrowthRateBlock()  # Read the growth rate and Omega
 Scan.readProfiles()     # Read the input profile information
-Scan.readModes()        # Read the mode profile
+Scan.readModes(lazy=True)  # Prepare the mode profiles, read when used
 Scan.renormFrequency()  # Change frequency to kHz
 Scan.renormCVFP()       # Use Tfast as coordinate
 
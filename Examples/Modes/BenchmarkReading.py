@@ -0,0 +1,110 @@
+"""
+Benchmark the reading of the mode amplitudes
+
+A synthetic model folder is written in a temporal directory and then read
+with the old reading strategy (one np.loadtxt per file and a python loop over
+the columns) and with the current farpy.Modes reader
+
+Done for farpy version: 0.0.7
+"""
+import os
+import time
+import tempfile
+import numpy as np
+import farpy
+
+# ------------------------------------------------------------------------------
+# --- Settings
+# ------------------------------------------------------------------------------
+nruns = 40      # Number of dumps of the synthetic simulation
+nr = 500        # Number of radial points
+n = [1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 2, 2]    # toroidal mode numbers
+m = [1, 2, 3, 4, 5, 6, 2, 3, 4, 5, 6, 7]    # poloidal mode numbers
+names = ['vthprlf', 'vth', 'vr', 'vprlf', 'uzt', 'psi', 'pr',
+         'phi', 'nf', 'curzt', 'bth', 'br']
+namesE = ['evprlfnc', 'evprlf', 'emenc', 'eme', 'ekenc', 'eke']
+
+
+# ------------------------------------------------------------------------------
+# --- Auxiliary functions
+# ------------------------------------------------------------------------------
+def writeSyntheticModel(folder, energies: bool = True):
+    """
+    Write a synthetic model with the FAR3D output format
+
+    :param folder: folder where to write the files
+    :param energies: flag to also write the energy files
+    """
+    rng = np.random.default_rng(0)
+    r = np.linspace(0.0, 1.0, nr)
+    header = 'r R ' + ' '.join(['%i/ %i' % (mm, nn) for mm, nn in zip(m, n)])\
+        + ' I ' + ' '.join(['%i/ %i' % (mm, nn) for mm, nn in zip(m, n)])
+    headerE = 't ' + ' '.join(['%i/ %i' % (mm, nn) for mm, nn in zip(m, n)])
+    for irun in range(nruns):
+        for name in names:
+            data = np.column_stack((r, rng.normal(size=(nr, 2*len(n)))))
+            np.savetxt(os.path.join(folder, '%s_%04i' % (name, irun)), data,
+                       header=header, comments='', fmt='%.6e')
+        for name in namesE if energies else []:
+            ncolumns = len(n) + 1 if name.endswith('nc') else len(n) + 3
+            data = rng.random(ncolumns)
+            data[0] = irun * 10.0
+            np.savetxt(os.path.join(folder, '%s_%04i' % (name, irun)),
+                       data[None, :], header=headerE, comments='',
+                       fmt='%.6e')
+
+
+def oldReading(folder):
+    """
+    Read the harmonic files with one np.loadtxt per file and a python loop
+    over the colums, as done in farpy <= 0.0.6
+
+    :param folder: folder with the model
+    """
+    runs = ['%04i' % i for i in range(nruns)]
+    nn = np.array(n)
+    mm = np.array(m)
+    unique_n = np.unique(nn)
+    unique_m = np.unique(mm)
+    indeces_n = np.array([np.where(unique_n == k)[0][0] for k in nn])
+    indeces_m = np.array([np.where(unique_m == k)[0][0] for k in mm])
+    out = {}
+    for name in names:
+        dum = np.empty((nruns, unique_n.size, unique_m.size, 2, nr))
+        for iis, s in enumerate(runs):
+            dummy = np.loadtxt(os.path.join(folder, name + '_' + s),
+                               skiprows=1)
+            for icolum in range(1, nn.size + 1):
+                dum[iis, indeces_n[icolum-1], indeces_m[icolum-1], 0, :] =\
+                    dummy[:, icolum]
+                dum[iis, indeces_n[icolum-1], indeces_m[icolum-1], 1, :] =\
+                    dummy[:, icolum + nn.size]
+        out[name] = dum.copy()
+    return out
+
+
+# ------------------------------------------------------------------------------
+# --- Benchmark
+# ------------------------------------------------------------------------------
+with tempfile.TemporaryDirectory() as folder:
+    print('Writing synthetic model in %s' % folder)
+    # The energy files are not written and the cache is not used, so both
+    # readers do the same work
+    writeSyntheticModel(folder, energies=False)
+    tic = time.perf_counter()
+    old = oldReading(folder)
+    t_old = time.perf_counter() - tic
+    tic = time.perf_counter()
+    modes = farpy.Modes(path=folder, cache=False)
+    t_new = time.perf_counter() - tic
+    # Check that both readings agree (only existing (n,m) pairs are compared)
+    unique_n, indeces_n = np.unique(n, return_inverse=True)
+    unique_m, indeces_m = np.unique(m, return_inverse=True)
+    for name in names:
+        a = old[name][:, indeces_n, indeces_m]
+        b = modes.data[name].values[:, indeces_n, indeces_m]
+        if not np.array_equal(a, b):
+            raise Exception('Readings of %s do not agree' % name)
+    print('Old reading: %.2f s' % t_old)
+    print('farpy.Modes: %.2f s' % t_new)
+    print('Speed up: %.1f' % (t_old / t_new))
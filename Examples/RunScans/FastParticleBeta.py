@@ -13,7 +13,7 @@ paths = Path()
 referenceSIM = 'ASDEX'
 profileFileName = 'ASDEX_41091.txt'
 equilibiumName = 'Eq_ASDEX'
-basic_scan_name = '41091_n_1_bet0_f'
+scan_prefix = '41091_n_1_'    # Folders will be <scan_prefix>bet0_f_<value>
 betaValues = np.logspace(-3, -1, 25)
 
 # ----------------------------------------
@@ -34,21 +34,14 @@ namelist = farpy.readNamelist(namelistFile)
 far3D = \
     os.path.join(os.path.expanduser('~'), 'FAR3d',
                  'Models')
-for i in range(betaValues.size):
-    # Create the folder for the new model
-    nameModel = basic_scan_name + '_%8.6f' % betaValues[i]
-    modelPath = os.path.join(far3D, nameModel)
-    os.makedirs(modelPath, exist_ok=True)
-    # Copy the executable there
-    os.system('cp %s %s' % (executableFile, modelPath))
-    # Copy the input profiles and equilibrium
-    os.system('cp %s %s' % (equilibriumFile, modelPath))
-    os.system('cp %s %s' % (profileFile, modelPath))
-    # Change the beta value in the namelist
-    namelist2 = namelist.copy()
-    namelist2['bet0_f'] = betaValues[i]
-    # Write the namelist
-    farpy.writeNamelist(os.path.join(modelPath, 'Input_Model'), namelist2)
+# Create all the folders at once. The executable, equilibrium and profiles
+# are hard linked, not copied
+folders = farpy.scan.build(far3D, namelist, {'bet0_f': betaValues},
+                           shared=[executableFile, equilibriumFile,
+                                   profileFile],
+                           prefix=scan_prefix)
+for modelPath in folders:
+    nameModel = os.path.basename(modelPath)
     # Execute the code
     farpy.run.runFAR3d(nameModel)
     # Execute the eigensolver
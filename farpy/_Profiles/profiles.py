@@ -4,6 +4,7 @@ Read and write profiles
 Jose Rueda Rueda: jrrueda@us.es
 """
 
+import hashlib
 import numpy as np
 import matplotlib.pyplot as plt
 from farpy._Profiles._profiles_header import profilesOrderInputs, \
@@ -11,6 +12,74 @@ from farpy._Profiles._profiles_header import profilesOrderInputs, \
 from farpy._Plotting._settings import axis_beauty
 import xarray as xr
 
+# Profiles already parsed, by content of the file, see ProfilesInput
+_profilesCache = {}
+_profilesCacheSize = 32
+
+
+# ------------------------------------------------------------------------------
+# --- Auxiliary functions
+# ------------------------------------------------------------------------------
+def _parseProfiles(text: str, header: dict):
+    """
+    Parse the content of an input profiles file
+
+    :param text: content of the file
+    :param header: dictionary with the columns of the file, see
+        profilesOrderInputs
+
+    :return: xr.Dataset with the profiles
+    """
+    lines = text.splitlines(keepends=True)
+    prof = xr.Dataset()
+    prof['bt0'] = xr.DataArray(float(lines[2]))
+    prof['bt0'].attrs['long_name'] = 'Magnetic field on axis'
+    prof['bt0'].attrs['units'] = 'T'
+    prof['rmajr'] = xr.DataArray(float(lines[4]))
+    prof['rmajr'].attrs['long_name'] = 'Geometric Center Major radius'
+    prof['rmajr'].attrs['units'] = 'm'
+    prof['rminr'] = xr.DataArray(float(lines[6]))
+    prof['rminr'].attrs['long_name'] = 'Minor radius'
+    prof['rminr'].attrs['units'] = 'm'
+    prof['kappa'] = xr.DataArray(float(lines[8]))
+    prof['kappa'].attrs['long_name'] = 'Avg. Elongation'
+    prof['kappa'].attrs['units'] = ''
+    prof['delta'] = xr.DataArray(float(lines[10]))
+    prof['delta'].attrs['long_name'] = 'Avg. Top/Bottom Triangularity'
+    prof['delta'].attrs['units'] = ''
+    prof['mainImpurity'] = xr.DataArray(lines[12])
+    prof['mainImpurity'].attrs['long_name'] = 'Main Contaminant Species'
+    prof['mainImpurity'].attrs['units'] = ''
+    prof['mi_mp'] = xr.DataArray(float(lines[14]))
+    prof['mi_mp'].attrs['long_name'] = 'Main Ion Species mass/proton'
+    prof['mi_mp'].attrs['units'] = ''
+    elements = lines[15].split('=')
+    prof['beta0'] = xr.DataArray(float(elements[1].split(',')[0]))
+    prof['beta0'].attrs['long_name'] = 'beta(0)'
+    prof['beta0'].attrs['units'] = ''
+    prof['Rmax'] = xr.DataArray(float(elements[2]))
+    prof['Rmax'].attrs['long_name'] = 'Rmax'
+    prof['Rmax'].attrs['units'] = 'm'
+    prof['eps'] = xr.DataArray(prof.rminr / prof.rmajr)
+    prof['eps'].attrs['long_name'] = 'Aspect ratio'
+    prof['eps'].attrs['units'] = ''
+    # --- Table with the profiles, after the 18 lines of the header
+    ncolumns = len(lines[18].split())
+    table = np.array(''.join(lines[18:]).split(), dtype=float)
+    if table.size % ncolumns != 0:
+        raise Exception('Wrong number of values in the profiles table')
+    table = table.reshape(-1, ncolumns)
+    rho = table[:, header['rho']['i']]
+    for k in header.keys():
+        if k == 'rho':
+            continue  # The rho is the axis
+        prof[k] = xr.DataArray(table[:, header[k]['i']], dims=('rho'),
+                               coords={'rho': rho})
+        prof[k].attrs['long_name'] = header[k]['longName']
+        prof[k].attrs['short_name'] = header[k]['shortName']
+        prof[k].attrs['units'] = header[k]['units']
+    return prof
+
 
 class Profiles:
     """
@@ -68,7 +137,8 @@ class ProfilesInput(Profiles):
     @ToDo: The writting part
     """
 
-    def __init__(self, filename=None, DIIID_u=0, alpha_on=0):
+    def __init__(self, filename=None, DIIID_u=0, alpha_on=0,
+                 cache: bool = True):
         """
         Initialize the object.
 
@@ -81,75 +151,34 @@ class ProfilesInput(Profiles):
         :param DIIID_u: namelist variable of the simulation, to decide the units
         :param alpha_on: namelist variable of the simulation, to include a
             second specie
+        :param cache: if True, files already read with the same content are
+            not parsed again. The arrays of the profiles are then read-only
         """
         self.file = filename
-        # --- Initilise the profiles
-        prof = xr.Dataset()
-        # Header
-        header = profilesOrderInputs[DIIID_u][alpha_on]
-
         # --- Read the profiles
         if filename is not None:
-            with open(filename) as fid:
-                dummy = fid.readline()
-                dummy = fid.readline()
-                prof['bt0'] = xr.DataArray(float(fid.readline()))
-                prof['bt0'].attrs['long_name'] = 'Magnetic field on axis'
-                prof['bt0'].attrs['units'] = 'T'
-                dummy = fid.readline()
-                prof['rmajr'] = xr.DataArray(float(fid.readline()))
-                prof['rmajr'].attrs['long_name'] = \
-                    'Geometric Center Major radius'
-                prof['rmajr'].attrs['units'] = 'm'
-                dummy = fid.readline()
-                prof['rminr'] = xr.DataArray(float(fid.readline()))
-                prof['rminr'].attrs['long_name'] = 'Minor radius'
-                prof['rminr'].attrs['units'] = 'm'
-                dummy = fid.readline()
-                prof['kappa'] = xr.DataArray(float(fid.readline()))
-                prof['kappa'].attrs['long_name'] = 'Avg. Elongation'
-                prof['kappa'].attrs['units'] = ''
-                dummy = fid.readline()
-                prof['delta'] = xr.DataArray(float(fid.readline()))
-                prof['delta'].attrs['long_name'] = \
-                    'Avg. Top/Bottom Triangularity'
-                prof['delta'].attrs['units'] = ''
-                dummy = fid.readline()
-                prof['mainImpurity'] = xr.DataArray(fid.readline())
-                prof['mainImpurity'].attrs['long_name'] = \
-                    'Main Contaminant Species'
-                prof['mainImpurity'].attrs['units'] = ''
-                dummy = fid.readline()
-                prof['mi_mp'] = xr.DataArray(float(fid.readline()))
-                prof['mi_mp'].attrs['long_name'] = \
-                    'Main Ion Species mass/proton'
-                prof['mi_mp'].attrs['units'] = ''
-                macabro = fid.readline()
-                elements = macabro.split('=')
-                prof['beta0'] = xr.DataArray(float(elements[1].split(',')[0]))
-                prof['beta0'].attrs['long_name'] = 'beta(0)'
-                prof['beta0'].attrs['units'] = ''
-                prof['Rmax'] = xr.DataArray(float(elements[2]))
-                prof['beta0'].attrs['long_name'] = 'Rmax'
-                prof['beta0'].attrs['units'] = 'm'
-                prof['eps'] = xr.DataArray(prof.rminr / prof.rmajr)
-                prof['eps'].attrs['long_name'] = 'Aspect ratio'
-                prof['eps'].attrs['units'] = ''
-                # Finally end of header, uff
-            # Now just read and store the profiles
-            dummy = np.loadtxt(filename, skiprows=18)
-            icolumrho = header['rho']['i']
-
-            for k in header.keys():
-                if k == 'rho':
-                    continue  # The rho is the axis
-                icolum = header[k]['i']
-                prof[k] = xr.DataArray(dummy[:, icolum],
-                                       dims=('rho'),
-                                       coords={'rho': dummy[:, icolumrho]})
-                prof[k].attrs['long_name'] = header[k]['longName']
-                prof[k].attrs['short_name'] = header[k]['shortName']
-                prof[k].attrs['units'] = header[k]['units']
+            # The file is read only once, and the parsed profiles are shared
+            # between all the files with the same content (the points of a
+            # scan use the same profiles)
+            with open(filename, 'rb') as fid:
+                raw = fid.read()
+            key = (hashlib.sha1(raw).digest(), DIIID_u, alpha_on)
+            if not cache or key not in _profilesCache:
+                parsed = _parseProfiles(raw.decode(),
+                                        profilesOrderInputs[DIIID_u][alpha_on])
+                if cache:
+                    if len(_profilesCache) >= _profilesCacheSize:
+                        _profilesCache.clear()
+                    for var in parsed.variables.values():
+                        var.values.flags.writeable = False
+                    _profilesCache[key] = parsed
+            else:
+                parsed = _profilesCache[key]
+            # New dataset on the same (read-only) arrays, so variables can be
+            # added to it without changing the profiles of other objects
+            prof = parsed.copy(deep=False)
+        else:
+            prof = xr.Dataset()
         self.data = prof
 
 
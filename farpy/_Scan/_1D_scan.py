@@ -8,6 +8,7 @@ import numpy as np
 import xarray as xr
 import scipy.constants as cnt
 import matplotlib.pyplot as plt
+from scipy.optimize import linear_sum_assignment
 from datetime import datetime
 from tqdm import tqdm
 from farpy._paths import Path
@@ -16,7 +17,7 @@ from adjustText import adjust_text
 from farpy._Plotting._settings import axis_beauty
 from farpy._eigensolver import EigenSolver
 from farpy._farprt import Farprt
-from farpy._namelist import readNamelist
+from farpy._namelist import readNamelist, peekNamelist
 from farpy._Scan._General_scan_class import Scan
 from farpy._Profiles.profiles import ProfilesInput
 from mpl_toolkits.axes_grid1 import make_axes_locatable
@@ -73,7 +74,8 @@ class Scan1D(Scan):
                     continue
             # If we reached this point, the 'coso' starts with our prefix
             d = os.path.join(self.parentFolder, coso)
-            if os.path.isdir(d):  # Make sure it is a folder
+            # Make sure it is a folder (not the hidden cache folder)
+            if os.path.isdir(d) and not coso.startswith('.'):
                 # Eliminate the prefix
                 if self.prefix is None:
                     name = coso
@@ -132,6 +134,34 @@ class Scan1D(Scan):
             namelist[i1] = readNamelist(name)
         self.namelist = namelist
 
+    def namelistTable(self, keys):
+        """
+        Get some namelist parameters of all the points of the scan
+
+        Only the requested fields are read from each Input_Model, see
+        peekNamelist
+
+        :param keys: name of the namelist field, or list of names
+
+        :return: xr.Dataset with the fields over the scan variable. The arrays
+            (as cvfp) have an extra dimension <field>_index
+        """
+        if isinstance(keys, str):
+            keys = [keys]
+        values = {k: [] for k in keys}
+        for var1 in self.vars[0].values:
+            namelist = peekNamelist(
+                os.path.join(self._folder(var1), 'Input_Model'), keys)
+            for k in keys:
+                values[k].append(namelist[k])
+        name = self.vars[0].attrs['long_name']
+        table = xr.Dataset(coords={name: self.vars[0].values})
+        for k in keys:
+            data = np.array(values[k])
+            table[k] = xr.DataArray(data,
+                                    dims=(name, k + '_index')[:data.ndim])
+        return table
+
     def readProfiles(self, complete: bool = False):
         """
         Read the input profile file
@@ -172,9 +202,12 @@ class Scan1D(Scan):
     # -------------------------------------------------------------------------
     # --- Modes, from standard FAR3D simulation
     # -------------------------------------------------------------------------
-    def readModes(self):
+    def readModes(self, lazy: bool = False):
         """
         Read the mode profiles
+
+        :param lazy: if True, the variables of each simulation will be read
+            only when they are accessed. See the Modes object
         """
         # -- Allocate the space
         n1 = self.vars[0].size
@@ -192,7 +225,7 @@ class Scan1D(Scan):
                 name = os.path.join(self.parentFolder, self.prefix +
                                     self.vars[0].attrs['long_name'] + fmt1%var1)
 
-            modes[i1] = Modes(name)
+            modes[i1] = Modes(name, lazy=lazy)
         self.modes = modes
 
     # --------------------------------------------------------------------------
@@ -224,6 +257,113 @@ class Scan1D(Scan):
                 eigen[i1]._read_egn_mode_asci()
         self.eigen = eigen
 
+    def filterSpurious(self, drop: bool = False, **kwargs):
+        """
+        Mark (or remove) the spurious eigenvectors of all the points
+
+        See EigenSolver.filterSpurious() for the criteria. The marked
+        eigenvectors are skipped by trackEigenmodes() and
+        plotFrequenciesEigensolver()
+
+        :param drop: if True, the spurious eigenvectors are removed
+        :param kwargs: limits passed to EigenSolver.filterSpurious()
+
+        :return: xr.DataArray with the number of spurious eigenvectors at each
+            point of the scan
+        """
+        if self.eigen is None:
+            self.readEigensolver(loadModes=True)
+        nbad = np.zeros(self.eigen.size, dtype=int)
+        for i, eigen in enumerate(self.eigen):
+            nbad[i] = eigen.filterSpurious(drop=drop, **kwargs).values.sum()
+        name = self.vars[0].attrs['long_name']
+        return xr.DataArray(nbad, dims=name,
+                            coords={name: self.vars[0].values})
+
+    def trackEigenmodes(self, minOverlap: float = 0.5):
+        """
+        Link the eigenmodes of adjacent points of the scan in branches
+
+        The overlap between all the eigenvectors of two adjacent points is
+        calculated with a single matrix product of the normalised amplitudes
+        (flattened over mode and r), and the eigenvectors are paired solving
+        the assignment problem which maximises the total overlap
+
+        The eigenvectors marked as spurious by filterSpurious() are skipped
+
+        :param minOverlap: minimum overlap (between 0 and 1) to link two
+            eigenvectors. Below it, a new branch is started
+
+        :return: xr.Dataset with the j, omega and gamma of each branch at each
+            point of the scan (-1 and NaN where the branch is not present)
+            and the overlap with the previous point. It is also saved in
+            self.branches. The j are the indices of the eigenvectors in the
+            files, to be used in EigenSolver.vector(j)
+        """
+        if self.eigen is None:
+            self.readEigensolver(loadModes=True)
+        npoints = self.eigen.size
+        # --- Normalised eigenvectors of each point, as (j, mode*r)
+        vectors = []
+        keep = []
+        ids = []
+        for eigen in self.eigen:
+            if 'amp' not in eigen._data.keys():
+                eigen._read_egn_mode_asci()
+            amp = eigen._data['amp']
+            if 'spurious' in eigen._data.keys():
+                keep.append(np.flatnonzero(~eigen._data['spurious'].values))
+            else:
+                keep.append(np.arange(amp.shape[0]))
+            # Index of the eigenvectors in the files, which is not the
+            # position if the spurious ones were dropped
+            ids.append(amp['j'].values[keep[-1]])
+            X = np.asarray(amp.values[keep[-1]]).reshape(keep[-1].size, -1)
+            norm = np.linalg.norm(X, axis=1)
+            norm[norm == 0.0] = 1.0
+            vectors.append(X / norm[:, None])
+        # --- Label of the branch of each eigenvector
+        labels = [np.arange(vectors[0].shape[0])]
+        overlaps = [np.full(vectors[0].shape[0], np.nan)]
+        nbranches = labels[0].size
+        for i in range(1, npoints):
+            if vectors[i].shape[1] != vectors[i - 1].shape[1]:
+                raise Exception('Modes and radial grid should not change')
+            # The sign of the eigenvectors is arbitrary
+            overlap = np.abs(vectors[i - 1] @ vectors[i].T)
+            rows, cols = linear_sum_assignment(overlap, maximize=True)
+            good = overlap[rows, cols] >= minOverlap
+            label = np.full(vectors[i].shape[0], -1)
+            label[cols[good]] = labels[-1][rows[good]]
+            ov = np.full(vectors[i].shape[0], np.nan)
+            ov[cols[good]] = overlap[rows[good], cols[good]]
+            new = label == -1
+            label[new] = nbranches + np.arange(new.sum())
+            nbranches += new.sum()
+            labels.append(label)
+            overlaps.append(ov)
+        # --- Place everything as (branch, point)
+        j = np.full((nbranches, npoints), -1)
+        omega = np.full((nbranches, npoints), np.nan)
+        gamma = np.full((nbranches, npoints), np.nan)
+        overlap = np.full((nbranches, npoints), np.nan)
+        for i in range(npoints):
+            j[labels[i], i] = ids[i]
+            omega[labels[i], i] = self.eigen[i]._data['omega'].values[keep[i]]
+            gamma[labels[i], i] = self.eigen[i]._data['gamma'].values[keep[i]]
+            overlap[labels[i], i] = overlaps[i]
+        name = self.vars[0].attrs['long_name']
+        dims = ('branch', name)
+        coords = {'branch': np.arange(nbranches), name: self.vars[0].values}
+        branches = xr.Dataset(coords=coords)
+        branches['j'] = xr.DataArray(j, dims=dims)
+        branches['omega'] = xr.DataArray(omega, dims=dims)
+        branches['omega'].attrs = self.eigen[0]._data['omega'].attrs.copy()
+        branches['gamma'] = xr.DataArray(gamma, dims=dims)
+        branches['overlap'] = xr.DataArray(overlap, dims=dims)
+        self.branches = branches
+        return branches
+
     # --------------------------------------------------------------------------
     # --- Re-normalization
     # --------------------------------------------------------------------------
@@ -285,6 +425,10 @@ class Scan1D(Scan):
             f = eigen._data['omega']
             # Get the growth rate
             g = eigen._data['gamma']
+            # Skip the spurious modes, if they were marked
+            if 'spurious' in eigen._data.keys():
+                f = f[~eigen._data['spurious'].values]
+                g = g[~eigen._data['spurious'].values]
             # Prepare the x for the scatter
             x = var1.values*np.ones(f.values.size)
             # plot the stuff
@@ -313,3 +457,34 @@ class Scan1D(Scan):
         ax = axis_beauty(ax, ax_options)
         return ax
 
+    def plotBranchesEigensolver(self, var: str = 'omega', minLength: int = 2,
+                                ax=None, ax_params: dict = {},
+                                line_params: dict = {}):
+        """
+        Plot the eigenmode branches found by trackEigenmodes
+
+        :param var: 'omega' or 'gamma'
+        :param minLength: minimum number of scan points of a branch to be
+            plotted
+        :param ax: axes where to plot, if None, new ones will be created
+        :param ax_params: axis parameters for the function axis_beauty
+        :param line_params: line parameters for the matplotlib plot function
+
+        :return ax: the axes where the branches were plotted
+        """
+        ax_options = {
+            'xlabel': self.vars[0].attrs['long_name'],
+            'ylabel': var,
+        }
+        ax_options.update(ax_params)
+        if self.branches is None:
+            self.trackEigenmodes()
+        if ax is None:
+            fig, ax = plt.subplots()
+        x = self.vars[0].values
+        y = self.branches[var].values
+        for yb in y[np.isfinite(y).sum(axis=1) >= minLength]:
+            ax.plot(x, yb, **line_params)
+        ax = axis_beauty(ax, ax_options)
+        return ax
+
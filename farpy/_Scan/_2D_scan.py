@@ -12,7 +12,7 @@ from datetime import datetime
 from tqdm import tqdm
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from farpy._farprt import Farprt
-from farpy._namelist import readNamelist
+from farpy._namelist import readNamelist, peekNamelist
 from farpy._paths import Path
 from farpy._Profiles.profiles import ProfilesInput
 from farpy._modes import Modes
@@ -54,22 +54,24 @@ class Scan2D(Scan):
         """
         # --- Pre allocate a bit of attributes:
         Scan.__init__(self)
+        self.parentFolder = parentFolder
         # --- See what it is inside
         var1Values = []
         var2Values = []
         read_subfolder = True
         for coso in os.listdir(parentFolder):
             d = os.path.join(parentFolder, coso)
-            if os.path.isdir(d):
+            # The hidden folders (as the cache) are not part of the scan
+            if os.path.isdir(d) and not coso.startswith('.'):
                 # If it is a folder, get the values
-                var1Name, dummy = coso.split('_')
+                var1Name, dummy = coso.rsplit('_', 1)
                 var1Values.append(dummy)
                 # If it is a folder, do the same with the subfolder
                 if read_subfolder:
                     for coso2 in os.listdir(d):
                         d2 = os.path.join(d, coso2)
-                        if os.path.isdir(d2):
-                            var2Name, dummy2 = coso2.split('_')
+                        if os.path.isdir(d2) and not coso2.startswith('.'):
+                            var2Name, dummy2 = coso2.rsplit('_', 1)
                             var2Values.append(dummy2)
                     read_subfolder = False
         # --- Now we have the variables and the values of the scan, so let's
@@ -216,6 +218,40 @@ class Scan2D(Scan):
                 namelist[i1, i2] = readNamelist(name)
         self.namelist = namelist
 
+    def namelistTable(self, keys):
+        """
+        Get some namelist parameters of all the points of the scan
+
+        Only the requested fields are read from each Input_Model, see
+        peekNamelist
+
+        :param keys: name of the namelist field, or list of names
+
+        :return: xr.Dataset with the fields over the scan variables. The
+            arrays (as cvfp) have an extra dimension <field>_index
+        """
+        if isinstance(keys, str):
+            keys = [keys]
+        values = {k: [] for k in keys}
+        for var1 in self.vars[0].values:
+            for var2 in self.vars[1].values:
+                namelist = peekNamelist(
+                    os.path.join(self._folder(var1, var2), 'Input_Model'),
+                    keys)
+                for k in keys:
+                    values[k].append(namelist[k])
+        name1 = self.vars[0].attrs['long_name']
+        name2 = self.vars[1].attrs['long_name']
+        table = xr.Dataset(coords={name1: self.vars[0].values,
+                                   name2: self.vars[1].values})
+        for k in keys:
+            data = np.array(values[k])
+            data = data.reshape((self.vars[0].size, self.vars[1].size) +
+                                data.shape[1:])
+            table[k] = xr.DataArray(
+                data, dims=(name1, name2, k + '_index')[:data.ndim])
+        return table
+
     def readProfiles(self, complete: bool = False):
         """
         Read the input profile file
@@ -257,9 +293,12 @@ class Scan2D(Scan):
     # --------------------------------------------------------------------------
     # --- Modes
     # --------------------------------------------------------------------------
-    def readModes(self):
+    def readModes(self, lazy: bool = False):
         """
         Read the mode profiles
+
+        :param lazy: if True, the variables of each simulation will be read
+            only when they are accessed. See the Modes object
         """
         # -- Allocate the space
         n1 = self.vars[0].size
@@ -278,7 +317,7 @@ class Scan2D(Scan):
                 name = os.path.join(self.parentFolder, 
                                     self.vars[0].attrs['long_name'] + fmt1%var1,
                                     self.vars[1].attrs['long_name'] + fmt2%var2)
-                modes[i1, i2] = Modes(name)
+                modes[i1, i2] = Modes(name, lazy=lazy)
         self.modes = modes
 
     # --------------------------------------------------------------------------
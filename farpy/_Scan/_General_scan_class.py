@@ -1,6 +1,14 @@
 """
 Just a dummy skeleton of a scan class, to share the same names
 """
+import os
+import logging
+import itertools
+import numpy as np
+import pandas as pd
+from farpy._namelist import readNamelist
+from farpy._cache import readTable, writeTable
+logger = logging.getLogger('farpy.Scans')
 
 
 class Scan():
@@ -21,4 +29,123 @@ class Scan():
         self.namelist = None  # It will be filled with the namelists
         self.profiles = None  # It will be filled with the profiles
         self.vars = None      # It will be filled with the variables used in the scan
-        self.eigen = None     # To be filled with eigen solver results
\ No newline at end of file
+        self.eigen = None     # To be filled with eigen solver results
+        self.branches = None  # To be filled with the tracked eigenmodes
+        self.index = None     # To be filled with the namelist index
+
+    # --------------------------------------------------------------------------
+    # --- Namelist index
+    # --------------------------------------------------------------------------
+    def _folder(self, *values):
+        """
+        Get the folder of a point of the scan
+
+        The folders are nested, one level per scan variable, named as
+        <varName>_<value> with the decimals of the variable. The prefix is
+        only added to the first level
+
+        :param values: value of each scan variable
+        """
+        levels = []
+        for var, value in zip(self.vars, values):
+            levels.append(var.attrs['long_name'] +
+                          '_%.*f' % (var.attrs['decimals'], value))
+        if self.prefix is not None:
+            levels[0] = self.prefix + levels[0]
+        return os.path.join(self.parentFolder, *levels)
+
+    def _points(self):
+        """
+        List the points of the scan
+
+        All the combinations of the values of the scan variables
+
+        :return: list with the folder of each point (relative to the parent
+            folder) and a dictionary with its values of the scan variables
+        """
+        names = [var.attrs['long_name'] for var in self.vars]
+        return [(os.path.relpath(self._folder(*values), self.parentFolder),
+                 dict(zip(names, values)))
+                for values in itertools.product(
+                    *[var.values for var in self.vars])]
+
+    def namelistIndex(self, update: bool = True):
+        """
+        Get a table with the namelist parameters of all the points
+
+        Each row contains the folder of a point and all the fields of its
+        Input_Model. The arrays are flattened in one column per element
+        (cvfp_0, cvfp_1...). The table is saved in the .farpy_cache folder of
+        the scan, and only the namelists which changed (size or modification
+        time) since the last call are read again
+
+        :param update: if False, the saved table is used as it is, without
+            checking the namelist files
+
+        :return: pd.DataFrame with the table. It is also saved in self.index
+        """
+        if self.index is None:
+            self.index = readTable(self.parentFolder, 'namelists')
+        if self.index is not None and not update:
+            return self.index
+        old = self.index
+        known = {} if old is None else \
+            {f: i for i, f in enumerate(old['folder'].values)}
+        keep = []
+        rows = []
+        for folder, values in self._points():
+            file = os.path.join(self.parentFolder, folder, 'Input_Model')
+            if not os.path.isfile(file):
+                logger.debug('No namelist in %s', folder)
+                continue
+            stat = os.stat(file)
+            i = known.get(folder, None)
+            if i is not None and old['mtime'].values[i] == stat.st_mtime_ns \
+                    and old['size'].values[i] == stat.st_size:
+                keep.append(i)
+                continue
+            row = {'folder': folder, 'mtime': stat.st_mtime_ns,
+                   'size': stat.st_size}
+            for key, value in readNamelist(file).items():
+                if isinstance(value, np.ndarray):
+                    for j, v in enumerate(value):
+                        row['%s_%i' % (key, j)] = v
+                elif isinstance(value, bool):
+                    row[key] = int(value)
+                else:
+                    row[key] = value
+            rows.append(row)
+        if old is not None and len(rows) == 0 and len(keep) == len(old):
+            return self.index
+        logger.info('Indexing %i namelists', len(rows))
+        tables = [pd.DataFrame(rows)]
+        if old is not None:
+            tables.insert(0, old.iloc[keep])
+        self.index = pd.concat(tables, ignore_index=True)
+        writeTable(self.index, self.parentFolder, 'namelists')
+        return self.index
+
+    def selectPoints(self, condition, update: bool = False):
+        """
+        Find the points of the scan which fulfil a condition
+
+        The condition is evaluated on the namelist index (see namelistIndex),
+        so the namelist files are not read
+
+        :param condition: string with the condition, as in pd.DataFrame.query,
+            for example 'bet0_f > 0.01 and cvfp_0 < 2', or a function which
+            takes the index and returns a boolean mask
+        :param update: if True, the index is updated before the selection
+
+        :return: pd.DataFrame with the folder and the values of the scan
+            variables of the selected points
+        """
+        index = self.namelistIndex(update=update or self.index is None)
+        if callable(condition):
+            selected = index['folder'][np.asarray(condition(index))]
+        else:
+            selected = index.query(condition)['folder']
+        points = pd.DataFrame([dict(values, folder=folder)
+                               for folder, values in self._points()])
+        return points[points['folder'].isin(selected.values)]\
+            .reset_index(drop=True)
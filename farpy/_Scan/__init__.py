@@ -1,2 +1,3 @@
 from farpy._Scan._2D_scan import Scan2D
-from farpy._Scan._1D_scan import Scan1D
\ No newline at end of file
+from farpy._Scan._1D_scan import Scan1D
+from farpy._Scan._build import build
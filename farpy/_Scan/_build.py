@@ -0,0 +1,155 @@
+"""
+Create the folders of a scan of FAR3D simulations
+
+The folders follow the layout read by Scan1D and Scan2D:
+<ParentFolder>
+    <varName1>_<var1Value>
+        <varName2>_<var2Value>
+"""
+import os
+import shutil
+import logging
+import itertools
+from farpy._namelist import readNamelist, _namelistLines, _formatValue, \
+    _planIndex, _valueLine, _readPlan, namelistSchema
+logger = logging.getLogger('farpy.Scans')
+
+__all__ = ['build']
+
+
+# ------------------------------------------------------------------------------
+# --- Auxiliary functions
+# ------------------------------------------------------------------------------
+def _linkFile(source: str, destination: str, link: str):
+    """
+    Place a shared input file in the folder of a simulation
+
+    :param source: path to the shared file
+    :param destination: path of the file inside the folder of the simulation
+    :param link: 'hardlink', 'symlink' or 'copy'
+
+    :return: the method used. The hard links fall back to copies if they are
+        not possible (for example, if the scan is in other file system)
+    """
+    if os.path.lexists(destination):
+        os.remove(destination)
+    if link == 'hardlink':
+        try:
+            os.link(source, destination)
+            return link
+        except OSError:
+            link = 'copy'
+    if link == 'symlink':
+        os.symlink(os.path.abspath(source), destination)
+    elif link == 'copy':
+        shutil.copy2(source, destination)
+    else:
+        raise Exception('Not understood link method: %s' % link)
+    return link
+
+
+# ------------------------------------------------------------------------------
+# --- Scan creation
+# ------------------------------------------------------------------------------
+def build(parentFolder: str, namelist, variables: dict = None,
+          points: list = None, shared: list = [], link: str = 'hardlink',
+          decimals=6, prefix: str = None, overwrite: bool = True):
+    """
+    Create the folders of all the points of a scan
+
+    Each point gets a folder with its Input_Model and the shared input files
+    (executable, equilibrium, profiles...). The shared files are linked, not
+    copied, so they do not take disk space. The namelist is rendered once,
+    and only the lines of the scanned fields are changed for each point
+
+    Jose Rueda: jrrueda@us.es
+
+    :param parentFolder: folder where the scan will be created
+    :param namelist: template namelist, as a dictionary or the path to the
+        namelist file
+    :param variables: dictionary with the values of each namelist field to
+        be scanned, for example {'bet0_f': [0.01, 0.02]}. All the
+        combinations are created, nesting the folders in the order of the
+        dictionary (one level for 1D scans, two for 2D scans...). Only the
+        numeric fields which are not arrays, nor the size of other arrays
+        (ldim, leqdim), can be scanned
+    :param points: list of dictionaries with the fields of each point, for
+        arbitrary scans (instead of variables). All of them should have the
+        same fields
+    :param shared: list of files to be placed in all the folders
+    :param link: 'hardlink', 'symlink' or 'copy'. Hard links fall back to
+        copies when they are not possible
+    :param decimals: number of decimals of the values in the folder names,
+        an integer or a dictionary with one integer per field. All the
+        values of a field must have the same decimals, see Scan1D
+    :param prefix: prefix of the folder names (only for the first level),
+        see Scan1D
+    :param overwrite: if False, an Exception is raised if the Input_Model of
+        a point already exists
+
+    :return: list with the folders of all the points
+    """
+    # --- Check the inputs
+    if (variables is None) == (points is None):
+        raise Exception('Give the variables or the points of the scan')
+    if isinstance(namelist, (str, os.PathLike)):
+        namelist = readNamelist(namelist)
+    if variables is not None:
+        names = list(variables.keys())
+        points = [dict(zip(names, values)) for values in
+                  itertools.product(*[variables[k] for k in names])]
+    else:
+        names = list(points[0].keys())
+    unknown = [k for k in names if k not in _planIndex]
+    if len(unknown) > 0:
+        raise Exception('Unknown namelist fields: %s' % ', '.join(unknown))
+    # Only one value line is changed per field, so the arrays, and the fields
+    # which give the size of other arrays, can not be scanned. Neither the
+    # strings, as the folder names should contain a number
+    counts = [p[3] for p in _readPlan if isinstance(p[3], str)]
+    for p in _readPlan:
+        if p[1] not in names:
+            continue
+        if p[4]:
+            raise Exception('Array field %s can not be scanned' % p[1])
+        if p[1] in counts:
+            raise Exception('%s gives the size of other arrays, it can not'
+                            ' be scanned' % p[1])
+        if p[2] not in (int, float):
+            raise Exception('Only numeric fields can be scanned, not %s'
+                            % p[1])
+    if not isinstance(decimals, dict):
+        decimals = {k: decimals for k in names}
+    fmt = {k: '%s_%%.%if' % (k, decimals[k]) for k in names}
+    # --- Render the template
+    template = _namelistLines(namelist)
+    entries = {e[0]: e for e in namelistSchema if not isinstance(e, str)}
+    lines = {k: _valueLine[_planIndex[k]] for k in names}
+    # --- Create the folders
+    logger.info('Creating %i folders in %s', len(points), parentFolder)
+    folders = []
+    used = set()
+    for point in points:
+        levels = [fmt[k] % point[k] for k in names]
+        if prefix is not None:
+            levels[0] = prefix + levels[0]
+        folder = os.path.join(parentFolder, *levels)
+        os.makedirs(folder, exist_ok=True)
+        # Write the namelist
+        filename = os.path.join(folder, 'Input_Model')
+        if not overwrite and os.path.isfile(filename):
+            raise Exception('Namelist file exist')
+        text = template.copy()
+        for k in names:
+            text[lines[k]] = _formatValue(entries[k], point[k])
+        with open(filename, 'w') as fid:
+            fid.write('\n'.join(text))
+        # Place the shared files
+        for file in shared:
+            used.add(_linkFile(file, os.path.join(folder,
+                                                  os.path.basename(file)),
+                               link))
+        folders.append(folder)
+    if link == 'hardlink' and 'copy' in used:
+        logger.warning('10: Hard links not possible, files were copied')
+    return folders
@@ -1,7 +1,8 @@
 from farpy._farprt import Farprt
 from farpy._modes import Modes
 from farpy._eigensolver import EigenSolver
-from farpy._namelist import readNamelist, writeNamelist
+from farpy._namelist import readNamelist, peekNamelist, writeNamelist
+from farpy._cache import clearCache
 import farpy._Plotting as plt
 import farpy._Profiles as profiles
 import farpy._Scan as scan
@@ -0,0 +1,299 @@
+"""
+Binary cache of the parsed FAR3D outputs
+
+The data parsed from the ASCII files is saved as a netCDF file in a hidden
+folder inside the model folder, uncompressed unless compressCache is set to
+True. Each cache file stores the size and modification time of the source
+files it was created from, and it is ignored (and later overwritten) as soon
+as any of these source files changes
+
+Long time series are stored instead as .npy files, to be opened as memory
+mapped arrays, with their metadata in a .json file next to them, and tables
+(as the namelist index of the scans) as SQLite databases
+"""
+import os
+import json
+import shutil
+import sqlite3
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+import xarray as xr
+from contextlib import closing
+logger = logging.getLogger('farpy.Cache')
+try:
+    import netCDF4
+    _compression = True
+except ImportError:
+    _compression = False
+
+__all__ = ['readCache', 'writeCache', 'clearCache', 'readMemmap',
+           'writeMemmap', 'digest', 'fileStamps', 'readTable', 'writeTable']
+
+# Name of the folder, inside each model folder, where the cache is stored
+cacheFolderName = '.farpy_cache'
+# Default compression of the netCDF files, see writeCache
+compressCache = False
+
+
+# ------------------------------------------------------------------------------
+# --- Auxiliary functions
+# ------------------------------------------------------------------------------
+def _cacheFile(folder: str, name: str, extension: str = '.nc'):
+    """
+    Get the path of a cache file
+
+    :param folder: model folder
+    :param name: name of the cached quantity
+    :param extension: extension of the file
+    """
+    return os.path.join(folder, cacheFolderName, name + extension)
+
+
+def fileStamps(files: list):
+    """
+    Get the name, size and modification time of a set of source files
+
+    :param files: list with the full path of the source files
+
+    :return: list with [name, size, modification time] of each file
+    """
+    stamps = []
+    for file in files:
+        stat = os.stat(file)
+        stamps.append([os.path.basename(file), stat.st_size,
+                       stat.st_mtime_ns])
+    return stamps
+
+
+def _fingerprint(files: list):
+    """
+    Get the fingerprint of a set of source files
+
+    :param files: list with the full path of the source files
+
+    :return: string with the name, size and modification time of the files
+    """
+    return json.dumps(fileStamps(files))
+
+
+def digest(files: list):
+    """
+    Get a short fingerprint of a set of source files
+
+    Used for the memory mapped arrays, which can come from thousands of files
+
+    :param files: list with the full path of the source files
+
+    :return: sha1 digest of the fingerprint of the files
+    """
+    return hashlib.sha1(_fingerprint(files).encode()).hexdigest()
+
+
+# ------------------------------------------------------------------------------
+# --- Read, write and clean
+# ------------------------------------------------------------------------------
+def readCache(folder: str, name: str, files: list):
+    """
+    Read a cached dataset
+
+    :param folder: model folder
+    :param name: name of the cached quantity
+    :param files: list with the full path of the source files
+
+    :return: the cached dataset, or None if there is no cache file or it is
+        outdated
+    """
+    filename = _cacheFile(folder, name)
+    if not os.path.isfile(filename):
+        return None
+    try:
+        finger = _fingerprint(files)
+        with xr.open_dataset(filename) as ds:
+            if ds.attrs.get('farpy_fingerprint', None) != finger:
+                logger.debug('Outdated cache for %s', name)
+                return None
+            data = ds.load()
+    except (OSError, ValueError):
+        logger.warning('10: Corrupted cache for %s, ignoring it', name)
+        return None
+    del data.attrs['farpy_fingerprint']
+    logger.debug('Read %s from cache', name)
+    return data
+
+
+def writeCache(data, folder: str, name: str, files: list,
+               compress: bool = None):
+    """
+    Save a dataset in the cache
+
+    Errors are not raised, as a cache which can not be written (for example in
+    a read-only folder) should not stop the reading of the data
+
+    :param data: xr.Dataset to be saved
+    :param folder: model folder
+    :param name: name of the cached quantity
+    :param files: list with the full path of the source files
+    :param compress: if True, the variables are compressed with zlib (needs
+        netCDF4). The mantissas of the FAR3D outputs are almost random, so
+        this saves only ~10% of disk at ~8 times the writing time: use it
+        only if the disk space is limited. If None, compressCache is used
+    """
+    filename = _cacheFile(folder, name)
+    data = data.copy()
+    data.attrs['farpy_fingerprint'] = _fingerprint(files)
+    if compress is None:
+        compress = compressCache
+    if compress and not _compression:
+        logger.warning('10: netCDF4 not found, the cache is not compressed')
+        compress = False
+    options = {}
+    if compress:
+        options = {'engine': 'netcdf4',
+                   'encoding': {k: {'zlib': True, 'complevel': 4}
+                                for k in data.data_vars
+                                if data[k].dtype.kind in 'fiuc'}}
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Write to a temporal file first, so other processes never see a
+        # half written cache
+        tmp = filename + '.%i.tmp' % os.getpid()
+        data.to_netcdf(tmp, **options)
+        os.replace(tmp, filename)
+    except (OSError, ValueError) as e:
+        logger.warning('10: Cache for %s could not be written: %s', name, e)
+
+
+def clearCache(folder: str):
+    """
+    Remove all the cache files of a model folder
+
+    :param folder: model folder
+    """
+    path = os.path.join(folder, cacheFolderName)
+    if os.path.isdir(path):
+        logger.info('Removing %s', path)
+        shutil.rmtree(path)
+
+
+def readMemmap(folder: str, name: str):
+    """
+    Open a memory mapped array of the cache
+
+    The fingerprint is not checked here, as the caller may want to reuse an
+    array created from a subset of the current source files. Compare
+    meta['fingerprint'] with digest(files), or meta['files'] with
+    fileStamps(files) to find which source files changed
+
+    :param folder: model folder
+    :param name: name of the cached quantity
+
+    :return array: read-only memory mapped array, None if it does not exist
+    :return meta: dictionary with the metadata saved with the array
+    """
+    filename = _cacheFile(folder, name, '.npy')
+    metaFile = _cacheFile(folder, name, '.json')
+    if not (os.path.isfile(filename) and os.path.isfile(metaFile)):
+        return None, None
+    try:
+        with open(metaFile) as fid:
+            meta = json.load(fid)
+        array = np.load(filename, mmap_mode='r')
+    except (OSError, ValueError):
+        logger.warning('10: Corrupted cache for %s, ignoring it', name)
+        return None, None
+    if list(array.shape) != meta.get('shape', None):
+        logger.debug('Inconsistent cache for %s', name)
+        return None, None
+    return array, meta
+
+
+def writeMemmap(blocks: list, folder: str, name: str, files: list,
+                meta: dict):
+    """
+    Save an array in the cache, to be opened as a memory mapped array
+
+    The array is written block by block, so an existing memory mapped array
+    can be extended without loading it in memory. As for writeCache, errors
+    are not raised
+
+    :param blocks: list of arrays, to be concatenated along the first axis
+    :param folder: model folder
+    :param name: name of the cached quantity
+    :param files: list with the full path of the source files. Their
+        stamps (see fileStamps) are saved in meta['files'] and their digest
+        in meta['fingerprint']
+    :param meta: dictionary with the metadata to be saved with the array.
+        It should be serializable as json
+    """
+    filename = _cacheFile(folder, name, '.npy')
+    metaFile = _cacheFile(folder, name, '.json')
+    shape = (sum([b.shape[0] for b in blocks]),) + blocks[0].shape[1:]
+    stamps = fileStamps(files)
+    meta = dict(meta, files=stamps, shape=list(shape),
+                fingerprint=hashlib.sha1(
+                    json.dumps(stamps).encode()).hexdigest())
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmp = filename + '.%i.tmp' % os.getpid()
+        out = np.lib.format.open_memmap(tmp, mode='w+', dtype=blocks[0].dtype,
+                                        shape=shape)
+        i = 0
+        for b in blocks:
+            out[i:i + b.shape[0]] = b
+            i += b.shape[0]
+        out.flush()
+        del out
+        # The metadata is written last: a reader in between gets the new
+        # array with the old metadata and ignores them (see readMemmap)
+        os.replace(tmp, filename)
+        with open(metaFile + '.%i.tmp' % os.getpid(), 'w') as fid:
+            json.dump(meta, fid)
+        os.replace(metaFile + '.%i.tmp' % os.getpid(), metaFile)
+    except (OSError, ValueError) as e:
+        logger.warning('10: Cache for %s could not be written: %s', name, e)
+
+
+def readTable(folder: str, name: str):
+    """
+    Read a table of the cache
+
+    :param folder: model (or scan) folder
+    :param name: name of the table
+
+    :return: pd.DataFrame with the table, None if it does not exist
+    """
+    filename = _cacheFile(folder, name, '.sqlite')
+    if not os.path.isfile(filename):
+        return None
+    try:
+        with closing(sqlite3.connect(filename)) as db:
+            return pd.read_sql('SELECT * FROM "%s"' % name, db)
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        logger.warning('10: Corrupted cache for %s, ignoring it', name)
+        return None
+
+
+def writeTable(table, folder: str, name: str):
+    """
+    Save a table in the cache, as a SQLite database
+
+    As for writeCache, errors are not raised
+
+    :param table: pd.DataFrame to be saved
+    :param folder: model (or scan) folder
+    :param name: name of the table
+    """
+    filename = _cacheFile(folder, name, '.sqlite')
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmp = filename + '.%i.tmp' % os.getpid()
+        if os.path.isfile(tmp):
+            os.remove(tmp)
+        with closing(sqlite3.connect(tmp)) as db:
+            table.to_sql(name, db, index=False)
+            db.commit()
+        os.replace(tmp, filename)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        logger.warning('10: Cache for %s could not be written: %s', name, e)
@@ -11,11 +11,164 @@ import numpy as np
 import xarray as xr
 import matplotlib.pyplot as plt
 from farpy._Plotting._settings import axis_beauty
+from farpy._cache import readMemmap, writeMemmap, digest, clearCache
 
 # ------------------------------------------------------------------------------
 # --- Auxiliary object
 # ------------------------------------------------------------------------------
 logger = logging.getLogger('farpy.EigenVectors')
+# Size of the pieces of egn_mode_asci.dat read to locate the eigenvectors
+_chunkBytes = 2**24
+
+
+# ------------------------------------------------------------------------------
+# --- Auxiliary functions
+# ------------------------------------------------------------------------------
+def _read_egn_mode_asci_body(filename: str, headerLines: int, nmat: int,
+                             mn_col: int, ns: int):
+    """
+    Read the numerical block of the egn_mode_asci file in one go
+
+    The file has one number per line: the nmat eigenvalues, the ns radial
+    points and then, for each eigenvalue and radial point, the pairs of
+    amplitudes of the mn_col positive m and their negative counterparts.
+    The whole body is read at once and split by these known counts
+
+    :param filename: full path to the file
+    :param headerLines: number of lines of the header
+    :param nmat: number of eigenvalues
+    :param mn_col: number of poloidal modes (positive m)
+    :param ns: number of radial points
+
+    :return dm: array with the eigenvalues
+    :return rho: array with the radial grid
+    :return vectors: array (nmat, ns, mn_col, 2) with the amplitudes, last
+        index is 0 for the positive m and 1 for the negative ones
+    :return extraLines: list with the lines after the numerical block
+    """
+    count = nmat + ns + nmat * ns * mn_col * 2
+    with open(filename, 'r') as fid:
+        for j in range(headerLines):
+            fid.readline()
+        body = fid.read().split('\n', count)
+    if len(body) < count:
+        raise Exception('Unexpected end of %s' % filename)
+    values = np.array(body[:count], dtype=float)
+    extraLines = body[count].splitlines(keepends=True) \
+        if len(body) > count else []
+    dm = values[:nmat]
+    rho = values[nmat:nmat + ns]
+    vectors = values[nmat + ns:].reshape(nmat, ns, mn_col, 2)
+    return dm, rho, vectors, extraLines
+
+
+def _index_egn_mode_asci_blocks(filename: str, headerLines: int, nmat: int,
+                                mn_col: int, ns: int):
+    """
+    Locate the eigenvectors in the egn_mode_asci file
+
+    Each eigenvector is a block of 2*mn_col*ns lines. The file is read once,
+    in chunks of _chunkBytes, counting the new lines (without parsing the
+    numbers), and only the position of the start of each block is kept, so
+    the memory does not depend on the size of the file. The width of the
+    lines does not matter
+
+    :param filename: full path to the file
+    :param headerLines: number of lines of the header
+    :param nmat: number of eigenvalues
+    :param mn_col: number of poloidal modes (positive m)
+    :param ns: number of radial points
+
+    :return rho: array with the radial grid
+    :return offsets: array with the nmat + 1 positions (in bytes) of the
+        start of each block and the end of the last one
+    """
+    blockLines = 2 * mn_col * ns
+    offsets = np.empty(nmat + 1, dtype=np.int64)
+    with open(filename, 'rb') as fid:
+        for i in range(headerLines + nmat):
+            fid.readline()
+        rho = np.array([float(fid.readline()) for i in range(ns)])
+        offsets[0] = fid.tell()
+        position = offsets[0]   # Position of the start of the chunk
+        counted = 0             # New lines before the chunk
+        k = 1                   # Next block end to be found
+        while k <= nmat:
+            chunk = fid.read(_chunkBytes)
+            if len(chunk) == 0:
+                if k == nmat and counted == nmat * blockLines - 1:
+                    # No new line after the last number of the file
+                    offsets[k] = position
+                    break
+                raise Exception('Unexpected end of %s' % filename)
+            newlines = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8)
+                                      == ord('\n'))
+            last = min(nmat, (counted + newlines.size) // blockLines)
+            if last >= k:
+                ks = np.arange(k, last + 1)
+                offsets[ks] = position + \
+                    newlines[ks * blockLines - counted - 1] + 1
+                k = last + 1
+            counted += newlines.size
+            position += len(chunk)
+    return rho, offsets
+
+
+def _read_egn_mode_asci_blocks(filename: str, offsets, mn_col: int, ns: int,
+                               js):
+    """
+    Read only some eigenvectors of the egn_mode_asci file
+
+    :param filename: full path to the file
+    :param offsets: position of the blocks, see _index_egn_mode_asci_blocks
+    :param mn_col: number of poloidal modes (positive m)
+    :param ns: number of radial points
+    :param js: indices of the eigenvectors to be read
+
+    :return: array (len(js), ns, mn_col, 2) with the amplitudes, see
+        _read_egn_mode_asci_body
+    """
+    js = np.asarray(js, dtype=int)
+    vectors = np.empty((js.size, ns, mn_col, 2))
+    with open(filename, 'rb') as fid:
+        for k, j in enumerate(js):
+            fid.seek(offsets[j])
+            block = fid.read(offsets[j + 1] - offsets[j])
+            vectors[k] = np.array(block.split(), dtype=float).reshape(
+                ns, mn_col, 2)
+    return vectors
+
+
+def _place_egn_vectors(vectors):
+    """
+    Place the amplitudes of the egn_mode_asci file as (j, mode, r)
+
+    The negative m are stored in reversed order, as in the header
+
+    :param vectors: array (nj, ns, mn_col, 2), see _read_egn_mode_asci_body
+
+    :return: array (nj, 2*mn_col, ns)
+    """
+    nj, ns, mn_col = vectors.shape[:3]
+    egn_vectors = np.empty((nj, 2 * mn_col, ns))
+    egn_vectors[:, :mn_col, :] = vectors[..., 0].transpose(0, 2, 1)
+    egn_vectors[:, mn_col:, :] = vectors[:, :, ::-1, 1].transpose(0, 2, 1)
+    return egn_vectors
+
+
+def _trapezoidWeights(r):
+    """
+    Weights of the trapezoidal rule, to integrate along the radial grid
+
+    :param r: radial grid
+
+    :return: array w such that f @ w is the integral of f
+    """
+    dr = np.diff(r)
+    w = np.zeros(r.size)
+    w[:-1] += 0.5 * dr
+    w[1:] += 0.5 * dr
+    return w
 
 # ------------------------------------------------------------------------------
 # --- EigenVectors class
@@ -28,7 +181,8 @@ class EigenSolver():
 
     Introduced in version 0.0.5
     """
-    def __init__(self, path: str = None, model_name: str = None):
+    def __init__(self, path: str = None, model_name: str = None,
+                 cache: bool = True):
         """
         Read the eigensolver data
 
@@ -37,6 +191,11 @@ class EigenSolver():
         :param path: path to look for the files. If None, the model will be
             assumed to be located in the FAR3D main folder
         :param model name: model name if none, will be guessed from the path
+        :param cache: if True, the eigenvectors will be saved in a binary file
+            inside the model folder after reading them, and they will be read
+            from there the next time, as long as the ASCII file did not change.
+            This file is memory mapped, so only the eigenvectors which are
+            used are actually read from the disk
         """
         if path is None:
             if path is None:
@@ -51,10 +210,13 @@ class EigenSolver():
         else:
             logger.warning('10: Guessing model name from path')
             self.model_name = os.path.split(path)[-1]
+        self.cache = cache
         # Allocate the space
+        self._data = None
         self.header = None
         self.egn_vectors = None
         self.egn_values = None
+        self._blocks = None     # (fingerprint, rho, offsets), see load_vectors
 
     def _read_egn_mode_asci_header(self):
         """
@@ -95,72 +257,339 @@ class EigenSolver():
     def _read_egn_mode_asci(self):
         """
         Read the amplitudes stored in the ascii file
+
+        With self.cache, the amplitudes are converted (only the first time)
+        to a binary file indexed by j, which is opened as a memory mapped
+        array, so this call does not depend on the number of eigenvectors
         """
         if self._data is None:
             self._read_egn_values()
         if 'n' not in self._data.keys():
             self._read_egn_mode_asci_header()
-        # Open the file and read the data
-        with open(self._data.eigenmodeFile, 'r') as fid:
-            print(self._data.eigenmodeFile)
-            # Skip the header:
-            for j in range(self.header['headerLines']):
-                fid.readline()
-
-            # To short a bit the naming:
-            ns = self.header['numberOfRadialPoints']
-            nmat = self.header['numberOfModes']
-            mn_col = self.header['numberOfPoloidalModes']
-            # Now read the core stuff
-            # --- Allocate the vectors
-            rho = np.zeros(self.header['numberOfRadialPoints'])
-            im_col = self.header['m']
-            in_col = self.header['n']
-            dm = np.zeros(self.header['numberOfModes'])
-            dm_rd = np.zeros(self.header['numberOfModes'])
-            iacept = np.zeros(self.header['numberOfModes'], int)
-            i_orig = np.zeros(self.header['numberOfModes'], int)
-            egn_vectors0 = np.zeros((2*mn_col, ns))
-            # Aux quantities
-            fscale = 1.0
-            freq_max = 1.0e+6
-            # Read the frequencies
-            ic = 0
-            for i in range(self.header['numberOfModes']):
-                dm[i] = float(fid.readline())
-                dm_test = dm[i]*fscale**2
-                if dm_test < freq_max:
-                    iacept[i] = ic
-                    dm_rd[ic] = dm[i]*fscale**2
-                    i_orig[ic] = i
-                    ic += 1
-                else:
-                    iacept[i] = -1
-            # Read the radial grid
-            logger.info('Reading radial grid')
-            for irho in range(self.header['numberOfRadialPoints']):
-                rho[irho] = float(fid.readline())
-            # Allocate the sapce for the good solutions
-            nmat_rd = ic
-            egn_vectors = np.zeros((nmat_rd,
-                                    2*self.header['numberOfPoloidalModes'],
-                                    self.header['numberOfRadialPoints']))
-            logger.info('Reading modes')
-            for j in range(nmat):
-                for m in range(ns):
-                    for i in range(mn_col):
-                        mneg = 2*mn_col - i - 1
-                        egn_vectors0[i, m] = float(fid.readline())
-                        egn_vectors0[mneg, m] = float(fid.readline())
-                if iacept[j] != -1:
-                    egn_vectors[iacept[j], :, :] = egn_vectors0.copy()
-            self.extraLines = fid.readlines()
+        files = [self._data.eigenmodeFile]
+        if self.cache:
+            amp, meta = readMemmap(self.path, 'egn_mode_asci')
+            if amp is not None and meta['fingerprint'] == digest(files):
+                self._set_amp(amp, np.array(meta['r']), meta['extraLines'])
+                return
+        # To short a bit the naming:
+        ns = self.header['numberOfRadialPoints']
+        nmat = self.header['numberOfModes']
+        mn_col = self.header['numberOfPoloidalModes']
+        logger.info('Reading %s', self._data.eigenmodeFile)
+        dm, rho, vectors, self.extraLines = _read_egn_mode_asci_body(
+            self._data.eigenmodeFile, self.header['headerLines'], nmat,
+            mn_col, ns)
+        # Aux quantities
+        fscale = 1.0
+        freq_max = 1.0e+6
+        accepted = dm * fscale**2 < freq_max
+        egn_vectors = _place_egn_vectors(vectors[accepted])
+        if self.cache:
+            writeMemmap([egn_vectors], self.path, 'egn_mode_asci', files,
+                        {'r': rho.tolist(), 'extraLines': self.extraLines})
+            # Keep the memory mapped copy, if it could be written
+            amp, meta = readMemmap(self.path, 'egn_mode_asci')
+            if amp is not None and meta['fingerprint'] == digest(files):
+                egn_vectors = amp
+        self._set_amp(egn_vectors, rho, self.extraLines)
+
+    def _set_amp(self, egn_vectors, rho, extraLines: list):
+        """
+        Store the eigenvectors in the object
+
+        :param egn_vectors: array (j, mode, r) with the amplitudes
+        :param rho: radial grid
+        :param extraLines: lines of the file after the numerical block
+        """
         self._data['amp'] = xr.DataArray(
             egn_vectors, dims=('j', 'mode', 'r'),
             coords={'mode': np.arange(self._data.n.size),
                     'r': rho})
-
         self.rho = rho
+        self.extraLines = extraLines
+
+    def load_vectors(self, omega_range: tuple = None,
+                     gamma_min: float = None):
+        """
+        Read only the eigenvectors of the eigenvalues inside a window
+
+        The eigenvalues are taken from egn_values.dat, and only the blocks of
+        the selected eigenvectors are read from egn_mode_asci.dat, so the time
+        is proportional to the number of selected eigenvectors. The position
+        of the blocks is found once, the first time, and kept in the cache
+        folder with self.cache. If the eigenvectors are already loaded or
+        cached, they are taken from there
+
+        :param omega_range: tuple (min, max) with the frequency window. If
+            None, all the frequencies are taken
+        :param gamma_min: minimum growth rate. If None, all the growth rates
+            are taken
+
+        :return: DataArray (j, mode, r) with the selected eigenvectors, with
+            omega and gamma of each eigenvector and n, m of each mode as
+            coordinates
+        """
+        if self._data is None:
+            self._read_egn_values()
+        if 'n' not in self._data.keys():
+            self._read_egn_mode_asci_header()
+        nmat = self.header['numberOfModes']
+        omega = self._data['omega'].values
+        gamma = self._data['gamma'].values
+        if omega.size != nmat:
+            raise Exception('egn_values and egn_mode_asci do not match')
+        mask = np.ones(nmat, dtype=bool)
+        if omega_range is not None:
+            mask &= (omega >= omega_range[0]) & (omega <= omega_range[1])
+        if gamma_min is not None:
+            mask &= gamma >= gamma_min
+        js = np.flatnonzero(mask)
+        # See if they are in memory or in the cache
+        amp = None
+        if 'amp' in self._data.keys():
+            amp, rho = (self._data['amp'].values, self.rho)
+        elif self.cache:
+            amp, meta = readMemmap(self.path, 'egn_mode_asci')
+            if amp is not None and \
+                    meta['fingerprint'] == digest([self._data.eigenmodeFile]):
+                rho = np.array(meta['r'])
+            else:
+                amp = None
+        if amp is not None and amp.shape[0] == nmat:
+            egn_vectors = np.asarray(amp[js])
+        else:
+            logger.info('Reading %i eigenvectors', js.size)
+            rho, offsets = self._egn_mode_asci_blocks()
+            vectors = _read_egn_mode_asci_blocks(
+                self._data.eigenmodeFile, offsets,
+                self.header['numberOfPoloidalModes'],
+                self.header['numberOfRadialPoints'], js)
+            egn_vectors = _place_egn_vectors(vectors)
+        return xr.DataArray(
+            egn_vectors, dims=('j', 'mode', 'r'),
+            coords={'j': js, 'mode': np.arange(self._data.n.size), 'r': rho,
+                    'n': ('mode', self._data['n'].values),
+                    'm': ('mode', self._data['m'].values),
+                    'omega': ('j', omega[js]), 'gamma': ('j', gamma[js])})
+
+    def _egn_mode_asci_blocks(self):
+        """
+        Get the position of the eigenvectors in egn_mode_asci.dat
+
+        The file is indexed only once, see _index_egn_mode_asci_blocks. With
+        self.cache, the index is saved in the cache folder, and used while
+        the file does not change
+
+        :return rho: array with the radial grid
+        :return offsets: array with the position of each block
+        """
+        files = [self._data.eigenmodeFile]
+        if self._blocks is not None and self._blocks[0] == digest(files):
+            return self._blocks[1:]
+        if self.cache:
+            offsets, meta = readMemmap(self.path, 'egn_mode_asci_blocks')
+            if offsets is not None and meta['fingerprint'] == digest(files):
+                self._blocks = (meta['fingerprint'], np.array(meta['r']),
+                                offsets)
+                return self._blocks[1:]
+        logger.debug('Indexing %s', self._data.eigenmodeFile)
+        rho, offsets = _index_egn_mode_asci_blocks(
+            self._data.eigenmodeFile, self.header['headerLines'],
+            self.header['numberOfModes'],
+            self.header['numberOfPoloidalModes'],
+            self.header['numberOfRadialPoints'])
+        if self.cache:
+            writeMemmap([offsets], self.path, 'egn_mode_asci_blocks', files,
+                        {'r': rho.tolist()})
+        self._blocks = (digest(files), rho, offsets)
+        return rho, offsets
+
+    def vector(self, j: int):
+        """
+        Get the eigenvector of an eigenvalue
+
+        The eigenvectors are read if needed. With self.cache, only the pages
+        of the memory mapped file with this eigenvector are read
+
+        :param j: index of the eigenvalue (or list of them) in the files. It
+            is kept when the spurious eigenvectors are dropped, see
+            filterSpurious()
+
+        :return: DataArray with the amplitudes, with the n and m of each mode
+            as coordinates
+        """
+        if self._data is None or 'amp' not in self._data.keys():
+            self._read_egn_mode_asci()
+        return self._data['amp'].sel(j=j).assign_coords(
+            n=self._data['n'], m=self._data['m'])
+
+    def characterize(self, amp=None):
+        """
+        Get the main properties of each eigenvector
+
+        All the eigenvectors are characterized at once, with array reductions
+        over the (j, mode, r) amplitudes. The energy of each harmonic is the
+        radial integral of its amplitude squared. The peak position and
+        width are those of the dominant harmonic, the width being the rms
+        width of its amplitude squared
+
+        :param amp: DataArray (j, mode, r) with the eigenvectors, for example
+            the output of load_vectors(). If None, all the eigenvectors are
+            used (and read if needed)
+
+        :return: xr.Dataset, over j, with the n and m of the dominant
+            harmonic, its peak position, width and fraction of the energy,
+            together with omega and gamma. Use .to_dataframe() for a table
+        """
+        if amp is None:
+            if self._data is None or 'amp' not in self._data.keys():
+                self._read_egn_mode_asci()
+            amp = self._data['amp']
+        n = amp['n'].values if 'n' in amp.coords else self._data['n'].values
+        m = amp['m'].values if 'm' in amp.coords else self._data['m'].values
+        r = amp['r'].values
+        a2 = np.asarray(amp.transpose('j', 'mode', 'r').values)**2
+        w = _trapezoidWeights(r)
+        energy = a2 @ w
+        top = energy.argmax(axis=1)
+        jj = np.arange(a2.shape[0])
+        dominant = a2[jj, top]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fraction = energy[jj, top] / energy.sum(axis=1)
+            norm = dominant @ w
+            center = (dominant @ (w * r)) / norm
+            width = np.sqrt(np.maximum(
+                (dominant @ (w * r**2)) / norm - center**2, 0.0))
+        js = amp['j'].values if 'j' in amp.coords else jj
+        out = xr.Dataset(coords={'j': js})
+        out['n'] = xr.DataArray(n[top], dims='j')
+        out['m'] = xr.DataArray(m[top], dims='j')
+        out['r_peak'] = xr.DataArray(r[dominant.argmax(axis=1)], dims='j')
+        out['width'] = xr.DataArray(width, dims='j')
+        out['fraction'] = xr.DataArray(fraction, dims='j')
+        out['n'].attrs['long_name'] = 'Dominant n'
+        out['m'].attrs['long_name'] = 'Dominant m'
+        out['r_peak'].attrs['long_name'] = 'Peak position'
+        out['width'].attrs['long_name'] = 'Radial width'
+        out['fraction'].attrs['long_name'] = 'Energy fraction'
+        for k in ('omega', 'gamma'):
+            if k in amp.coords:
+                out[k] = xr.DataArray(amp[k].values, dims='j')
+            elif self._data[k].size == js.size:
+                out[k] = xr.DataArray(self._data[k].values, dims='j')
+        return out
+
+    def spuriousMetrics(self, amp=None, kcut: float = 0.5,
+                        edge: float = 0.1):
+        """
+        Get the metrics used to detect the numerical artefacts
+
+        All the eigenvectors are processed at once, with array reductions
+        over the (j, mode, r) amplitudes:
+            - highK: fraction of the energy of the radial spectrum above kcut
+              times the largest wavenumber of the grid. Large for grid-scale
+              radial oscillations
+            - edge: fraction of the energy in the outer part of the radial
+              grid. Large for modes piled at the boundary
+            - parity: mismatch between the energies of the +m and -m parts of
+              each harmonic, sum|E+ - E-| / sum(E+ + E-)
+
+        :param amp: DataArray (j, mode, r) with the eigenvectors, for example
+            the output of load_vectors(). If None, all the eigenvectors are
+            used (and read if needed)
+        :param kcut: fraction of the largest radial wavenumber above which
+            the energy is considered to be high-k
+        :param edge: fraction of the radial interval considered as edge
+
+        :return: xr.Dataset, over j, with highK, edge and parity
+        """
+        if amp is None:
+            if self._data is None or 'amp' not in self._data.keys():
+                self._read_egn_mode_asci()
+            amp = self._data['amp']
+        r = amp['r'].values
+        a = np.asarray(amp.transpose('j', 'mode', 'r').values)
+        a2 = a**2
+        # Radial spectrum, summed over the harmonics
+        spec = (np.abs(np.fft.rfft(a, axis=-1))**2).sum(axis=1)
+        k = np.arange(spec.shape[-1]) / max(spec.shape[-1] - 1, 1)
+        # Radial distribution of the energy, summed over the harmonics
+        w = _trapezoidWeights(r)
+        er = a2.sum(axis=1) * w
+        outer = r >= r[-1] - edge * (r[-1] - r[0])
+        # The +m and -m parts of each harmonic come from the same column of
+        # the file and are placed symmetrically, see _place_egn_vectors
+        energy = a2 @ w
+        half = energy.shape[1] // 2
+        ePlus = energy[:, :half]
+        eMinus = energy[:, ::-1][:, :half]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            highK = spec[:, k > kcut].sum(axis=1) / spec.sum(axis=1)
+            edgeFraction = er[:, outer].sum(axis=1) / er.sum(axis=1)
+            parity = np.abs(ePlus - eMinus).sum(axis=1) / \
+                (ePlus + eMinus).sum(axis=1)
+        js = amp['j'].values if 'j' in amp.coords else np.arange(a.shape[0])
+        out = xr.Dataset(coords={'j': js})
+        out['highK'] = xr.DataArray(highK, dims='j')
+        out['edge'] = xr.DataArray(edgeFraction, dims='j')
+        out['parity'] = xr.DataArray(parity, dims='j')
+        out['highK'].attrs['long_name'] = 'High-k energy fraction'
+        out['edge'].attrs['long_name'] = 'Edge energy fraction'
+        out['parity'].attrs['long_name'] = 'Parity mismatch'
+        return out
+
+    def filterSpurious(self, maxHighK: float = 0.2, maxEdge: float = 0.2,
+                       maxParity: float = None, omega_range: tuple = None,
+                       kcut: float = 0.5, edge: float = 0.1,
+                       drop: bool = False):
+        """
+        Mark (or remove) the eigenvectors which are numerical artefacts
+
+        The metrics of spuriousMetrics() are stored in self._data, together
+        with a boolean 'spurious' flag, which is used by the plotting and
+        tracking routines of the scans to skip these eigenvectors. A limit
+        set to None is not applied
+
+        :param maxHighK: maximum fraction of the energy at high radial k
+        :param maxEdge: maximum fraction of the energy at the edge
+        :param maxParity: maximum mismatch between the +m and -m energies
+        :param omega_range: tuple (min, max) with the accepted frequencies
+        :param kcut: see spuriousMetrics()
+        :param edge: see spuriousMetrics()
+        :param drop: if True, the spurious eigenvectors are removed from
+            self._data, instead of just marked
+
+        :return: DataArray, over j, with the spurious flag of all the
+            eigenvectors (also the dropped ones)
+        """
+        metrics = self.spuriousMetrics(kcut=kcut, edge=edge)
+        if metrics.j.size != self._data['omega'].size:
+            raise Exception('egn_values and egn_mode_asci do not match')
+        bad = np.zeros(metrics.j.size, dtype=bool)
+        for key, limit in (('highK', maxHighK), ('edge', maxEdge),
+                           ('parity', maxParity)):
+            if limit is not None:
+                # NaN metrics (null vectors) are also spurious
+                bad |= ~(metrics[key].values <= limit)
+        if omega_range is not None:
+            omega = self._data['omega'].values
+            bad |= ~((omega >= omega_range[0]) & (omega <= omega_range[1]))
+        for key in metrics.data_vars:
+            self._data[key] = xr.DataArray(metrics[key].values, dims='j',
+                                           attrs=metrics[key].attrs)
+        self._data['spurious'] = xr.DataArray(bad, dims='j')
+        logger.info('%i of %i eigenvectors are spurious', bad.sum(), bad.size)
+        flag = self._data['spurious']
+        if drop:
+            self._data = self._data.isel(j=~bad)
+        return flag
+
+    def clearCache(self):
+        """
+        Remove the binary cache of the model folder
+        """
+        clearCache(self.path)
 
     def _read_egn_values(self):
         """
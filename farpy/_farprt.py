@@ -7,31 +7,411 @@ from statistics import median
 import numpy as np
 import xarray as xr
 import os
+import re
 import pandas as pd
 import matplotlib.pyplot as plt
 from copy import deepcopy
 from farpy._namelist import readNamelist
+from farpy._cache import readCache, writeCache, clearCache
 import logging
 logger = logging.getLogger('farpy.Farprt')
 
 
+# Columns of the lines of the energy block with one fast particle species
+# (alpha_on = 0). The names are taken from the header line of the block, this
+# is only used if that line does not match the numbers
+energyColumns = ('l', 'm', 'n', 'ke', 'me', 'vprlf', 'gamke', 'gamme',
+                 'gamvpr')
+# FAR3D drops the 'E' of three digit exponents, for example 4-280 instead of
+# 4E-280
+_missingE = re.compile(r'(?<=\d)([+-]\d{2,3})(?=\s|$)', re.MULTILINE)
+
+
+# ------------------------------------------------------------------------------
+# --- Auxiliary readers
+# ------------------------------------------------------------------------------
+class _EnergyReader:
+    """
+    Collect the lines of the energy blocks of the farprt file
+
+    The lines are given one by one to feed(), and the numbers are only
+    parsed when frame() is called, all at once
+    """
+
+    def __init__(self):
+        self.rows = []      # Lines with the mode information
+        self.blocks = []    # (numrun, numruno, nstep, time, dt) of each block
+        self.nrows = []     # Number of lines of each block
+        self.columns = None  # Names in the header line of the first block
+        self._skip = 0      # Lines to be skipped before the numbers
+        self._inBlock = False
+
+    def feed(self, line: str):
+        """
+        Process a line of the file
+
+        :param line: line of the file
+
+        :return: True if the line belongs to an energy block
+        """
+        if self._skip:
+            # White line and line with the headers
+            self._skip -= 1
+            if self._skip == 0 and self.columns is None:
+                self.columns = tuple(line.split())
+            return True
+        if self._inBlock:
+            # The block ends with a (short) white line
+            if len(line) > 60:
+                self.rows.append(line)
+                self.nrows[-1] += 1
+                return True
+            self._inBlock = False
+        if line.startswith('energy:numrun'):
+            # Separate the coment line in the 5 blocks
+            dum_num, dum_runo, dum_nstep, dum_time, dum_dt = line.split(',')
+            self.blocks.append((dum_num.split('=')[-1].strip(),
+                                dum_runo.split('=')[-1].strip(),
+                                int(dum_nstep.split('=')[-1]),
+                                float(dum_time.split('=')[-1]),
+                                float(dum_dt.split('=')[-1])))
+            self.nrows.append(0)
+            self._skip = 2
+            self._inBlock = True
+            return True
+        return False
+
+    def pop(self):
+        """
+        Convert the complete blocks collected so far, and forget them
+
+        The block which is still being fed is kept, to be completed with the
+        next lines
+
+        :return: pd.DataFrame as frame(), None if there are no complete
+            blocks
+        """
+        nblocks = len(self.blocks) - int(self._inBlock or self._skip > 0)
+        if nblocks == 0:
+            return None
+        nrows = sum(self.nrows[:nblocks])
+        done = _EnergyReader()
+        done.columns = self.columns
+        done.rows, self.rows = self.rows[:nrows], self.rows[nrows:]
+        done.blocks, self.blocks = self.blocks[:nblocks], self.blocks[nblocks:]
+        done.nrows, self.nrows = self.nrows[:nblocks], self.nrows[nblocks:]
+        return done.frame()
+
+    def frame(self):
+        """
+        Convert the collected lines into a DataFrame
+
+        :return: pd.DataFrame with one row per line of the energy blocks
+        """
+        text = _missingE.sub(r'E\1', ''.join(self.rows))
+        values = np.array(text.split(), dtype=float)
+        ncolumns = len(self.rows[0].split()) if self.rows else \
+            len(energyColumns)
+        if values.size != ncolumns * len(self.rows):
+            raise Exception('Not all the lines of the energy block have %i '
+                            'columns' % ncolumns)
+        columns = self.columns
+        if columns is None or len(columns) != ncolumns:
+            if ncolumns != len(energyColumns):
+                raise Exception('Unknown energy block with %i columns'
+                                % ncolumns)
+            columns = energyColumns
+        values = values.reshape(len(self.rows), ncolumns)
+        data = {}
+        for i, name in enumerate(columns):
+            data[name] = values[:, i].astype(int) if i < 3 else values[:, i]
+        # Repeat the information of each block for all its lines
+        nrows = np.array(self.nrows, dtype=int)
+        blocks = list(zip(*self.blocks)) if self.blocks else [[]] * 5
+        for name, column, dtype in zip(
+                ('numrun', 'numruno', 'nstep', 'time', 'dt'), blocks,
+                (str, str, int, float, float)):
+            data[name] = np.repeat(np.array(column, dtype=dtype), nrows)
+        energyData = pd.DataFrame(data)
+        # Get the total energy
+        # @@Todo check the normalization of this
+        energyData['te'] = energyData.ke + energyData.me
+        return energyData
+
+
+class _GrowthRateReader:
+    """
+    Collect the lines of the growth rate blocks of the farprt file
+    """
+
+    # Start of the lines with the growth rate of each harmonic
+    starting = (' psi   :', ' phi   :', ' pr    :', ' nfast :', ' vfast :',
+                ' vth   :')
+
+    def __init__(self):
+        self.var = []
+        self.m = []
+        self.n = []
+        self.gamma = []
+        self.omega = []
+
+    def feed(self, line: str):
+        """
+        Process a line of the file
+
+        :param line: line of the file
+
+        :return: True if the line belongs to a growth rate block
+        """
+        if not line.startswith(self.starting):
+            return False
+        things = line.split()
+        self.var.append(things[0])
+        self.m.append(int(things[3]))
+        self.n.append(int(things[5]))
+        self.gamma.append(float(things[7]))
+        self.omega.append(float(things[9]))
+        return True
+
+    def dataset(self):
+        """
+        Get the collected values
+
+        :return: xr.Dataset with the var, m, n, gamma and omega of each line
+        """
+        return xr.Dataset({
+            'var': xr.DataArray(np.array(self.var, dtype=str), dims='line'),
+            'm': xr.DataArray(np.array(self.m, dtype=int), dims='line'),
+            'n': xr.DataArray(np.array(self.n, dtype=int), dims='line'),
+            'gamma': xr.DataArray(np.array(self.gamma, dtype=float),
+                                  dims='line'),
+            'omega': xr.DataArray(np.array(self.omega, dtype=float),
+                                  dims='line'),
+        })
+
+    def pop(self):
+        """
+        Get the collected values, and forget them
+
+        :return: xr.Dataset as dataset()
+        """
+        lines = self.dataset()
+        self.__init__()
+        return lines
+
+
+class _GrowthRateAccumulator:
+    """
+    Running arrays of the growth rate blocks, as (step, var, m, n)
+
+    The lines are added in batches with add(). Each line is placed in the
+    next print step of its (var, m, n), the last value of each harmonic is
+    kept, and the mean and spread of the growth rate of each n are updated
+    with the new lines only, so the cost of add() does not depend on the
+    lines added before
+    """
+
+    # Variables of the growth rate block, in the order of the output arrays
+    variables = np.array(['psi', 'phi', 'pr', 'nfast', 'vfast', 'vth'])
+
+    def __init__(self):
+        self.m = np.zeros(0, dtype=int)
+        self.n = np.zeros(0, dtype=int)
+        self.count = np.zeros((6, 0, 0), dtype=int)   # Steps of each harmonic
+        self.nsteps = 0
+        # Values of each step. The arrays have room for more steps, and
+        # their size is doubled when needed
+        self.gammaStep = np.full((0, 6, 0, 0), np.nan)
+        self.omegaStep = np.full((0, 6, 0, 0), np.nan)
+        # Last value of each harmonic, as (m, n, var)
+        self.gamma = np.full((0, 0, 6), np.nan)
+        self.omega = np.full((0, 0, 6), np.nan)
+        # Number of lines, mean and sum of the squared deviations of the
+        # growth rates of each n
+        self.lines = np.zeros(0, dtype=int)
+        self.mean = np.zeros(0)
+        self.M2 = np.zeros(0)
+
+    def _expand(self, m, n):
+        """
+        Add new poloidal and toroidal mode numbers to the arrays
+
+        :param m: poloidal mode numbers of the new lines
+        :param n: toroidal mode numbers of the new lines
+        """
+        newM = np.union1d(self.m, m)
+        newN = np.union1d(self.n, n)
+        if newM.size == self.m.size and newN.size == self.n.size:
+            return
+        im = np.searchsorted(newM, self.m)
+        jn = np.searchsorted(newN, self.n)
+
+        def place(old, fill, axes):
+            shape = list(old.shape)
+            shape[axes] = newM.size
+            shape[axes + 1] = newN.size
+            new = np.full(shape, fill, dtype=old.dtype)
+            index = [slice(None)] * old.ndim
+            index[axes] = im[:, None]
+            index[axes + 1] = jn[None, :]
+            new[tuple(index)] = old
+            return new
+        self.count = place(self.count, 0, 1)
+        self.gammaStep = place(self.gammaStep, np.nan, 2)
+        self.omegaStep = place(self.omegaStep, np.nan, 2)
+        self.gamma = place(self.gamma, np.nan, 0)
+        self.omega = place(self.omega, np.nan, 0)
+        for name in ('lines', 'mean', 'M2'):
+            old = getattr(self, name)
+            new = np.zeros(newN.size, dtype=old.dtype)
+            new[jn] = old
+            setattr(self, name, new)
+        self.m, self.n = (newM, newN)
+
+    def add(self, lines):
+        """
+        Add the lines of the growth rate block
+
+        :param lines: xr.Dataset with the var, m, n, gamma and omega of each
+            line, see _GrowthRateReader
+        """
+        m = lines['m'].values
+        n = lines['n'].values
+        gamma = lines['gamma'].values
+        omega = lines['omega'].values
+        if m.size == 0:
+            return
+        self._expand(m, n)
+        # Position of each line in the output arrays
+        var_unique, ivar = np.unique(lines['var'].values.astype(str),
+                                     return_inverse=True)
+        ivar = np.array([np.flatnonzero(self.variables == v)[0]
+                         for v in var_unique], dtype=int)[ivar]
+        imm = np.searchsorted(self.m, m)
+        inn = np.searchsorted(self.n, n)
+        # The k-th new line of each (var, m, n) is the one of the k-th print
+        # step after the ones already there
+        key = np.ravel_multi_index((ivar, imm, inn), self.count.shape)
+        order = np.argsort(key, kind='stable')
+        first = np.searchsorted(key[order], key[order], side='left')
+        step = np.empty(key.size, dtype=int)
+        step[order] = np.arange(key.size) - first
+        step += self.count.ravel()[key]
+        self.count += np.bincount(key, minlength=self.count.size).reshape(
+            self.count.shape)
+        self.nsteps = max(self.nsteps, step.max() + 1)
+        if self.nsteps > self.gammaStep.shape[0]:
+            size = max(self.nsteps, 2 * self.gammaStep.shape[0])
+            for name in ('gammaStep', 'omegaStep'):
+                old = getattr(self, name)
+                new = np.full((size,) + old.shape[1:], np.nan)
+                new[:old.shape[0]] = old
+                setattr(self, name, new)
+        self.gammaStep[step, ivar, imm, inn] = gamma
+        self.omegaStep[step, ivar, imm, inn] = omega
+        # The last value of each harmonic
+        last = step == self.count.ravel()[key] - 1
+        self.gamma[imm[last], inn[last], ivar[last]] = gamma[last]
+        self.omega[imm[last], inn[last], ivar[last]] = omega[last]
+        # Mean and spread of the growth rate of each n, merging the ones of
+        # the new lines with the previous ones
+        nb = np.bincount(inn, minlength=self.n.size)
+        valid = nb > 0
+        meanb = np.zeros(self.n.size)
+        meanb[valid] = np.bincount(inn, weights=gamma,
+                                   minlength=self.n.size)[valid] / nb[valid]
+        M2b = np.bincount(inn, weights=(gamma - meanb[inn])**2,
+                          minlength=self.n.size)
+        total = self.lines + nb
+        delta = meanb - self.mean
+        self.mean[valid] += delta[valid] * nb[valid] / total[valid]
+        self.M2[valid] += M2b[valid] + delta[valid]**2 * \
+            self.lines[valid] * nb[valid] / total[valid]
+        self.lines = total
+
+    def convergence(self):
+        """
+        Get the std/mean of the growth rates of each n
+        """
+        return np.sqrt(self.M2 / self.lines) / self.mean
+
+    def block(self, convergency_level: float = 0.1):
+        """
+        Get the growth rate block
+
+        The step arrays are views of the accumulated ones, not copies
+
+        :param convergency_level: see Farprt.readGrowthRate()
+
+        :return: xr.Dataset as Farprt.growthRateBlock
+        """
+        convergence = self.convergence()
+        block = xr.Dataset()
+        block['omega'] = \
+            xr.DataArray(self.omega.copy(), dims=('m', 'n', 'var'),
+                         coords={'var': self.variables, 'm': self.m,
+                                 'n': self.n})
+        block['gamma'] = \
+            xr.DataArray(self.gamma.copy(), dims=('m', 'n', 'var'))
+        block['avg_omega_n'] = \
+            xr.DataArray(np.nanmean(self.omega, axis=(0, 2)), dims='n')
+        block['avg_gamma_n'] = \
+            xr.DataArray(np.nanmean(self.gamma, axis=(0, 2)), dims='n')
+        block['avg_omega'] = xr.DataArray(np.nanmean(self.omega))
+        block['avg_gamma'] = xr.DataArray(np.nanmean(self.gamma))
+        block['omega_step'] = \
+            xr.DataArray(self.omegaStep[:self.nsteps],
+                         dims=('step', 'var', 'm', 'n'),
+                         coords={'step': np.arange(self.nsteps)})
+        block['gamma_step'] = \
+            xr.DataArray(self.gammaStep[:self.nsteps],
+                         dims=('step', 'var', 'm', 'n'))
+        block['convergence'] = xr.DataArray(convergence, dims='n')
+        block['converged'] = \
+            xr.DataArray(convergence <= convergency_level, dims='n')
+        block['convergence'].attrs['long_name'] = \
+            'std/mean of the growth rate'
+        # A bit of metadata is always welcome
+        block['n'].attrs['long_name'] = 'Toroidal mode number'
+        block['m'].attrs['long_name'] = 'Poloidal mode number'
+        block['var'].attrs['long_name'] = 'Var Short Name'
+        block['step'].attrs['long_name'] = 'Print step'
+        return block
+
+
+# ------------------------------------------------------------------------------
+# --- Farprt class
+# ------------------------------------------------------------------------------
 class Farprt:
     """
     Main class to read and interact with the farprt file
 
     List of public methods:
-    - read_energy_block(): read the energy blocks (energies and grow rates)
+    - readEnergyBlock(): read the energy blocks (energies and grow rates)
+    - readGrowthRate(): read the growth rate and frequency of the harmonics
+    - read_all(): read the namelist, energy and growth rate blocks at once
     """
 
-    def __init__(self, file: str):
+    def __init__(self, file: str, cache: bool = True):
         """
         Init the object
 
         For the moment, it does nothing, just save the filename
+
+        :param file: path to the farprt file
+        :param cache: if True, the parsed blocks will be saved in a binary file
+            next to the farprt file, and they will be read from there the next
+            time, as long as the farprt file did not change
         """
         self.file = file
+        self.folder = os.path.dirname(os.path.abspath(file))
+        self.cache = cache
         self.namelist = None
         self.energyData = None
+        # State of follow()
+        self._offset = 0
+        self._followers = None
+        self._growth = None
 
     def readNamelistBlock(self):
         """
@@ -41,115 +421,133 @@ class Farprt:
         """
         self.namelist = readNamelist(self.file, header=11)
 
+    def read_all(self, convergency_level: float = 0.1):
+        """
+        Read the namelist, energy and growth rate blocks
+
+        The file is read only once: each line is given to the reader of its
+        block. The blocks found in the cache are not parsed again
+
+        :param convergency_level: see readGrowthRate()
+        """
+        cachedEnergy = self._readCache('energy')
+        cachedGrowth = self._readCache('growthRate')
+        energy = _EnergyReader() if cachedEnergy is None else None
+        growth = _GrowthRateReader() if cachedGrowth is None else None
+        with open(self.file) as f:
+            self.namelist = readNamelist(f, header=11)
+            if energy is not None or growth is not None:
+                logger.info('Reading %s', self.file)
+                for line in f:
+                    if energy is not None and energy.feed(line):
+                        continue
+                    if growth is not None:
+                        growth.feed(line)
+        if energy is None:
+            self.energyData = \
+                cachedEnergy.to_dataframe().reset_index(drop=True)
+        else:
+            self._setEnergy(energy)
+        if growth is not None:
+            cachedGrowth = self._saveGrowthRate(growth)
+        self._setGrowthRate(cachedGrowth, convergency_level)
+
     def readEnergyBlock(self):
         """
         Read the energy block
 
-        This is not efficient, but I do not know any other way of reading such a
-        file
+        All the lines of the blocks are collected in a single pass over the
+        file and converted to numbers at once, so the time is linear in the
+        size of the file. The names of the columns are taken from the header
+        line of the blocks, so the extra columns of the simulations with two
+        fast particle species (alpha_on = 1) are also read
         """
-        # Check the namelist options of this simulation
-        if self.namelist is None:
-            print('Namelist was not loaded, loading it')
-            self.readNamelistBlock()
-            print('Namelist read')
-        if self.namelist['alpha_on'] == 1:
-            two_FI_specie = True
-        else:
-            two_FI_specie = False
-
-        data = {
-            'l': int(),
-            'm': int(),
-            'n': int(),
-            'ke': float(),
-            'me': float(),
-            'vprlf': float(),
-            'gamke': float(),
-            'gamme': float(),
-            'gamvpr': float(),
-            'numrun': int(),
-            'numruno': int(),
-            'nstep': int(),
-            'time': float(),
-            'dt': float(),
-        }
-        if two_FI_specie:
-            raise Exception('Sorry still not done')
-            data['cosa_extra1'] = []
-            data['cosa_extra2'] = []
-        # self.data = pd.DataFrame(columns=('l', 'm',
-        #                                   'n', 'ke', 'me', 'vprlf', 'gamke', 'gamme', 'gamvpr', 'numrun',
-        #                                   'numruno', 'nstep', 'time', 'dt',))
-        self.energyData = pd.DataFrame(data, index=[])
-        print('Reading energy block')
+        cached = self._readCache('energy')
+        if cached is not None:
+            self.energyData = cached.to_dataframe().reset_index(drop=True)
+            return
+        logger.info('Reading energy block')
+        reader = _EnergyReader()
         with open(self.file) as f:
             for line in f:
-                if line.startswith('energy:numrun'):  # we found the firs line
-                    # Separate the coment line in the 5 blocks
-                    dum_num, dum_runo, dum_nstep, dum_time, dum_dt = \
-                        line.split(',')
-                    # from each bloc, read the number
-                    numrun = dum_num.split('=')[-1].strip()
-                    numruno = dum_runo.split('=')[-1].strip()
-                    nstep = int(dum_nstep.split('=')[-1])
-                    time = float(dum_time.split('=')[-1])
-                    dt = float(dum_dt.split('=')[-1])
-                    # read the dummy white line
-                    dummy = f.readline()
-                    # read the dummy line with the headers
-                    dummy = f.readline()
-                    # now read all the lines with the mode information
-                    # we will do a filthy trick, if the line has less of 200
-                    # characters will be the empty line between the blocks
-                    numbers = f.readline()
-                    len_of_line = len(numbers)
-                    while len_of_line > 60:
-                        array_of_numbers = numbers.split()
-                        # if the number is ridully low, is bad printed, for
-                        # example instead of 4e-280, far3d write  4-280, which
-                        # makes the reading imposible, so take zero
-                        try:
-                            ke = float(array_of_numbers[3])
-                        except ValueError:
-                            ke = 0.0
-                        try:
-                            me = float(array_of_numbers[4])
-                        except ValueError:
-                            me = 0.0
-                        try:
-                            vprlf = float(array_of_numbers[5])
-                        except ValueError:
-                            vprlf = 0.0
-
-                        row_to_add = {
-                            'l': int(array_of_numbers[0]),
-                            'm': int(array_of_numbers[1]),
-                            'n': int(array_of_numbers[2]),
-                            'ke': ke,
-                            'me': me,
-                            'vprlf': vprlf,
-                            'gamke': float(array_of_numbers[6]),
-                            'gamme': float(array_of_numbers[7]),
-                            'gamvpr': float(array_of_numbers[8]),
-                            'numrun': numrun,
-                            'numruno': numruno,
-                            'nstep': nstep,
-                            'time': time,
-                            'dt': dt,
-                        }
-                        self.energyData = self.energyData.append(
-                            row_to_add.copy(), ignore_index=True)
-                        numbers = f.readline()
-                        len_of_line = len(numbers)
-        # Ensure datatypes
-        self.energyData.l = self.energyData.l.astype(int)
-        self.energyData.m = self.energyData.m.astype(int)
-        self.energyData.n = self.energyData.n.astype(int)
-        self.energyData.nstep = self.energyData.nstep.astype(int)
-        # Get the total energy
-        # @@Todo check the normalization of this
-        self.energyData['te'] = self.energyData.ke + self.energyData.me
+                reader.feed(line)
+        self._setEnergy(reader)
+
+    def follow(self, convergency_level: float = 0.1):
+        """
+        Read the energy and growth rate blocks written since the last call
+
+        Intended to monitor running simulations: the position of the last
+        complete line is remembered, and only the lines written after it are
+        parsed. self.energyData and self.growthRateBlock are updated (the
+        energy block which is still being written is not included). The
+        cache is not used. If the file is shorter than in the previous call
+        (the simulation was restarted), it is read again from the beginning
+
+        :param convergency_level: see readGrowthRate()
+
+        :return: DataArray, over n, with True for the converged n. None if
+            no growth rate was written yet
+        """
+        if self._followers is None or \
+                os.path.getsize(self.file) < self._offset:
+            self._offset = 0
+            self._followers = (_EnergyReader(), _GrowthRateReader())
+            self._growth = _GrowthRateAccumulator()
+            self.energyData = None
+        energy, growth = self._followers
+        with open(self.file, 'rb') as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        # Only the complete lines are processed
+        end = chunk.rfind(b'\n') + 1
+        self._offset += end
+        for line in chunk[:end].decode().splitlines(keepends=True):
+            if not energy.feed(line):
+                growth.feed(line)
+        # Update the energy
+        newEnergy = energy.pop()
+        if self.energyData is None:
+            self.energyData = newEnergy
+        elif newEnergy is not None:
+            self.energyData = pd.concat((self.energyData, newEnergy),
+                                        ignore_index=True)
+        # Update the growth rate, only with the new lines
+        newLines = growth.pop()
+        if newLines.sizes['line'] == 0:
+            if self._growth.nsteps == 0:
+                return None
+            # Nothing new, but the convergence level may be other
+            self.growthRateBlock['converged'] = \
+                self.growthRateBlock['convergence'] <= convergency_level
+            return self.growthRateBlock['converged']
+        self._growth.add(newLines)
+        self.growthRateBlock = self._growth.block(convergency_level)
+        return self.growthRateBlock['converged']
+
+    def _readCache(self, block: str):
+        """
+        Read a block from the cache
+
+        :param block: 'energy' or 'growthRate'
+
+        :return: the cached dataset, None if it is not there (or not used)
+        """
+        if not self.cache:
+            return None
+        return readCache(self.folder, os.path.basename(self.file) + '_' +
+                         block, [self.file])
+
+    def _setEnergy(self, reader):
+        """
+        Store the energy block collected by an _EnergyReader
+
+        :param reader: _EnergyReader which has been fed with the file
+        """
+        self.energyData = reader.frame()
+        if self.cache:
+            writeCache(xr.Dataset.from_dataframe(self.energyData), self.folder,
+                       os.path.basename(self.file) + '_energy', [self.file])
 
     def plotEnergy(self, n=1, var='ke', m=None, ax=None):
         """
@@ -202,77 +600,66 @@ class Farprt:
         will still consider the mean
 
         This can be easily changed uppon request
+
+        The values of each print step are kept in omega_step and gamma_step,
+        as (step, var, m, n), to check the convergence or average them over
+        other windows
+        """
+        cached = self._readCache('growthRate')
+        if cached is None:
+            logger.info('Reading Growth Rate block')
+            reader = _GrowthRateReader()
+            with open(self.file) as f:
+                for line in f:
+                    reader.feed(line)
+            cached = self._saveGrowthRate(reader)
+        self._setGrowthRate(cached, convergency_level)
+
+    def _saveGrowthRate(self, reader):
+        """
+        Get the lines collected by a _GrowthRateReader and save them in the
+        cache
+
+        :param reader: _GrowthRateReader which has been fed with the file
+
+        :return: xr.Dataset with the values of each line
+        """
+        lines = reader.dataset()
+        if self.cache:
+            writeCache(lines, self.folder,
+                       os.path.basename(self.file) + '_growthRate',
+                       [self.file])
+        return lines
+
+    def _setGrowthRate(self, lines, convergency_level: float = 0.1,
+                       warn: bool = True):
+        """
+        Order the lines of the growth rate block as (m, n, var)
+
+        :param lines: xr.Dataset with the var, m, n, gamma and omega of each
+            line of the growth rate block
+        :param convergency_level: see readGrowthRate()
+        :param warn: if True, a warning is given for each n not converged
         """
-        m = []
-        n = []
-        gamma = []
-        omega = []
-        var = []
-        starting = (' psi   :', ' phi   :', ' pr    :', ' nfast :', ' vfast :',
-                    ' vth   :')
-        logger.info('Reading Growth Rate block')
-        with open(self.file) as f:
-            for line in f:
-                if line.startswith(starting):  # we found a line
-                    things = line.split()
-                    var.append(things[0])
-                    m.append(int(things[3]))
-                    n.append(int(things[5]))
-                    gamma.append(float(things[7]))
-                    omega.append(float(things[9]))
         logger.info('Ordering the data')
-        # Now that the data was read, is time to play with it
-        # --- Move to npumpy arrays
-        m = np.array(m)
-        n = np.array(n)
-        n_unique = np.unique(n)
-        m_unique = np.unique(m)
-        gamma = np.array(gamma)
-        omega = np.array(omega)
+        accumulator = _GrowthRateAccumulator()
+        accumulator.add(lines)
+        self.growthRateBlock = accumulator.block(convergency_level)
         # --- Check the convergence
-        for kn in n_unique:
-            flags = n == kn
-            std_gamma = gamma[flags].std()
-            mean_gamma = gamma[flags].mean()
-            test = std_gamma/mean_gamma
-            if test > convergency_level:
-                text = 'No convergence: n=%i mean_gamma/std_gamma = %f' % (kn,test)
-                logger.warning('10: %s', text)
-        # --- Save the stuff in place
-        OMEGA = np.empty(shape=(m_unique.size, n_unique.size, 6))
-        OMEGA.fill(np.nan)
-        GAMMA = np.empty(shape=(m_unique.size, n_unique.size, 6))
-        GAMMA.fill(np.nan)
-        # TODO: This is not an optimum way of doing it, need a better way
-        vars = np.array(['psi', 'phi', 'pr', 'nfast', 'vfast', 'vth'])
-        for i in range(m.size):
-            # See where we need to save the data
-            ivar = np.where(vars == var[i])[0]
-            imm = np.where(m_unique == m[i])[0]
-            inn = np.where(n_unique == n[i])[0]
-            # Save the data
-            OMEGA[imm, inn, ivar] = omega[i]
-            GAMMA[imm, inn, ivar] = gamma[i]
-        # Save everything in a array
-        self.growthRateBlock = xr.Dataset()
-        self.growthRateBlock['omega'] = \
-            xr.DataArray(OMEGA, dims=('m', 'n', 'var'),
-                         coords={'var': vars, 'm': m_unique, 'n': n_unique})
-        self.growthRateBlock['gamma'] = \
-            xr.DataArray(GAMMA, dims=('m', 'n', 'var'))
-        self.growthRateBlock['avg_omega_n'] = \
-            xr.DataArray(np.nanmean(OMEGA, axis=(0, 2)), dims='n')
-        self.growthRateBlock['avg_gamma_n'] = \
-            xr.DataArray(np.nanmean(GAMMA, axis=(0, 2)), dims='n')
-        self.growthRateBlock['avg_omega'] = \
-            xr.DataArray(np.nanmean(OMEGA))
-        self.growthRateBlock['avg_gamma'] = \
-            xr.DataArray(np.nanmean(GAMMA))
-        # A bit of metadata is always welcome
-        self.growthRateBlock['n'].attrs['long_name'] = 'Toroidal mode number'
-        self.growthRateBlock['m'].attrs['long_name'] = 'Poloidal mode number'
-        self.growthRateBlock['var'].attrs['long_name'] = 'Var Short Name'
-   
+        if warn:
+            convergence = self.growthRateBlock['convergence'].values
+            for kn, test in zip(accumulator.n, convergence):
+                if test > convergency_level:
+                    text = 'No convergence: n=%i mean_gamma/std_gamma = %f' \
+                        % (kn, test)
+                    logger.warning('10: %s', text)
+
+    def clearCache(self):
+        """
+        Remove the binary cache of the folder containing the farprt file
+        """
+        clearCache(self.folder)
+
     def st2time(self, step: int):
         print('ToBe Done')
         pass
@@ -9,15 +9,21 @@ Pablo Oyola for his library to analyse MEGA output
 import os
 import logging
 import numpy as np
+import pandas as pd
 import xarray as xr
+from concurrent.futures import ThreadPoolExecutor
 from farpy._paths import Path
 from farpy._errors import NotFoundFile
+from farpy._cache import readCache, writeCache, clearCache, readMemmap, \
+    writeMemmap, fileStamps
 import matplotlib.pyplot as plt
 import farpy._Plotting as libplt
 __all__ = ['Modes']
 # Initialise some classes
 paths = Path()
 logger = logging.getLogger('farpy.Models')
+# numpy >= 1.23 has a C parser in np.loadtxt, older versions are pure python
+_NUMPY_C_LOADTXT = np.lib.NumpyVersion(np.__version__) >= '1.23.0'
 
 
 # ------------------------------------------------------------------------------
@@ -116,6 +122,18 @@ attrs = {
     },
 }
 
+# ------------------------------------------------------------------------------
+# --- Files written by FAR3D
+# ------------------------------------------------------------------------------
+harmonicNames = ['vthprlf', 'vth', 'vr', 'vprlf', 'uzt', 'psi', 'pr',
+                 'phi', 'nf', 'curzt', 'bth', 'br']
+energyNames = ['evprlfnc', 'evprlf', 'emenc', 'eme', 'ekenc', 'eke']
+
+# Trigonometric basis of the reconstructions, see _trigBasis
+_basisCache = {}
+_basisCacheSize = 16
+
+
 # ------------------------------------------------------------------------------
 # --- Auxiliary function
 # ------------------------------------------------------------------------------
@@ -146,6 +164,174 @@ def _getFileList(path: str = '.', start: str = 'vth', extension: str = ''):
     return filenames
 
 
+def _read_harmonic_file(filename: str, columns: list = None,
+                        rows: tuple = None):
+    """
+    Read the numerical block of a harmonic file (phi_XXXX, psi_XXXX, ...)
+
+    The file is parsed with a C tokenizer: the one of np.loadtxt for
+    numpy >= 1.23 and the one of pandas for older numpy versions, where
+    np.loadtxt is pure python and much slower
+
+    :param filename: full path to the file
+    :param columns: sorted list with the columns to be read. If None, all
+        of them will be read
+    :param rows: tuple (first, number) with the first radial point to be
+        read and the number of points to read. If None, all of them
+
+    :return: 2D array of shape (nr, 2*nmodes + 1), first column is r (or
+        the selected rows and columns)
+    """
+    skip = 1 if rows is None else 1 + rows[0]
+    nrows = None if rows is None else rows[1]
+    if _NUMPY_C_LOADTXT:
+        return np.loadtxt(filename, skiprows=skip, max_rows=nrows,
+                          usecols=columns, ndmin=2)
+    return pd.read_csv(filename, sep=r'\s+', header=None, skiprows=skip,
+                       nrows=nrows, usecols=columns, dtype=np.float64,
+                       engine='c').to_numpy()
+
+
+def _read_energy_file(filename: str):
+    """
+    Read the numerical line of an energy file (eke_XXXX, ekenc_XXXX, ...)
+
+    :param filename: full path to the file
+
+    :return: 1D array with the time, (the 2 extra columns) and the energy of
+        each mode
+    """
+    with open(filename) as fid:
+        fid.readline()
+        return np.array(fid.readline().split(), dtype=float)
+
+
+def _parse_nm(line: str, new_format: bool = True):
+    """
+    Get the n and m numbers from the header line of the FAR3D files
+
+    :param line: header line of the file
+    :param new_format: if True, the new FAR3D format, with R, I, will be
+        tried first. If False, the old format (where the n/m repeat with
+        negative m) will be assumed
+
+    :return n: array with the toroidal numbers of the columns
+    :return m: array with the poloidal numbers of the columns
+    """
+    n = []
+    m = []
+    try:  # New far3D format, with R, I
+        if not new_format:
+            raise Exception()
+        found_I = False
+        for s in line.split():
+            if s == 'I':  # n/m repeat, so stop
+                found_I = True
+                break
+            if len(s.split('/')) == 2:
+                m.append(int(s.split('/')[0]))
+            # the m comes with /, so the only other numbers in the line are n
+            try:
+                n.append(int(s))
+            except ValueError:  # we have an R
+                pass
+        if not found_I:
+            raise Exception()
+    except:
+        n = []
+        m = []
+        for s in line.split():
+            if len(s.split('/')) == 2:
+                dummy_m = int(s.split('/')[0])
+                if dummy_m < 0:  # n/m repeat, so stop
+                    break
+                m.append(dummy_m)
+            # the m comes with /, so the only other numbers in the line are n
+            try:
+                n.append(int(s))
+            except ValueError:  # we have an R
+                pass
+    return np.array(n), np.array(m)
+
+
+def _addVariable(ds, name: str, da):
+    """
+    Add a variable to a dataset
+
+    Variables with the sparse layout are merged, as the direct assignment of
+    a variable with a MultiIndex present in the dataset fails in xarray
+
+    :param ds: xr.Dataset
+    :param name: name of the variable
+    :param da: DataArray to be added
+
+    :return: the dataset with the variable
+    """
+    if 'mode' in da.dims and 'mode' in ds.dims:
+        return xr.merge([ds, da.to_dataset(name=name)], join='outer',
+                        compat='no_conflicts')
+    ds[name] = da
+    return ds
+
+
+def _toDense(da):
+    """
+    Expand a DataArray with the sparse mode layout to the (n, m) matrices
+
+    The (n, m) pairs which are not present in the data are filled with NaN
+
+    :param da: DataArray with the mode dimension (and n, m coordinates)
+
+    :return: DataArray where the mode dimension is replaced by n and m
+    """
+    if 'mode' not in da.dims:
+        return da
+    dims = []
+    for d in da.dims:
+        dims += ['n', 'm'] if d == 'mode' else [d]
+    da = da.transpose('mode', ...)
+    unique_n, indeces_n = np.unique(da.n.values, return_inverse=True)
+    unique_m, indeces_m = np.unique(da.m.values, return_inverse=True)
+    fill = complex(np.nan, np.nan) if da.dtype.kind == 'c' else np.nan
+    out = np.full((unique_n.size, unique_m.size) + da.shape[1:], fill,
+                  dtype=da.dtype)
+    out[indeces_n, indeces_m] = da.values
+    coords = {k: v for k, v in da.coords.items() if 'mode' not in v.dims}
+    coords.update({'n': unique_n, 'm': unique_m})
+    dense = xr.DataArray(out, dims=('n', 'm') + da.dims[1:], coords=coords,
+                         attrs=da.attrs, name=da.name)
+    return dense.transpose(*dims)
+
+
+def _trigBasis(n, m, theta, phi):
+    """
+    Get the basis cos(m theta - n phi), sin(m theta - n phi) of the modes
+
+    The basis is stored in a module dictionary, so consecutive
+    reconstructions with the same modes and angles (all the runs of a
+    simulation, all the points of a scan...) calculate it only once
+
+    :param n: array with the toroidal number of each mode
+    :param m: array with the poloidal number of each mode
+    :param theta: array of poloidal angles
+    :param phi: array of toroidal angles
+
+    :return: read-only array of shape (2*nmodes, ntheta*nphi). The first
+        nmodes rows are the cosines and the rest the sines
+    """
+    key = (n.tobytes(), m.tobytes(), theta.tobytes(), phi.tobytes())
+    if key not in _basisCache:
+        if len(_basisCache) >= _basisCacheSize:
+            _basisCache.clear()
+        angle = m[:, None, None] * theta[None, :, None] \
+            - n[:, None, None] * phi[None, None, :]
+        basis = np.concatenate((np.cos(angle), np.sin(angle)))
+        basis = basis.reshape(2 * n.size, theta.size * phi.size)
+        basis.flags.writeable = False
+        _basisCache[key] = basis
+    return _basisCache[key]
+
+
 # ------------------------------------------------------------------------------
 # --- Modes class
 # ------------------------------------------------------------------------------
@@ -154,8 +340,29 @@ class Modes:
     Read and handle mode amplitude information.
 
     Jose Rueda: jrrueda@us.es
+
+    The variables can be accessed via self.data or via self[name]. The latter
+    will read the variable if it was not loaded yet
+
+    A subset of the runs, modes and radial points can be selected when
+    creating the object. Only the selected rows and columns of the files are
+    parsed, so the memory and reading time scale with the selection
+
+    With dtype='complex64' or 'complex128', the harmonics are stored in
+    self.data as complex arrays over (run, n, m, r). self[name] (and the
+    plotting routines) still give them with the R_I dimension, as a view of
+    the same memory
+
+    With layout='sparse', the modes are stored along a single mode dimension,
+    with the n and m of each mode as coordinates (so .sel(n=1, m=2) still
+    works), instead of the (n, m) matrices, which are mostly empty for
+    simulations with several n. self.dense(name) gives the (n, m) matrices
     """
-    def __init__(self, model_name: str = None, path: str = None):
+    def __init__(self, model_name: str = None, path: str = None,
+                 lazy: bool = False, cache: bool = True, workers: int = 1,
+                 runs=None, n=None, m=None, rlim: tuple = None,
+                 R_I: str = None, dtype: str = 'float64',
+                 layout: str = 'dense'):
         """
         Initialise the class and read the files
 
@@ -163,6 +370,30 @@ class Modes:
             the model folder, which is assumed to be inside the FAR3d folder
         :param path: if present, this folder will be assumed to contain all the
             results, and the model_name input will be ignored
+        :param lazy: if True, only the list of runs and the header of the files
+            are read here. Each variable will be read the first time it is
+            needed (self[name], self.load() or the plotting routines)
+        :param cache: if True, each variable will be saved in a binary file
+            inside the model folder after reading it, and it will be read from
+            there the next time, as long as the ASCII files did not change
+        :param workers: number of threads used to read the files of each
+            variable. Useful in network file systems, where the latency of
+            each file dominates the reading time
+        :param runs: runs to be read. List of strings with the run id ('0000',
+            '0001', ...) or a slice, for example slice(-5, None) for the last
+            5 runs. If None, all runs are read
+        :param n: toroidal number (or list of them) to be read. If None, all
+        :param m: poloidal number (or list of them) to be read. If None, all
+        :param rlim: tuple (rmin, rmax) with the radial window to be read. If
+            None, the whole radial grid is read
+        :param R_I: 'R' or 'I' to read only the real or imaginary part of the
+            harmonics. If None, both are read
+        :param dtype: type used to store the harmonics: 'float64', 'float32',
+            'complex128' or 'complex64'. The single precision ones are not
+            saved in the cache (but are read from it if present)
+        :param layout: 'dense' to store the modes in (n, m) matrices, where
+            the pairs not present in the files are NaN, or 'sparse', to store
+            them along a mode dimension
         """
         if path is None:
             path = os.path.join(os.path.expanduser('~'), 'FAR3d',
@@ -171,223 +402,748 @@ class Modes:
                 raise Exception('FAR3d not in home dir? Give me the right path')
         self.model_name = model_name
         self.path = path
-        self._read_files()
+        self.cache = cache
+        self.workers = workers
+        self.dtype = np.dtype(dtype)
+        if self.dtype.name not in ('float64', 'float32', 'complex128',
+                                   'complex64'):
+            raise Exception('Not supported dtype: %s' % dtype)
+        if self.dtype.kind == 'c' and R_I is not None:
+            raise Exception('R_I selection not possible with complex dtype')
+        if layout not in ('dense', 'sparse'):
+            raise Exception('Not supported layout: %s' % layout)
+        self.layout = layout
+        self.selection = {'runs': runs, 'n': n, 'm': m, 'rlim': rlim,
+                          'R_I': R_I}
+        self.data = xr.Dataset()
+        self._energyCube = None
+        self._read_header()
+        if not lazy:
+            self.load()
+
+    def __getitem__(self, item):
+        """
+        Get a variable, reading it from the files if needed
+
+        The complex harmonics are given with the R_I dimension
+        """
+        self.load(item)
+        return self._view(item)
+
+    def dense(self, name: str):
+        """
+        Get a variable with the (n, m) matrices, whatever the layout
+
+        :param name: name of the variable
+        """
+        return _toDense(self[name])
+
+    def _view(self, name: str):
+        """
+        Get a variable with the R_I dimension
+
+        For complex harmonics, the real and imaginary parts are exposed as a
+        float array without copying the data
+
+        :param name: name of the variable
+        """
+        da = self.data[name]
+        if da.dtype.kind != 'c':
+            return da
+        values = np.ascontiguousarray(da.values)
+        # complex numbers are stored as consecutive (real, imag) pairs
+        RI = values.view(values.real.dtype).reshape(values.shape + (2,))
+        view = xr.DataArray(RI, dims=da.dims + ('R_I',),
+                            coords=da.coords, attrs=da.attrs)
+        view = view.assign_coords(R_I=['R', 'I'])
+        return view.transpose(..., 'R_I', 'r')
+
+    def _compact(self, da):
+        """
+        Convert a DataArray with the R_I dimension to the storage dtype
+
+        :param da: float DataArray with the R_I dimension
+        """
+        if self.dtype.kind != 'c':
+            return da.astype(self.dtype, copy=False)
+        out = np.empty(da.isel(R_I=0).shape, dtype=self.dtype)
+        out.real = da.sel(R_I='R').values
+        out.imag = da.sel(R_I='I').values
+        dims = tuple(d for d in da.dims if d != 'R_I')
+        coords = {k: v for k, v in da.coords.items() if k != 'R_I'}
+        return xr.DataArray(out, dims=dims, coords=coords, attrs=da.attrs)
 
     # --------------------------------------------------------------------------
     # --- Reading block
     # --------------------------------------------------------------------------
-    def _read_files(self, names: list = None, namesE: list = None):
+    def _read_header(self):
         """
-        Read the files
+        Look for the available runs and read the header of the files
 
-        :param names: prefix of the files to be read, if none, all simulation
-            files will be read
+        The indices needed to place each column of the files in the (n, m)
+        matrices are stored in self.header, together with the columns and rows
+        of the files to be read, according to self.selection
         """
-        if names is None:
-            names = ['vthprlf', 'vth', 'vr', 'vprlf', 'uzt', 'psi', 'pr',
-                     'phi', 'nf', 'curzt', 'bth', 'br',]
-        if namesE is None:
-            namesE = ['evprlfnc', 'evprlf', 'emenc', 'eme', 'ekenc', 'eke', ]
-
+        sel = self.selection
         # see how many runs there are:
-        files_of_vth = _getFileList(self.path, start='psi')
-        nruns = len(files_of_vth)
-        logger.info('Found %i runs', nruns)
-        runs = []
-        for file in files_of_vth:
-            runs.append(file.split('_')[1])
-        # --- Read the mode amplitudes
-        # Read a header, to allocate the variables size:
-        filename = os.path.join(self.path, files_of_vth[0])
-        nr, two_nmodes_plus_1 = np.loadtxt(filename, skiprows=1).shape
-        fid = open(filename)
-        line = fid.readline()
-        fid.close()
-        n = []
-        m = []
-        try:  # New far3D format, with R, I
-            found_I = False
-            for s in line.split():
-                if s == 'I':  # n/m repeat, so stop
-                    found_I = True
-                    break
-                if len(s.split('/')) == 2:
-                    m.append(int(s.split('/')[0]))
-                # the m comes with /, so the only other numbers in the line are n
-                try:
-                    n.append(int(s))
-                except ValueError:  # we have an R
-                    pass
-            if not found_I:
-                raise Exception()
-        except:
-            n = []
-            m = []
-            for s in line.split():
-                if len(s.split('/')) == 2:
-                    dummy_m = int(s.split('/')[0])
-                    if dummy_m < 0:  # n/m repeat, so stop
-                        break
-                    m.append(dummy_m)
-                # the m comes with /, so the only other numbers in the line are n
-                try:
-                    n.append(int(s))
-                except ValueError:  # we have an R
-                    pass
-        n = np.array(n)
-        unique_n = np.unique(n)
-        indeces_n = np.zeros(n.size, dtype=int)
-        for iin, nn in enumerate(n):
-            indeces_n[iin] = np.where(unique_n == nn)[0]
-        m = np.array(m)
-        unique_m = np.unique(m)
-        indeces_m = np.zeros(m.size, dtype=int)
-        for iim, mm in enumerate(m):
-            indeces_m[iim] = np.where(unique_m == mm)[0]
-
+        files_of_psi = _getFileList(self.path, start='psi')
+        allRuns = [file.split('_')[1] for file in files_of_psi]
+        logger.info('Found %i runs', len(allRuns))
+        if sel['runs'] is None:
+            runs = allRuns
+        elif isinstance(sel['runs'], slice):
+            runs = allRuns[sel['runs']]
+        else:
+            wanted = [str(s) for s in np.atleast_1d(sel['runs'])]
+            runs = [s for s in allRuns if s in wanted]
+        if len(runs) == 0:
+            raise Exception('None of the selected runs was found')
+        # --- Header of the mode amplitudes
+        filename = os.path.join(self.path, files_of_psi[0])
+        with open(filename) as fid:
+            line = fid.readline()
+            two_nmodes_plus_1 = len(fid.readline().split())
+        n, m = _parse_nm(line)
         if (2*len(n)+1) != two_nmodes_plus_1:
             print('n:', n)
             print('m:', m)
             print('n shape:', n.shape)
             print('m shape:', m.shape)
             raise Exception('Something went wrong reading the header')
-
-        # preallocate the macro matrix
-        # data = np.empty(
-        #     (nruns, unique_n.size, unique_m.size, 2, len(names), nr))
-        # read all the files:
-        data = xr.Dataset()
-        for file in names:
-            logger.info('Reading %s', file)
-            dum = np.empty(
-                (nruns, unique_n.size, unique_m.size, 2, nr))
-            # See if the file exist:
-            filename = filename = os.path.join(self.path, file + '_' + runs[0])
-            if not os.path.isfile(filename):
-                logger.warning('Not found files for %s', file)
-                continue
-            for iis, s in enumerate(runs):
-                filename = os.path.join(self.path, file + '_' + s)
-                dummy = np.loadtxt(filename, skiprows=1)
-                # put each colum in place
-                for icolum in range(1, int((two_nmodes_plus_1+1)/2)):
-                    # amplitude
-                    dum[iis, indeces_n[icolum-1], indeces_m[icolum-1], 0, :] =\
-                        dummy[:, icolum]
-                    dum[iis, indeces_n[icolum-1], indeces_m[icolum-1], 1, :] =\
-                        dummy[:, icolum + n.size]
-            data[file] = xr.DataArray(
-                dum.copy(), dims=('run', 'n', 'm', 'R_I', 'r'),
-                coords={'run': runs, 'n': unique_n, 'm': unique_m, 
-                        'R_I': ['R', 'I'], 'r': dummy[:, 0]})
-        # --- Read the energy files
-        # Read a header, to allocate the variables size:
+        # --- Columns and rows to be read
+        keep = np.ones(n.size, dtype=bool)
+        if sel['n'] is not None:
+            keep &= np.isin(n, sel['n'])
+        if sel['m'] is not None:
+            keep &= np.isin(m, sel['m'])
+        if not keep.any():
+            raise Exception('None of the selected (n, m) pairs was found')
+        k = np.flatnonzero(keep)
+        if sel['R_I'] is None:
+            R_I = ['R', 'I']
+        else:
+            R_I = [s for s in ['R', 'I'] if s in np.atleast_1d(sel['R_I'])]
+            if len(R_I) == 0:
+                raise Exception('R_I should be R or I')
+        # The real parts are in the columns 1:nmodes+1, the imaginary ones
+        # after them
+        columns = [0]
+        if 'R' in R_I:
+            columns += list(1 + k)
+        if 'I' in R_I:
+            columns += list(1 + n.size + k)
+        if keep.all() and len(R_I) == 2:
+            columns = None
+        if sel['rlim'] is None:
+            rows = None
+        else:
+            r = _read_harmonic_file(filename, columns=[0])[:, 0]
+            inside = np.flatnonzero((r >= sel['rlim'][0])
+                                    & (r <= sel['rlim'][1]))
+            if inside.size == 0:
+                raise Exception('No radial point inside rlim')
+            rows = (inside[0], inside[-1] - inside[0] + 1)
+        unique_n, indeces_n = np.unique(n[keep], return_inverse=True)
+        unique_m, indeces_m = np.unique(m[keep], return_inverse=True)
+        self.header = {
+            'allRuns': allRuns,
+            'runs': runs,
+            'n': n[keep],
+            'm': m[keep],
+            'unique_n': unique_n,
+            'unique_m': unique_m,
+            'indeces_n': indeces_n,
+            'indeces_m': indeces_m,
+            'R_I': R_I,
+            'columns': columns,
+            'rows': rows,
+            'energies': False,
+        }
+        # --- Header of the energy files
         try:
             files_of_ene = _getFileList(self.path, start='ekenc')
-            look_for_energies = True
         except NotFoundFile:
-            look_for_energies = False
             logger.warning('No energy file found')
-        if look_for_energies:
-            filename = os.path.join(self.path, files_of_ene[0])
-            modes_plus_1 = np.loadtxt(filename, skiprows=1).size
-            fid = open(filename)
+            return
+        filename = os.path.join(self.path, files_of_ene[0])
+        with open(filename) as fid:
             line = fid.readline()
-            fid.close()
-            ne = []
-            me = []
-            try:  # New far3D format, with R, I
-                raise Exception('Dummy line until I got a file with the new format')
-                # found_I = False
-                # for s in line.split():
-                #     if s == 'I':  # n/m repeat, so stop
-                #         found_I = True
-                #         break
-                #     if len(s.split('/')) == 2:
-                #         me.append(int(s.split('/')[0]))
-                #         # the m comes with /, so the only other numbers in the line are n
-                #     try:
-                #         ne.append(int(s))
-                #     except ValueError:  # we have an R
-                #         pass
-                # if not found_I:
-                #     raise Exception()
-            except:
-                ne = []
-                me = []
-                for s in line.split():
-                    if len(s.split('/')) == 2:
-                        dummy_m = int(s.split('/')[0])
-                        if dummy_m < 0:  # n/m repeat, so stop
-                            break
-                        me.append(dummy_m)
-                    # the m comes with /, so the only other numbers in the line are n
-                    try:
-                        ne.append(int(s))
-                    except ValueError:  # we have an R
-                        pass
-                ne = np.array(ne)
-                unique_ne = np.unique(ne)
-                indeces_ne = np.zeros(ne.size, dtype=int)
-                for iin, nn in enumerate(ne):
-                    indeces_ne[iin] = np.where(unique_ne == nn)[0]
-                me = np.array(me)
-                unique_me = np.unique(me)
-                indeces_me = np.zeros(me.size, dtype=int)
-                for iim, mm in enumerate(me):
-                    indeces_me[iim] = np.where(unique_me == mm)[0]
-                # Compare the arrays:
-                if not ((unique_ne.size == unique_n.size) or (unique_ne==unique_n).all()):
-                    raise Exception('Number of n does not coincide')
-                if not ((unique_me.size == unique_m.size) or (unique_me==unique_m).all()):
-                    raise Exception('Number of m does not coincide')
-
-                # preallocate the macro matrix
-                # data = np.empty(
-                #     (nruns, unique_n.size, unique_m.size, 2, len(names), nr))
-                # read all the files:
-                for jfile, file in enumerate(namesE):
-                    logger.info('Reading %s', file)
-                    dum = np.empty((nruns, unique_ne.size, unique_me.size))
-                    dum[:] = np.nan
-                    if jfile == 0:
-                        time = []
-                    # See if the file exist:
-                    filename = os.path.join(self.path, file + '_' + runs[0])
-                    if not os.path.isfile(filename):
-                        logger.warning('Not found files for %s', file)
-                        continue
-                    for iis, s in enumerate(runs):
-                        filename = os.path.join(self.path, file + '_' + s)
-                        dummy = np.loadtxt(filename, skiprows=1)
-                        if jfile == 0:
-                            time.append(dummy[0])
-                        # put each colum in place
-                        if file.endswith('nc'):
-                            scan = np.arange(1, modes_plus_1)
-                        else:
-                            scan = np.arange(3, modes_plus_1+2)
-                        for icolum in scan:
-                            # amplitude
-                            if file.endswith('nc'):
-                                j = icolum - 1
-                            else:
-                                j = icolum - 3
-                            dum[iis, indeces_ne[j], indeces_me[j]] = dummy[icolum]
-                    if jfile == 0:
-                        data['time'] = xr.DataArray(np.array(time), dims='run')
-                    data[file] = xr.DataArray(
-                        dum.copy(), dims=('run', 'n', 'm'),
-                        coords={'run': runs, 'n': unique_ne, 'm': unique_me})
-        for k in data.keys():
-            if k in attrs:
-                data[k].attrs = attrs[k].copy()
-        self.data = data
+        ne, me = _parse_nm(line, new_format=False)
+        # Compare the arrays:
+        if np.unique(ne).size != np.unique(n).size:
+            raise Exception('Number of n does not coincide')
+        if np.unique(me).size != np.unique(m).size:
+            raise Exception('Number of m does not coincide')
+        keepE = np.ones(ne.size, dtype=bool)
+        if sel['n'] is not None:
+            keepE &= np.isin(ne, sel['n'])
+        if sel['m'] is not None:
+            keepE &= np.isin(me, sel['m'])
+        unique_ne, indeces_ne = np.unique(ne[keepE], return_inverse=True)
+        unique_me, indeces_me = np.unique(me[keepE], return_inverse=True)
+        self.header.update({
+            'energies': True,
+            'allNe': ne,
+            'allMe': me,
+            'ne': ne[keepE],
+            'me': me[keepE],
+            'columnsE': np.flatnonzero(keepE),
+            'unique_ne': unique_ne,
+            'unique_me': unique_me,
+            'indeces_ne': indeces_ne,
+            'indeces_me': indeces_me,
+        })
+
+    def load(self, vars=None):
+        """
+        Read the variables which are not loaded yet
+
+        :param vars: name (or list of names) of the variables to be read. If
+            None, all the harmonic and energy files will be read
+        """
+        if vars is None:
+            vars = harmonicNames + energyNames
+        elif isinstance(vars, str):
+            vars = [vars]
+        for name in vars:
+            if name in self.data.keys():
+                continue
+            if name == 'time':
+                # The time is stored in all the energy files
+                for nameE in energyNames:
+                    self._read_energy(nameE)
+                    if 'time' in self.data.keys():
+                        break
+            elif name in energyNames:
+                self._read_energy(name)
+            else:
+                self._read_harmonic(name)
+
+    def _read_harmonic(self, name: str):
+        """
+        Read the mode amplitude files of a variable
+
+        :param name: prefix of the files to be read (phi, psi, ...)
+        """
+        runs = self.header['runs']
+        # See if the file exist:
+        filename = os.path.join(self.path, name + '_' + runs[0])
+        if not os.path.isfile(filename):
+            logger.warning('Not found files for %s', name)
+            return
+        # The cache always contains all the runs and modes, so, if there is a
+        # selection, it is sliced from it, and never overwritten
+        files = [os.path.join(self.path, name + '_' + s)
+                 for s in self.header['allRuns']]
+        if self.cache:
+            cached = readCache(self.path, name, files)
+            if cached is not None:
+                da = self._fromCache(cached[name])
+                if da is not None:
+                    self.data = _addVariable(self.data, name, da)
+                    return
+        logger.info('Reading %s', name)
+        self.data = _addVariable(self.data, name,
+                                 self._read_harmonic_runs(name, runs))
+        if self.cache and self._cacheWritable():
+            writeCache(self._toCache(name), self.path, name, files)
+
+    def _selected(self):
+        """
+        Check if a subset of the data was selected in the initialization
+        """
+        return any([v is not None for v in self.selection.values()])
+
+    def _cacheWritable(self):
+        """
+        Check if the data can be saved in the cache
+
+        Only complete readings in double precision are saved, as the cache is
+        shared by all the readings of the model
+        """
+        return not self._selected() and self.dtype.name in ('float64',
+                                                            'complex128')
+
+    def _toCache(self, name: str):
+        """
+        Prepare a variable to be saved in the cache
+
+        The cache is always written with the sparse layout and the R_I
+        dimension, whatever the layout and dtype of the object
+
+        :param name: name of the variable
+
+        :return: xr.Dataset with the variable
+        """
+        da = self._view(name)
+        if 'mode' in da.dims:
+            da = da.reset_index('mode')
+        else:
+            da = da.sel(n=xr.DataArray(self.header['n'], dims='mode'),
+                        m=xr.DataArray(self.header['m'], dims='mode'))
+        return da.to_dataset(name=name)
+
+    def _fromCache(self, da):
+        """
+        Apply the selection, layout and dtype of the object to cached data
+
+        :param da: cached DataArray, with all runs, modes and radial points
+
+        :return: the DataArray, or None if the cache does not have the
+            expected format
+        """
+        if 'mode' not in da.dims:
+            return None
+        pairs = {nm: i for i, nm in enumerate(zip(da.n.values, da.m.values))}
+        try:
+            index = [pairs[nm] for nm in zip(self.header['n'],
+                                             self.header['m'])]
+        except KeyError:
+            return None
+        da = da.isel(mode=index).sel(run=self.header['runs'],
+                                     R_I=self.header['R_I'])
+        if self.header['rows'] is not None:
+            first, nrows = self.header['rows']
+            da = da.isel(r=slice(first, first + nrows))
+        da = self._compact(da)
+        if self.layout == 'sparse':
+            return da.set_index(mode=['n', 'm'])
+        return _toDense(da)
+
+    def _modeAxes(self, energy: bool = False):
+        """
+        Get the shape, dimensions and coordinates of the modes
+
+        :param energy: if True, the modes of the energy files are used
+
+        :return shape: shape of the modes part of the matrices
+        :return dims: names of the dimensions of the modes
+        :return coords: coordinates of the modes
+        :return where: index to place all the modes of a file in the matrix
+        """
+        e = 'e' if energy else ''
+        if self.layout == 'sparse':
+            return ((self.header['n' + e].size,), ('mode',),
+                    {'n': ('mode', self.header['n' + e]),
+                     'm': ('mode', self.header['m' + e])},
+                    (slice(None),))
+        return ((self.header['unique_n' + e].size,
+                 self.header['unique_m' + e].size), ('n', 'm'),
+                {'n': self.header['unique_n' + e],
+                 'm': self.header['unique_m' + e]},
+                (self.header['indeces_n' + e], self.header['indeces_m' + e]))
+
+    def _read_harmonic_runs(self, name: str, runs: list):
+        """
+        Read the mode amplitude files of a variable for the given runs
+
+        :param name: prefix of the files to be read (phi, psi, ...)
+        :param runs: list of runs to be read
+
+        :return: DataArray with the amplitudes
+        """
+        files = [os.path.join(self.path, name + '_' + s) for s in runs]
+        nmodes = self.header['n'].size
+        nRI = len(self.header['R_I'])
+        modeShape, modeDims, coords, where = self._modeAxes()
+        columns = self.header['columns']
+        rows = self.header['rows']
+        # The first file gives the radial grid, to preallocate the matrix.
+        # The rest of the files are written directly on it
+        dummy = _read_harmonic_file(files[0], columns, rows)
+        r = dummy[:, 0]
+        nr = r.size
+        shape = (len(runs),) + modeShape
+        shape += (nr,) if self.dtype.kind == 'c' else (nRI, nr)
+        if self.layout == 'sparse':
+            dum = np.empty(shape, dtype=self.dtype)
+        else:  # the (n, m) pairs not present in the files are left as NaN
+            fill = complex(np.nan, np.nan) if self.dtype.kind == 'c' \
+                else np.nan
+            dum = np.full(shape, fill, dtype=self.dtype)
+        if self.dtype.kind == 'c':
+            def place(iis, dummy):
+                # Columns 1:nmodes+1 are the real parts and the rest the
+                # imaginary ones
+                dum.real[(iis,) + where] = dummy[:, 1:nmodes+1].T
+                dum.imag[(iis,) + where] = dummy[:, nmodes+1:].T
+        else:
+            def place(iis, dummy):
+                # put all the columns in place at once. Columns 1:nmodes+1
+                # are the real parts and the rest the imaginary ones
+                dum[(iis,) + where] = \
+                    dummy[:, 1:].T.reshape(nRI, nmodes, nr).swapaxes(0, 1)
+        place(0, dummy)
+        self._for_each_file(
+            lambda iis: place(iis, _read_harmonic_file(files[iis], columns,
+                                                       rows)),
+            range(1, len(files)))
+        coords.update({'run': runs, 'r': r})
+        if self.dtype.kind == 'c':
+            dims = ('run',) + modeDims + ('r',)
+        else:
+            dims = ('run',) + modeDims + ('R_I', 'r')
+            coords['R_I'] = self.header['R_I']
+        da = xr.DataArray(dum, dims=dims, coords=coords)
+        if self.layout == 'sparse':
+            da = da.set_index(mode=['n', 'm'])
+        if name in attrs:
+            da.attrs = attrs[name].copy()
+        return da
+
+    def _for_each_file(self, fun, iis):
+        """
+        Apply a reading function to a set of files
+
+        If self.workers > 1, the files are distributed in a thread pool. Each
+        call should only write its own slice of the output matrices, so the
+        result does not depend on the order in which the files are read
+
+        :param fun: function to be called as fun(i) for each file index
+        :param iis: indices of the files to be read
+        """
+        if self.workers > 1 and len(iis) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                # consume the iterator, so errors are raised here
+                list(pool.map(fun, iis))
+        else:
+            for i in iis:
+                fun(i)
+
+    def _read_energy(self, name: str):
+        """
+        Read the energy files of a variable
+
+        The time of each run is also read, if it was not done before
+
+        :param name: prefix of the files to be read (eke, ekenc, ...)
+        """
+        if not self.header['energies']:
+            return
+        runs = self.header['runs']
+        # See if the file exist:
+        filename = os.path.join(self.path, name + '_' + runs[0])
+        if not os.path.isfile(filename):
+            logger.warning('Not found files for %s', name)
+            return
+        # If all the energies are already in the memory mapped cube, they are
+        # taken from there. The cube is not built here, as that would parse
+        # all the quantities and runs, whatever the selection
+        cube = self._readEnergyCube(build=False) if self.cache else None
+        if cube is not None:
+            da, time = self._fromCube(cube.sel(quantity=name))
+        else:
+            logger.info('Reading %s', name)
+            da, time = self._read_energy_runs(name, runs)
+        if 'time' not in self.data.keys():
+            self.data['time'] = time
+        self.data = _addVariable(self.data, name, da)
+
+    def energyCube(self):
+        """
+        Get all the energies of the simulation in a single array
+
+        With cache=True, the array is saved in the cache folder and opened as
+        a memory mapped array, so it is built only once (and extended with the
+        new runs when the simulation advances) and any slice of it is read
+        without loading the rest. The selection of the object is not applied
+
+        :return: DataArray with dimensions (time, n, m, quantity). The pairs
+            (n, m) not present in the files are NaN
+        """
+        return self._readEnergyCube()
+
+    def _readEnergyCube(self, build: bool = True):
+        """
+        Get the energy cube, see energyCube
+
+        :param build: if False, the cube is only taken from memory or from the
+            cache, when it is there for all the runs. Nothing is parsed
+
+        :return: DataArray with the cube, None if build is False and there is
+            no complete cube
+        """
+        if not self.header['energies']:
+            raise Exception('No energy file found')
+        runs = self.header['allRuns']
+        if self._energyCube is not None and \
+                self._energyCube.sizes['time'] == len(runs):
+            return self._energyCube
+        quantities = [name for name in energyNames if os.path.isfile(
+            os.path.join(self.path, name + '_' + runs[0]))]
+        ne = self.header['allNe']
+        me = self.header['allMe']
+        unique_n, indeces_n = np.unique(ne, return_inverse=True)
+        unique_m, indeces_m = np.unique(me, return_inverse=True)
+        meta = {'quantities': quantities, 'n': unique_n.tolist(),
+                'm': unique_m.tolist()}
+
+        def filesOf(runs):
+            return [os.path.join(self.path, name + '_' + s)
+                    for s in runs for name in quantities]
+        # --- See how much of the cached cube can be used. The stamps of the
+        # files are compared one by one, so only the runs whose files changed
+        # are read again
+        cube, cached = (None, None)
+        if self.cache:
+            cube, cached = readMemmap(self.path, 'energies')
+        nold = 0
+        changed = []
+        if cube is not None:
+            nold = len(cached['runs'])
+            if any([cached[k] != meta[k] for k in meta.keys()]) \
+                    or cached['runs'] != runs[:nold] \
+                    or len(cached.get('files', [])) != nold * len(quantities):
+                nold = 0
+            else:
+                stamps = fileStamps(filesOf(runs[:nold]))
+                changed = sorted(set([i // len(quantities)
+                                      for i in range(len(stamps))
+                                      if stamps[i] != cached['files'][i]]))
+        if not build and (nold < len(runs) or len(changed) > 0):
+            return None
+        # --- Read the new runs, and the ones which changed
+        new = [runs[i] for i in changed] + runs[nold:]
+        if len(new) > 0:
+            logger.info('Reading energies of %i runs', len(new))
+            block = np.full((len(new), unique_n.size, unique_m.size,
+                             len(quantities)), np.nan)
+            time = np.empty(len(new))
+
+            def place(iis):
+                for j, name in enumerate(quantities):
+                    dummy = _read_energy_file(
+                        os.path.join(self.path, name + '_' + new[iis]))
+                    # The no-coupling files just have the time before the
+                    # modes, the others have 2 extra columns
+                    first = 1 if name.endswith('nc') else 3
+                    time[iis] = dummy[0]
+                    block[iis, indeces_n, indeces_m, j] = \
+                        dummy[first:first + ne.size]
+            self._for_each_file(place, range(len(new)))
+            # The unchanged runs of the cached cube are kept, without loading
+            # them in memory
+            oldTime = [] if nold == 0 else list(cached['time'])
+            blocks = []
+            start = 0
+            for k, i in enumerate(changed):
+                blocks += [cube[start:i], block[k:k + 1]]
+                oldTime[i] = float(time[k])
+                start = i + 1
+            if nold > 0:
+                blocks.append(cube[start:nold])
+            blocks.append(block[len(changed):])
+            blocks = [b for b in blocks if b.shape[0] > 0]
+            meta.update({'runs': runs,
+                         'time': oldTime + time[len(changed):].tolist()})
+            if self.cache:
+                writeMemmap(blocks, self.path, 'energies', filesOf(runs),
+                            meta)
+                cube, cached = readMemmap(self.path, 'energies')
+            if cube is None or cached['runs'] != runs:
+                # The cache could not be written
+                cube = np.concatenate(blocks)
+                cached = meta
+        self._energyCube = xr.DataArray(
+            cube, dims=('time', 'n', 'm', 'quantity'),
+            coords={'time': cached['time'], 'run': ('time', runs),
+                    'n': unique_n, 'm': unique_m, 'quantity': quantities})
+        return self._energyCube
+
+    def _fromCube(self, da):
+        """
+        Apply the selection and layout of the object to a slice of the cube
+
+        :param da: energies of a quantity, from self.energyCube()
+
+        :return da: DataArray with the energies
+        :return time: DataArray with the time of each run
+        """
+        name = str(da.quantity.values)
+        da = da.swap_dims(time='run').sel(run=self.header['runs'])
+        time = xr.DataArray(da.time.values, dims='run',
+                            coords={'run': self.header['runs']})
+        da = da.drop_vars(['time', 'quantity'])
+        if self.layout == 'sparse':
+            da = da.sel(n=xr.DataArray(self.header['ne'], dims='mode'),
+                        m=xr.DataArray(self.header['me'], dims='mode'))
+            da = da.set_index(mode=['n', 'm'])
+        else:
+            da = da.sel(n=self.header['unique_ne'],
+                        m=self.header['unique_me'])
+        if name in attrs:
+            da.attrs = attrs[name].copy()
+        return da, time
+
+    def _read_energy_runs(self, name: str, runs: list):
+        """
+        Read the energy files of a variable for the given runs
+
+        :param name: prefix of the files to be read (eke, ekenc, ...)
+        :param runs: list of runs to be read
+
+        :return da: DataArray with the energies
+        :return time: DataArray with the time of each run
+        """
+        files = [os.path.join(self.path, name + '_' + s) for s in runs]
+        modeShape, modeDims, coords, where = self._modeAxes(energy=True)
+        # Columns with the modes. The no-coupling files just have the time
+        # before the modes, the others have 2 extra columns
+        first = 1 if name.endswith('nc') else 3
+        columns = [0] + list(first + self.header['columnsE'])
+        dum = np.full((len(runs),) + modeShape, np.nan)
+        time = np.empty(len(runs))
+
+        def place(iis):
+            dummy = _read_energy_file(files[iis])[columns]
+            time[iis] = dummy[0]
+            dum[(iis,) + where] = dummy[1:]
+        self._for_each_file(place, range(len(files)))
+        coords['run'] = runs
+        da = xr.DataArray(dum, dims=('run',) + modeDims, coords=coords)
+        if self.layout == 'sparse':
+            da = da.set_index(mode=['n', 'm'])
+        if name in attrs:
+            da.attrs = attrs[name].copy()
+        return da, xr.DataArray(time, dims='run', coords={'run': runs})
+
+    def refresh(self):
+        """
+        Read the runs written after the object was created
+
+        Useful to follow a simulation which is still running. The new runs are
+        found as in the initialization (looking at the psi files) and only the
+        variables already loaded are read, for the new runs, and appended to
+        them. A run is not taken until the files of all loaded variables are
+        present. If a subset of runs was selected in the initialization, no
+        new run is added. The cache is not updated, see updateCache()
+
+        :return: list with the new runs
+        """
+        if 'run' not in self.data.dims and len(self.data.keys()) > 0:
+            raise Exception('Run dimension not found, did you swap it?')
+        if self.selection['runs'] is not None:
+            logger.warning('11: Runs were selected, no new run will be read')
+            return []
+        files_of_psi = _getFileList(self.path, start='psi')
+        loaded = set(self.header['runs'])
+        names = list(self.data.keys())
+        new = []
+        for file in files_of_psi:
+            s = file.split('_')[1]
+            if s in loaded:
+                continue
+            complete = True
+            for name in names:
+                if name == 'time':
+                    continue
+                if not os.path.isfile(os.path.join(self.path,
+                                                   name + '_' + s)):
+                    complete = False
+                    break
+            if complete:
+                new.append(s)
+        if len(new) == 0:
+            return new
+        logger.info('Found %i new runs', len(new))
+        newData = xr.Dataset()
+        for name in names:
+            if name in energyNames:
+                da, time = self._read_energy_runs(name, new)
+                newData = _addVariable(newData, name, da)
+                if 'time' not in newData.keys():
+                    newData['time'] = time
+            elif name != 'time':
+                newData = _addVariable(newData, name,
+                                       self._read_harmonic_runs(name, new))
+        self.data = xr.concat([self.data, newData], dim='run')
+        self.header['runs'] = self.header['runs'] + new
+        self.header['allRuns'] = self.header['allRuns'] + new
+        return new
+
+    def updateCache(self):
+        """
+        Save the loaded harmonics in the cache, with all the runs
+
+        refresh() does not update the cache, as rewriting it costs as much
+        as reading the whole history. Call this once the simulation is
+        finished (or from time to time), so the next reading of the model is
+        taken from the cache. The energy cube is extended by energyCube()
+        """
+        if not (self.cache and self._cacheWritable()):
+            logger.warning('11: Selected or single precision data, the cache'
+                           ' is not written')
+            return
+        for name in self.data.keys():
+            if name == 'time' or name in energyNames:
+                continue
+            files = [os.path.join(self.path, name + '_' + s)
+                     for s in self.header['runs']]
+            writeCache(self._toCache(name), self.path, name, files)
+
+    def clearCache(self):
+        """
+        Remove the binary cache of the model folder
+        """
+        clearCache(self.path)
+
+    # --------------------------------------------------------------------------
+    # --- Reconstruction block
+    # --------------------------------------------------------------------------
+    def reconstruct(self, var_name: str = 'phi', run=None, theta=None,
+                    phi=0.0):
+        """
+        Reconstruct the mode structure in the poloidal cross-section
+
+        The sum over the harmonics of R cos(m theta - n phi) +
+        I sin(m theta - n phi) is done, for all the runs and radial points at
+        once, as a single matrix product with the trigonometric basis. The
+        basis is cached, so the reconstruction of many runs (to make a movie)
+        or of many simulations with the same modes is cheap
+
+        :param var_name: variable to be reconstructed
+        :param run: run (or list of runs) to reconstruct. If None, all of them
+        :param theta: array of poloidal angles [rad]. If None, 128 points
+            in [0, 2pi)
+        :param phi: toroidal angle (or array of them) [rad]
+
+        :return: DataArray with dimensions (run, r, theta), plus phi if an
+            array of toroidal angles was given
+        """
+        da = self[var_name]
+        if 'R_I' not in da.dims or da.R_I.size != 2:
+            raise Exception('Real and imaginary parts are needed')
+        runDim = da.dims[0]     # run, or time if it was swapped
+        if run is not None:
+            da = da.sel({runDim: np.atleast_1d(run)})
+        if 'mode' not in da.dims:
+            da = da.sel(n=xr.DataArray(self.header['n'], dims='mode'),
+                        m=xr.DataArray(self.header['m'], dims='mode'))
+        if theta is None:
+            theta = np.linspace(0.0, 2.0 * np.pi, 128, endpoint=False)
+        theta = np.atleast_1d(np.asarray(theta, dtype=float))
+        phis = np.atleast_1d(np.asarray(phi, dtype=float))
+        basis = _trigBasis(da.n.values.astype(int), da.m.values.astype(int),
+                           theta, phis).astype(da.dtype, copy=False)
+        # Amplitudes as (run, r, [R modes, I modes])
+        amp = da.transpose(runDim, 'r', 'R_I', 'mode').values
+        nrun, nr = amp.shape[:2]
+        out = amp.reshape(nrun, nr, -1) @ basis
+        out = xr.DataArray(
+            out.reshape(nrun, nr, theta.size, phis.size),
+            dims=(runDim, 'r', 'theta', 'phi'),
+            coords={runDim: da[runDim].values, 'r': da.r.values,
+                    'theta': theta, 'phi': phis},
+            attrs=da.attrs)
+        if np.ndim(phi) == 0:
+            out = out.isel(phi=0)
+        return out
 
     # --------------------------------------------------------------------------
     # --- Structure  block
     # --------------------------------------------------------------------------
     def _change_runID_with_time(self):
+        self.load('time')
         self.data = self.data.swap_dims({"run": "time"})
     # --------------------------------------------------------------------------
     # --- Plotting block
@@ -413,6 +1169,8 @@ class Modes:
             function. Notice that no label can't be set, as it is set
             automatically in the routine with the m/n value
         """
+        # Read the variables if they were not loaded
+        self.load(var_name)
         # Initialise plotting options
         ax_options = {
             'xlabel': 'r',
@@ -429,7 +1187,7 @@ class Modes:
                 else:
                     n = np.array(n)
         else:
-            n = self.data.n.values
+            n = np.unique(self.data.n.values)
         if m is not None:
             if not isinstance(m, (np.ndarray,)):
                 if not isinstance(m, (list,)):
@@ -437,7 +1195,7 @@ class Modes:
                 else:
                     m = np.array(m)
         else:
-            m = self.data.m.values
+            m = np.unique(self.data.m.values)
         if not isinstance(R_I, (list, np.ndarray)):
             R_I = np.array([R_I])
         if not isinstance(var_name, (list, np.ndarray)):
@@ -448,6 +1206,8 @@ class Modes:
                 print('Variable not found: %s', s)
                 print('Possible variables: ', self.data.keys())
                 raise Exception('Not available variable')
+        # (n, m) matrices of the variables, for any layout
+        data = {s: self.dense(s) for s in var_name}
         # --- Now the loop
         if ax is None:
             fig, ax = plt.subplots()
@@ -464,7 +1224,7 @@ class Modes:
                             logging.info('Plotting %s', name)
                             # Select the data
                             ax.plot(self.data.r,
-                                     self.data[vvar].sel(run=r, n=nn,
+                                     data[vvar].sel(run=r, n=nn,
                                                          m=mm, R_I=RI).values,
                                      label='%s: n=%i - m=%i'%(RI, nn, mm),
                                      **line_params)
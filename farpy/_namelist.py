@@ -1,355 +1,429 @@
 """
-This module read (and in the future writes) the input namelist
+This module read and writes the input namelist
+
+Both the reading and the writing are driven by namelistSchema, which lists the
+fields in the order they appear in the file
 
 jose Rueda: jrrueda@us.es
 """
+import io
 import os
+import numpy as np
+from itertools import islice
 import farpy._aux as faraux
-__all__ = ['readNamelist', 'writeNamelist']
+__all__ = ['readNamelist', 'peekNamelist', 'writeNamelist']
+
+# ------------------------------------------------------------------------------
+# --- Layout of the namelist
+# ------------------------------------------------------------------------------
+# Each field is given as (name, type, count, format, description). It is
+# written as a comment line with its name and description, followed by the
+# value. The count of the arrays is a number or the name of a previous field,
+# and their format is None, as they are written as comma separated values.
+# The strings are extra lines (section headers) which are written as they are
+namelistSchema = (
+    '------MAIN INPUT VALIABLES. Created with FARpy------',
+    ('nstres', int, 1, '%i',
+     'if 0 new run, if 1 the run is a continuation'),
+    ('numrun', str, 1, '%s',
+     'run number'),
+    ('numruno', str, 1, '%s',
+     'name of the previous run output'),
+    ('numvac', int, 1, '%i',
+     'run number index'),
+    ('nonlin', int, 1, '%i',
+     'linear run if 0, non linear run if 1 (no available yet)'),
+    ('ngeneq', int, 1, '%i',
+     'equilibrium input (only VMEC available now)'),
+    ('eq_name', str, 1, '%s',
+     'equilibrium name'),
+    ('maxstp', int, 1, '%i',
+     'simulation time steps'),
+    ('dt0', float, 1, '%i',
+     'simulation time step'),
+    ('ldim', int, 1, '%i',
+     'total number of poloidal modes (equilibrium + dynamic)'),
+    ('leqdim', int, 1, '%i',
+     'equilibrium poloidal modes'),
+    ('jdim', int, 1, '%i',
+     'number of radial points'),
+    ('ext_prof', int, 1, '%i',
+     'include external profiles if 1'),
+    ('ext_prof_name', str, 1, '%s',
+     'external profile file name'),
+    ('ext_prof_len', int, 1, '%i',
+     'number of lines in the external profile'),
+    ('iflr_on', int, 1, '%i',
+     'activate thermal ion FLR damping effects if 1'),
+    ('epflr_on', int, 1, '%i',
+     'activate fast particle FLR damping effects if 1'),
+    ('ieldamp_on', int, 1, '%i',
+     'activate electron-ion Landau damping effect if 1'),
+    ('twofl_on', int, 1, '%i',
+     'activate two fluid effects if 1'),
+    ('alpha_on', int, 1, '%i',
+     'activate a 2nd fast particle species if 1'),
+    ('Trapped_on', int, 1, '%i',
+     'activate correction for trapped 1st fast particle species if 1'),
+    ('matrix_out', bool, 1, '%s',
+     'activate eigensolver output'),
+    ('m0dy', int, 1, '%i',
+     'equilibrium modes as dynamic'),
+    '!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!',
+    '==================================/ MODEL PARAMETERS \\===================================',
+    '!!!!!!!!!!!!!!!!!!!!!!!!!!!!! MODES INCLUDED IN THE MODEL !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!',
+    ('mm', int, 'ldim', None,
+     'poloidal dynamic and equilibrium modes'),
+    ('nn', int, 'ldim', None,
+     'toroidal dynamic and equilibrium modes'),
+    ('mmeq', int, 'leqdim', None,
+     'poloidal equilibrium modes'),
+    ('nneq', int, 'leqdim', None,
+     'toroidal equilibrium modes'),
+    '!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!! PERTURBATION !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!',
+    ('ipert', int, 1, '%i',
+     'different options to drive a perturbation in the equilibria'),
+    ('widthi', float, 1, '%e',
+     'size of the perturbation'),
+    ('Auto_grid_on', int, 1, '%i',
+     'auto grid spacing option'),
+    ('ni', int, 1, '%i',
+     'number of points interior to the island'),
+    ('nis', int, 1, '%i',
+     'number of points in the island'),
+    ('ne', int, 1, '%i',
+     'number of points exterior to the island'),
+    ('delta', float, 1, '%f',
+     'normalized width of the uniform fine grid (island)'),
+    ('rc', float, 1, '%f',
+     'center of the fine grid (island) along the normalized minor radius'),
+    ('Edge_on', int, 1, '%i',
+     'activates the VMEC data extrapolation'),
+    ('edge_p', int, 1, '%i',
+     'grid point from where the VMEC data is extrapolated'),
+    '!!!!!!!!!!!!!!!!!!!!!!!!!!!!! PLASMA PARAMETERS !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!',
+    ('gamma', int, 1, '%i',
+     'adiabatic index'),
+    ('s', float, 1, '%e',
+     'magnetic Lundquist number'),
+    ('betath_factor', int, 1, '%i',
+     'thermal beta factor'),
+    ('ietaeq', int, 1, '%i',
+     'resistivity profile type (if 1 the electron temperature is used)'),
+    ('spe1', int, 1, '%i',
+     'species first EP population'),
+    ('bet0_f', float, 1, '%f',
+     'fast particle beta'),
+    ('spe2', int, 1, '%i',
+     'species second EP population'),
+    ('bet0_falp', float, 1, '%i',
+     '2nd species fast particle beta'),
+    ('omcy', float, 1, '%f',
+     'normalized fast particle cyclotron frequency'),
+    ('omcyb', float, 1, '%f',
+     'normalized fast particle cyclotron frequency'),
+    ('rbound', float, 1, '%f',
+     'normalized helicaly trapped bound length'),
+    ('omcyalp', float, 1, '%f',
+     'normalized 2nd species fast particle cyclotron frequency'),
+    ('itime', int, 1, '%i',
+     'time normalization option'),
+    ('dpres', float, 1, '%f',
+     'electron pressure normalized to the total pressure (two fluid '
+     'effects)'),
+    '!!!!!!!!!!!!!!!!!!!!!!!!!!!!! DIFFUSIVITIES !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!',
+    ('stdifp', int, 1, '%i',
+     'thermal pressure eq. diffusivity'),
+    ('stdifu', int, 1, '%i',
+     'vorticity eq. diffusivity'),
+    ('stdifv', int, 1, '%i',
+     'thermal particle parallel velocity eq. diffusivity'),
+    ('stdifnf', int, 1, '%i',
+     'fast particle density eq. diffusivity'),
+    ('stdifvf', int, 1, '%i',
+     'fast particle parallel velocity eq. diffusivity'),
+    ('stdifnfalp', int, 1, '%i',
+     'fast particle parallel velocity eq. diffusivity'),
+    ('stdifvfalp', int, 1, '%i',
+     'fast particle parallel velocity eq. diffusivity'),
+    '!!!!!!!!!!!!!!!!!!!!!!!!!!!!! LANDAU CLOSURE !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!',
+    ('LcA0', float, 1, '%f',
+     'Landau closure 1'),
+    ('LcA1', float, 1, '%f',
+     'Landau closure 2'),
+    ('LcA2', float, 1, '%f',
+     'correction to the fast particle beta'),
+    ('LcA3', float, 1, '%f',
+     'correction to the ratio between fast particle thermal velocity and '
+     'Alfven velocity'),
+    ('LcA0alp', float, 1, '%f',
+     'Landau closure 1 2nd species'),
+    ('LcA1alp', float, 1, '%f',
+     'Landau closure 2 2nd species'),
+    ('LcA2alp', float, 1, '%f',
+     'correction to the 2nd species fast particle beta'),
+    ('LcA3alp', float, 1, '%f',
+     'correction to the ratio between fast particle thermal velocity and '
+     'Alfven velocity 2nd species'),
+    '!!!!!!!!!!!!!!!!!!!!!!!!!!!!! DAMPINGS !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!',
+    ('omegar', float, 1, '%f',
+     'eigenmode frequency without damping effects'),
+    ('iflr', float, 1, '%f',
+     'thermal ions larmor radius normalized to the minor radius'),
+    ('r_epflr', float, 1, '%f',
+     'energetic particle larmor radius normalized to the minor radius'),
+    ('r_epflralp', float, 1, '%f',
+     '2nd species energetic particle larmor radius normalized to the minor'
+     ' radius'),
+    '!!!!!!!!!!!!!!!!!!!!!!!!!!!!! OUTPUT !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!',
+    ('lplots', int, 1, '%i',
+     'number of eigenfunction modes in the output files'),
+    ('nprint', int, 1, '%i',
+     'number of step for an output in farprt file'),
+    ('ndump', int, 1, '%i',
+     'number of step for an output'),
+    '!!!!!!!!!!!!!!!!!!!!!!!!!!!!! OTHER PARAMETERS !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!',
+    ('DIIID_u', int, 1, '%i',
+     'turn on to use the same units than TRANSP output in the external '
+     'profiles (cm not m)'),
+    '!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!',
+    '================================/ SELF PROFILES PARAMETERS \\============================',
+    ('EP_dens_on', int, 1, '%i',
+     'user defined fast particle density profile (if 1)'),
+    ('Adens', int, 1, '%i',
+     'fast particle density profile flatness'),
+    ('Bdens', float, 1, '%f',
+     'location of the fast particle density profile gradient'),
+    ('Alpha_dens_on', int, 1, '%i',
+     'user defined 2nd species fast particle density profile (if 1)'),
+    ('Adensalp', int, 1, '%i',
+     '2nd species fast particle density profile flatness'),
+    ('Bdensalp', float, 1, '%f',
+     'location of the 2nd species fast particle density profile gradient'),
+    ('EP_vel_on', int, 1, '%i',
+     'user defined fast particle vth/vA0 profile (if 1)'),
+    ('Alpha_vel_on', int, 1, '%i',
+     'user defined 2nd species fast particle vth/vA0 profile (if 1)'),
+    ('q_prof_on', int, 1, '%i',
+     'the safety factor profile of the external profile is used (is 1)'),
+    ('Eq_vel_on', int, 1, '%i',
+     'the safety factor profile of the external profile is used (is 1)'),
+    ('Eq_velp_on', int, 1, '%i',
+     'the safety factor profile of the external profile is used (is 1)'),
+    ('Eq_Presseq_on', int, 1, '%i',
+     'the safety factor profile of the external profile is used (is 1)'),
+    ('Eq_Presstot_on', int, 1, '%i',
+     'the equilibrium + fast particle pressure profiles of the external '
+     'profile is used (is 1)'),
+    ('deltaq', int, 1, '%i',
+     'safety factor displacement (only tokamak eq.)'),
+    ('deltaiota', int, 1, '%i',
+     'iota displacement (only stellarator eq.)'),
+    ('etascl', int, 1, '%i',
+     'user defined constant resistivity (if ietaeq=2)'),
+    ('eta0', int, 1, '%i',
+     'user defined resistivity profile (if ietaeq=3)'),
+    ('reta', float, 1, '%f',
+     'user defined resistivity profile (if ietaeq=3)'),
+    ('etalmb', float, 1, '%f',
+     'user defined resistivity profile (if ietaeq=3)'),
+    ('cnep', float, 11, None,
+     'user defined thermal plasma density profile'),
+    ('ctep', float, 11, None,
+     'user defined thermal electron plasma temperature profile'),
+    ('cnfp', float, 11, None,
+     'user defined energetic particles density profile'),
+    ('cvep', float, 11, None,
+     'user defined thermal ions parallel velocity profile (only for '
+     'thermal ion FLR effects)'),
+    ('cvfp', float, 11, None,
+     'user defined energetic particles parallel velocity profile'),
+    ('cnfpalp', float, 11, None,
+     'user defined 2nd species energetic particles density profile'),
+    ('cvfpalp', float, 11, None,
+     'user defined 2nd species energetic particles parallel velocity '
+     'profile'),
+    ('eqvt', float, 11, None,
+     'user defined equilibrium thermal toroidal velocity profile'),
+    ('eqvp', float, 11, None,
+     'user defined equilibrium thermal poloidal velocity profile'),
+    '!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!',
+)
+
+# Namelists already read, by (path, header): (mtime, size, namelist)
+_namelistCache = {}
+
 
+def _readingPlan():
+    """
+    Translate namelistSchema into the steps to read the file
 
-def readNamelist(file, header: int = 0):
+    :return plan: list with the number of lines to skip before each field,
+        together with its name, type, count and whether it is an array
+    :return arrays: names of the array fields
+    """
+    plan = []
+    skip = 1
+    for entry in namelistSchema:
+        if isinstance(entry, str):
+            skip += 1
+            continue
+        name, dtype, count, fmt, description = entry
+        plan.append((skip, name, dtype, count, fmt is None))
+        skip = 1
+    return plan, [p[1] for p in plan if p[4]]
+
+
+_readPlan, _arrayFields = _readingPlan()
+# Position of each field in _readPlan
+_planIndex = {p[1]: i for i, p in enumerate(_readPlan)}
+# Line of the value of each field, relative to the end of the header, when
+# all the arrays are in a single line (as written by writeNamelist). In other
+# files the arrays can take more lines, so they are only valid up to the first
+# array
+_valueLine = [int(i) for i in np.cumsum([p[0] for p in _readPlan]) +
+              np.arange(len(_readPlan))]
+_firstArray = _planIndex[_arrayFields[0]]
+
+
+# ------------------------------------------------------------------------------
+# --- Reading
+# ------------------------------------------------------------------------------
+def _copyNamelist(namelist: dict, arrays: list = _arrayFields):
+    """
+    Copy a namelist, including its arrays
+
+    :param namelist: dictionary with the namelist parameters
+    :param arrays: name of the array fields of the namelist
+    """
+    out = namelist.copy()
+    for name in arrays:
+        out[name] = out[name].copy()
+    return out
+
+
+def _parseNamelist(fid, header: int = 0, last: str = None):
+    """
+    Parse the namelist from an open file, following namelistSchema
+
+    The file is left just after the last field
+
+    :param fid: open file (or io.StringIO with its content)
+    :param header: number of header lines to skip
+    :param last: if given, the parsing stops after this field
+
+    :return out: dictionary containing all the namelist parameters
+    """
+    readline = fid.readline
+    for i in range(header):
+        readline()
+    out = {}
+    for skip, name, dtype, count, isArray in _readPlan:
+        # Section headers and comment line
+        for i in range(skip):
+            readline()
+        if isArray:
+            if isinstance(count, str):
+                count = out[count]
+            out[name] = faraux.give_me_n_numbers(fid, count, dtype=dtype)
+        else:
+            out[name] = _parseValue(readline(), dtype)
+        if name == last:
+            break
+    return out
+
+
+def _parseValue(line: str, dtype):
+    """
+    Parse the value of a scalar field
+
+    :param line: line of the file with the value
+    :param dtype: type of the field
+    """
+    if dtype is str:
+        # Don't go to integer because 0 matters
+        return line.strip()
+    elif dtype is bool:
+        return faraux.parse_bool(line.strip())
+    else:
+        return dtype(line)
+
+
+def readNamelist(file, header: int = 0, cache: bool = True):
     """
     Read the namelist
 
-    :param file: name of the file to be read
+    The file is read at once and parsed in memory. The namelists read from a
+    path are kept in memory, and returned again (without reading the file)
+    while its size and modification time do not change
+
+    :param file: name of the file to be read, or an open file. In this case,
+        the file is left open just after the namelist, so the rest of it can
+        be read without opening it again
     :param header: number of header lines to skip, (for the farprt file)
+    :param cache: if True, use the namelists already read
 
     :return out: dictionary containing all the namelist parameters
     """
-    # Preallocate the dictionary:
-    out = {
-        'nstres': None,
-        'numrun': None,
-        'numruno': None,
-        'numvac': None,
-        'nonlin': None,
-        'ngeneq': None,
-        'eq_name': None,
-        'maxstp': None,
-        'dt0': None,
-        'ldim': None,
-        'leqdim': None,
-        'jdim': None,
-        'ext_prof': None,
-        'ext_prof_name': None,
-        'ext_prof_len': None,
-        'iflr_on': None,
-        'epflr_on': None,
-        'ieldamp_on': None,
-        'twofl_on': None,
-        'alpha_on': None,
-        'Trapped_on': None,
-        'matrix_out': None,
-        'm0dy': None,
-        'mm': None,
-        'nn': None,
-        'mmeq': None,
-        'nneq': None,
-        'ipert': None,
-        'widthi': None,
-        'Auto_grid_on': None,
-        'ni': None,
-        'nis': None,
-        'ne': None,
-        'delta': None,
-        'rc': None,
-        'Edge_on': None,
-        'edge_p': None,
-        'gamma': None,
-        's': None,
-        'betath_factor': None,
-        'ietaeq': None,
-        'spe1': None,
-        'bet0_f': None,
-        'spe2': None,
-        'bet0_falp': None,
-        'omcy': None,
-        'omcyb': None,
-        'rbound': None,
-        'omcyalp': None,
-        'itime': None,
-        'dpres': None,
-        'stdifp': None,
-        'stdifu': None,
-        'stdifv': None,
-        'stdifnf': None,
-        'stdifvf': None,
-        'stdifnfalp': None,
-        'stdifvfalp': None,
-        'LcA0': None,
-        'LcA1': None,
-        'LcA2': None,
-        'LcA3': None,
-        'LcA0alp': None,
-        'LcA1alp': None,
-        'LcA2alp': None,
-        'LcA3alp': None,
-        'omegar': None,
-        'iflr': None,
-        'r_epflr': None,
-        'r_epflralp': None,
-        'lplots': None,
-        'nprint': None,
-        'ndump': None,
-        'DIIID_u': None,
-        'EP_dens_on': None,
-        'Adens': None,
-        'Bdens': None,
-        'Alpha_dens_on': None,
-        'Adensalp': None,
-        'Bdensalp': None,
-        'EP_vel_on': None,
-        'Alpha_vel_on': None,
-        'q_prof_on': None,
-        'Eq_vel_on': None,
-        'Eq_velp_on': None,
-        'Eq_Presseq_on': None,
-        'Eq_Presstot_on': None,
-        'deltaq': None,
-        'deltaiota': None,
-        'etascl': None,
-        'eta0': None,
-        'reta': None,
-        'etalmb': None,
-        'cnep': None,
-        'ctep': None,
-        'cnfp': None,
-        'cvep': None,
-        'cvfp': None,
-        'cnfpalp': None,
-        'cvfpalp': None,
-        'eqvt': None,
-        'eqvp': None
-    }
+    if not isinstance(file, (str, os.PathLike)):
+        return _parseNamelist(file, header)
+    key = (os.path.abspath(file), header)
+    stat = os.stat(file)
+    if cache and key in _namelistCache:
+        mtime, size, namelist = _namelistCache[key]
+        if mtime == stat.st_mtime_ns and size == stat.st_size:
+            return _copyNamelist(namelist)
     with open(file, 'r') as fid:
-        for i in range(header):
-            fid.readline()
-        fid.readline()
-        fid.readline()
-        out['nstres'] = int(fid.readline())
-        fid.readline()
-        # Don't go to integer because 0 matters
-        out['numrun'] = fid.readline().split('\n')[0].strip()
-        fid.readline()
-        out['numruno'] = fid.readline().split('\n')[0].strip()
-        fid.readline()
-        out['numvac'] = int(fid.readline())
-        fid.readline()
-        out['nonlin'] = int(fid.readline())
-        fid.readline()
-        out['ngeneq'] = int(fid.readline())
-        fid.readline()
-        out['eq_name'] = fid.readline().split('\n')[0].strip()
-        fid.readline()
-        out['maxstp'] = int(fid.readline())
-        fid.readline()
-        out['dt0'] = float(fid.readline())  # @Todo, float or int?
-        fid.readline()
-        out['ldim'] = int(fid.readline())
-        fid.readline()
-        out['leqdim'] = int(fid.readline())
-        fid.readline()
-        out['jdim'] = int(fid.readline())
-        fid.readline()
-        out['ext_prof'] = int(fid.readline())
-        fid.readline()
-        out['ext_prof_name'] = fid.readline().split('\n')[0].strip()
-        fid.readline()
-        out['ext_prof_len'] = int(fid.readline())
-        fid.readline()
-        out['iflr_on'] = int(fid.readline())
-        fid.readline()
-        out['epflr_on'] = int(fid.readline())
-        fid.readline()
-        out['ieldamp_on'] = int(fid.readline())
-        fid.readline()
-        out['twofl_on'] = int(fid.readline())
-        fid.readline()
-        out['alpha_on'] = int(fid.readline())
-        fid.readline()
-        out['Trapped_on'] = int(fid.readline())
-        fid.readline()
-        out['matrix_out'] = faraux.parse_bool(fid.readline())
-        fid.readline()
-        out['m0dy'] = int(fid.readline())
-        fid.readline()
-        fid.readline()
-        fid.readline()
-        fid.readline()
-        out['mm'] = faraux.give_me_n_numbers(fid, out['ldim'], dtype=int)
-        fid.readline()
-        out['nn'] = faraux.give_me_n_numbers(fid, out['ldim'], dtype=int)
-        fid.readline()
-        out['mmeq'] = faraux.give_me_n_numbers(fid, out['leqdim'], dtype=int)
-        fid.readline()
-        out['nneq'] = faraux.give_me_n_numbers(fid, out['leqdim'], dtype=int)
-        fid.readline()
-        fid.readline()
-        out['ipert'] = int(fid.readline())
-        fid.readline()
-        out['widthi'] = float(fid.readline())
-        fid.readline()
-        out['Auto_grid_on'] = int(fid.readline())
-        fid.readline()
-        out['ni'] = int(fid.readline())
-        fid.readline()
-        out['nis'] = int(fid.readline())
-        fid.readline()
-        out['ne'] = int(fid.readline())
-        fid.readline()
-        out['delta'] = float(fid.readline())
-        fid.readline()
-        out['rc'] = float(fid.readline())
-        fid.readline()
-        out['Edge_on'] = int(fid.readline())
-        fid.readline()
-        out['edge_p'] = int(fid.readline())
-        fid.readline()
-        fid.readline()
-        out['gamma'] = int(fid.readline())
-        fid.readline()
-        out['s'] = float(fid.readline())
-        fid.readline()
-        out['betath_factor'] = int(fid.readline())
-        fid.readline()
-        out['ietaeq'] = int(fid.readline())
-        fid.readline()
-        out['spe1'] = int(fid.readline())
-        fid.readline()
-        out['bet0_f'] = float(fid.readline())
-        fid.readline()
-        out['spe2'] = int(fid.readline())
-        fid.readline()
-        out['bet0_falp'] = float(fid.readline())
-        fid.readline()
-        out['omcy'] = float(fid.readline())
-        fid.readline()
-        out['omcyb'] = float(fid.readline())
-        fid.readline()
-        out['rbound'] = float(fid.readline())
-        fid.readline()
-        out['omcyalp'] = float(fid.readline())
-        fid.readline()
-        out['itime'] = int(fid.readline())
-        fid.readline()
-        out['dpres'] = float(fid.readline())
-        #  ---------------------------   Diffusivity block
-        fid.readline()
-        fid.readline()
-        out['stdifp'] = int(fid.readline())
-        fid.readline()
-        out['stdifu'] = int(fid.readline())
-        fid.readline()
-        out['stdifv'] = int(fid.readline())
-        fid.readline()
-        out['stdifnf'] = int(fid.readline())
-        fid.readline()
-        out['stdifvf'] = int(fid.readline())
-        fid.readline()
-        out['stdifnfalp'] = int(fid.readline())
-        fid.readline()
-        out['stdifvfalp'] = int(fid.readline())
-        #  ---------------------------   Landau block
-        fid.readline()
-        fid.readline()
-        out['LcA0'] = float(fid.readline())
-        fid.readline()
-        out['LcA1'] = float(fid.readline())
-        fid.readline()
-        out['LcA2'] = float(fid.readline())
-        fid.readline()
-        out['LcA3'] = float(fid.readline())
-        fid.readline()
-        out['LcA0alp'] = float(fid.readline())
-        fid.readline()
-        out['LcA1alp'] = float(fid.readline())
-        fid.readline()
-        out['LcA2alp'] = float(fid.readline())
-        fid.readline()
-        out['LcA3alp'] = float(fid.readline())
-        #  ---------------------------   Damping block
-        fid.readline()
-        fid.readline()
-        out['omegar'] = float(fid.readline())
-        fid.readline()
-        out['iflr'] = float(fid.readline())
-        fid.readline()
-        out['r_epflr'] = float(fid.readline())
-        fid.readline()
-        out['r_epflralp'] = float(fid.readline())
-        fid.readline()
-        fid.readline()
-        out['lplots'] = int(fid.readline())
-        fid.readline()
-        out['nprint'] = int(fid.readline())
-        fid.readline()
-        out['ndump'] = int(fid.readline())
-        fid.readline()
-        fid.readline()
-        out['DIIID_u'] = int(fid.readline())
-        fid.readline()
-        fid.readline()
-        fid.readline()
-        out['EP_dens_on'] = int(fid.readline())
-        fid.readline()
-        out['Adens'] = int(fid.readline())
-        fid.readline()
-        out['Bdens'] = float(fid.readline())
-        fid.readline()
-        out['Alpha_dens_on'] = int(fid.readline())
-        fid.readline()
-        out['Adensalp'] = int(fid.readline())
-        fid.readline()
-        out['Bdensalp'] = float(fid.readline())
-        fid.readline()
-        out['EP_vel_on'] = int(fid.readline())
-        fid.readline()
-        out['Alpha_vel_on'] = int(fid.readline())
-        fid.readline()
-        out['q_prof_on'] = int(fid.readline())
-        fid.readline()
-        out['Eq_vel_on'] = int(fid.readline())
-        fid.readline()
-        out['Eq_velp_on'] = int(fid.readline())
-        fid.readline()
-        out['Eq_Presseq_on'] = int(fid.readline())
-        fid.readline()
-        out['Eq_Presstot_on'] = int(fid.readline())
-        fid.readline()
-        out['deltaq'] = int(fid.readline())
-        fid.readline()
-        out['deltaiota'] = int(fid.readline())
-        fid.readline()
-        out['etascl'] = int(fid.readline())
-        fid.readline()
-        out['eta0'] = int(fid.readline())
-        fid.readline()
-        out['reta'] = float(fid.readline())
-        fid.readline()
-        out['etalmb'] = float(fid.readline())
-        fid.readline()
-        out['cnep'] = faraux.give_me_n_numbers(fid, 11, float)
-        fid.readline()
-        out['ctep'] = faraux.give_me_n_numbers(fid, 11, float)
-        fid.readline()
-        out['cnfp'] = faraux.give_me_n_numbers(fid, 11, float)
-        fid.readline()
-        out['cvep'] = faraux.give_me_n_numbers(fid, 11, float)
-        fid.readline()
-        out['cvfp'] = faraux.give_me_n_numbers(fid, 11, float)
-        fid.readline()
-        out['cnfpalp'] = faraux.give_me_n_numbers(fid, 11, float)
-        fid.readline()
-        out['cvfpalp'] = faraux.give_me_n_numbers(fid, 11, float)
-        fid.readline()
-        out['eqvt'] = faraux.give_me_n_numbers(fid, 11, float)
-        fid.readline()
-        out['eqvp'] = faraux.give_me_n_numbers(fid, 11, float)
-    return out
+        text = fid.read()
+    namelist = _parseNamelist(io.StringIO(text), header)
+    if cache:
+        _namelistCache[key] = (stat.st_mtime_ns, stat.st_size, namelist)
+        namelist = _copyNamelist(namelist)
+    return namelist
+
 
+def peekNamelist(file, keys, header: int = 0):
+    """
+    Read only some fields of the namelist
+
+    The file is read only up to the last requested field. Up to the first
+    array (mm), the position of the fields in the file is fixed, so only the
+    lines of the requested fields are parsed. If the whole namelist was
+    already read by readNamelist (and the file did not change), the values
+    are taken from memory
+
+    :param file: name of the file to be read
+    :param keys: name of the field, or list of names
+    :param header: number of header lines to skip, (for the farprt file)
+
+    :return out: dictionary with the requested fields
+    """
+    if isinstance(keys, str):
+        keys = [keys]
+    unknown = [k for k in keys if k not in _planIndex]
+    if len(unknown) > 0:
+        raise Exception('Unknown namelist fields: %s' % ', '.join(unknown))
+    key = (os.path.abspath(file), header)
+    if key in _namelistCache:
+        stat = os.stat(file)
+        mtime, size, namelist = _namelistCache[key]
+        if mtime == stat.st_mtime_ns and size == stat.st_size:
+            return _copyNamelist({k: namelist[k] for k in keys},
+                                 [k for k in keys if k in _arrayFields])
+    last = max([_planIndex[k] for k in keys])
+    with open(file, 'r') as fid:
+        if last < _firstArray:
+            lines = list(islice(fid, header + _valueLine[last] + 1))
+            return {k: _parseValue(lines[header + _valueLine[_planIndex[k]]],
+                                   _readPlan[_planIndex[k]][2])
+                    for k in keys}
+        namelist = _parseNamelist(fid, header, _readPlan[last][1])
+    return {k: namelist[k] for k in keys}
 
 
+# ------------------------------------------------------------------------------
+# --- Writing
+# ------------------------------------------------------------------------------
 def writeNamelist(filename, namelist, overwrite: bool = True):
     """
     Write the namelist
@@ -364,266 +438,48 @@ def writeNamelist(filename, namelist, overwrite: bool = True):
     if os.path.isfile(filename) and not overwrite:
         raise Exception('Namelist file exist')
     with open(filename, 'w') as fid:
-        fid.writelines('------MAIN INPUT VALIABLES. Created with FARpy------\n')
-        fid.writelines('!!!!!!!!!!! nstres: if 0 new run, if 1 the run is a continuation\n')
-        fid.writelines('%i \n' % namelist['nstres'])
-        fid.writelines('!!!!!!!!!!! numrun: run number\n')
-        fid.writelines('%s \n' % namelist['numrun'])
-        fid.writelines('!!!!!!!!!!! numruno: name of the previous run output\n')
-        fid.writelines('%s \n' % namelist['numruno'])
-        fid.writelines('!!!!!!!!!!! numvac: run number index\n')
-        fid.writelines('%i \n' % namelist['numvac'])
-        fid.writelines('!!!!!!!!!!! nonlin: linear run if 0, non linear run if 1 (no available yet)\n')
-        fid.writelines('%i \n' % namelist['nonlin'])
-        fid.writelines('!!!!!!!!!!! ngeneq: equilibrium input (only VMEC available now)\n')
-        fid.writelines('%i \n' % namelist['ngeneq'])
-        fid.writelines('!!!!!!!!!!! eq_name: equilibrium name\n')
-        fid.writelines('%s \n' % namelist['eq_name'])
-        fid.writelines('!!!!!!!!!!! maxstp: simulation time steps\n')
-        fid.writelines('%i \n' % namelist['maxstp'])
-        fid.writelines('!!!!!!!!!!! dt0: simulation time step\n')
-        fid.writelines('%i \n' % namelist['dt0'])
-        fid.writelines('!!!!!!!!!!! ldim: total number of poloidal modes (equilibrium + dynamic)\n')
-        fid.writelines('%i \n' % namelist['ldim'])
-        fid.writelines('!!!!!!!!!!! leqdim: equilibrium poloidal modes\n')
-        fid.writelines('%i \n' % namelist['leqdim'])
-        fid.writelines('!!!!!!!!!!! jdim: number of radial points\n')
-        fid.writelines('%i \n' % namelist['jdim'])
-        fid.writelines('!!!!!!!!!!! ext_prof: include external profiles if 1\n')
-        fid.writelines('%i \n' % namelist['ext_prof'])
-        fid.writelines('!!!!!!!!!!! ext_prof_name: external profile file name\n')
-        fid.writelines('%s \n' % namelist['ext_prof_name'])
-        fid.writelines('!!!!!!!!!!! ext_prof_len: number of lines in the external profile\n')
-        fid.writelines('%i \n' % namelist['ext_prof_len'])
-        fid.writelines('!!!!!!!!!!! iflr_on: activate thermal ion FLR damping effects if 1\n')
-        fid.writelines('%i \n' % namelist['iflr_on'])
-        fid.writelines('!!!!!!!!!!! epflr_on: activate fast particle FLR damping effects if 1\n')
-        fid.writelines('%i \n' % namelist['epflr_on'])
-        fid.writelines('!!!!!!!!!!! ieldamp_on: activate electron-ion Landau damping effect if 1\n')
-        fid.writelines('%i \n' % namelist['ieldamp_on'])
-        fid.writelines('!!!!!!!!!!! twofl_on: activate two fluid effects if 1\n')
-        fid.writelines('%i \n' % namelist['twofl_on'])
-        fid.writelines('!!!!!!!!!!! alpha_on: activate a 2nd fast particle species if 1\n')
-        fid.writelines('%i \n' % namelist['alpha_on'])
-        fid.writelines('!!!!!!!!!!! Trapped_on: activate correction for trapped 1st fast particle species if 1\n')
-        fid.writelines('%i \n' % namelist['Trapped_on'])
-        fid.writelines('!!!!!!!!!!! matrix_out: activate eigensolver output\n')
-        fid.writelines('%s \n' % faraux.parse_bool_Python_to_Fortran(namelist['matrix_out']))
-        fid.writelines('!!!!!!!!!!! m0dy: equilibrium modes as dynamic\n')
-        fid.writelines('%i \n' % namelist['m0dy'])
-        fid.writelines('!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n')
-        fid.writelines('==================================/ MODEL PARAMETERS \===================================\n')
-        fid.writelines('!!!!!!!!!!!!!!!!!!!!!!!!!!!!! MODES INCLUDED IN THE MODEL !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n')
-        fid.writelines('!!!!!!!!!!! mm: poloidal dynamic and equilibrium modes\n')
-        s = ''
-        for n in namelist['mm']:
-            s += str(n) + ','
-        fid.writelines('%s \n' % s)
-        fid.writelines('!!!!!!!!!!! nn: toroidal dynamic and equilibrium modes\n')
-        s = ''
-        for n in namelist['nn']:
-            s += str(n) + ','
-        fid.writelines('%s \n' % s)
-        fid.writelines('!!!!!!!!!!! mmeq: poloidal equilibrium modes\n')
-        s = ''
-        for n in namelist['mmeq']:
-            s += str(n) + ','
-        fid.writelines('%s \n' % s)
-        fid.writelines('!!!!!!!!!!! nneq: toroidal equilibrium modes\n')
-        s = ''
-        for n in namelist['nneq']:
-            s += str(n) + ','
-        fid.writelines('%s \n' % s)
-        fid.writelines('!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!! PERTURBATION !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n')
-        fid.writelines('!!!!!!!!!!! ipert: different options to drive a perturbation in the equilibria\n')
-        fid.writelines('%i \n' % namelist['ipert'])
-        fid.writelines('!!!!!!!!!!! widthi: size of the perturbation\n')
-        fid.writelines('%e \n' % namelist['widthi'])
-        fid.writelines('!!!!!!!!!!! Auto_grid_on: auto grid spacing option\n')
-        fid.writelines('%i \n' % namelist['Auto_grid_on'])
-        fid.writelines('!!!!!!!!!!! ni: number of points interior to the island\n')
-        fid.writelines('%i \n' % namelist['ni'])
-        fid.writelines('!!!!!!!!!!! nis: number of points in the island\n')
-        fid.writelines('%i \n' % namelist['nis'])
-        fid.writelines('!!!!!!!!!!! ne: number of points exterior to the island\n')
-        fid.writelines('%i \n' % namelist['ne'])
-        fid.writelines('!!!!!!!!!!! delta: normalized width of the uniform fine grid (island)\n')
-        fid.writelines('%f \n' % namelist['delta'])
-        fid.writelines('!!!!!!!!!!! rc: center of the fine grid (island) along the normalized minor radius\n')
-        fid.writelines('%f \n' % namelist['rc'])
-        fid.writelines('!!!!!!!!!!! Edge_on: activates the VMEC data extrapolation\n')
-        fid.writelines('%i \n' % namelist['Edge_on'])
-        fid.writelines('!!!!!!!!!!! edge_p: grid point from where the VMEC data is extrapolated\n')
-        fid.writelines('%i \n' % namelist['edge_p'])
-        fid.writelines('!!!!!!!!!!!!!!!!!!!!!!!!!!!!! PLASMA PARAMETERS !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n')
-        fid.writelines('!!!!!!!!!!! gamma: adiabatic index\n')
-        fid.writelines('%i \n' % namelist['gamma'])
-        fid.writelines('!!!!!!!!!!! s: magnetic Lundquist number\n')
-        fid.writelines('%e \n' % namelist['s'])
-        fid.writelines('!!!!!!!!!!! betath_factor: thermal beta factor\n')
-        fid.writelines('%i \n' % namelist['betath_factor'])
-        fid.writelines('!!!!!!!!!!! ietaeq: resistivity profile type (if 1 the electron temperature is used)\n')
-        fid.writelines('%i \n' % namelist['ietaeq'])
-        fid.writelines('!!!!!!!!!!! spe1: species first EP population\n')
-        fid.writelines('%i \n' % namelist['spe1'])
-        fid.writelines('!!!!!!!!!!! bet0_f: fast particle beta\n')
-        fid.writelines('%f \n' % namelist['bet0_f'])
-        fid.writelines('!!!!!!!!!!! spe2: species second EP population\n')
-        fid.writelines('%i \n' % namelist['spe2'])
-        fid.writelines('!!!!!!!!!!! bet0_falp: 2nd species fast particle beta\n')
-        fid.writelines('%i \n' % namelist['bet0_falp'])
-        fid.writelines('!!!!!!!!!!! omcy: normalized fast particle cyclotron frequency\n')
-        fid.writelines('%f \n' % namelist['omcy'])
-        fid.writelines('!!!!!!!!!!! omcyb: normalized fast particle cyclotron frequency\n')
-        fid.writelines('%f \n' % namelist['omcyb'])
-        fid.writelines('!!!!!!!!!!! rbound: normalized helicaly trapped bound length\n')
-        fid.writelines('%f \n' % namelist['rbound'])
-        fid.writelines('!!!!!!!!!!! omcyalp: normalized 2nd species fast particle cyclotron frequency\n')
-        fid.writelines('%f \n' % namelist['omcyalp'])
-        fid.writelines('!!!!!!!!!!! itime: time normalization option\n')
-        fid.writelines('%i \n' % namelist['itime'])
-        fid.writelines('!!!!!!!!!!! dpres: electron pressure normalized to the total pressure (two fluid effects)\n')
-        fid.writelines('%f \n' % namelist['dpres'])
-        fid.writelines('!!!!!!!!!!!!!!!!!!!!!!!!!!!!! DIFFUSIVITIES !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n')
-        fid.writelines('!!!!!!!!!!! stdifp: thermal pressure eq. diffusivity\n')
-        fid.writelines('%i \n' % namelist['stdifp'])
-        fid.writelines('!!!!!!!!!!! stdifu: vorticity eq. diffusivity\n')
-        fid.writelines('%i \n' % namelist['stdifu'])
-        fid.writelines('!!!!!!!!!!! stdifv: thermal particle parallel velocity eq. diffusivity\n')
-        fid.writelines('%i \n' % namelist['stdifv'])
-        fid.writelines('!!!!!!!!!!! stdifnf: fast particle density eq. diffusivity\n')
-        fid.writelines('%i \n' % namelist['stdifnf'])
-        fid.writelines('!!!!!!!!!!! stdifvf: fast particle parallel velocity eq. diffusivity\n')
-        fid.writelines('%i \n' % namelist['stdifvf'])
-        fid.writelines('!!!!!!!!!!! stdifnfalp: fast particle parallel velocity eq. diffusivity\n')
-        fid.writelines('%i \n' % namelist['stdifnfalp'])
-        fid.writelines('!!!!!!!!!!! stdifvfalp: fast particle parallel velocity eq. diffusivity\n')
-        fid.writelines('%i \n' % namelist['stdifvfalp'])
-        fid.writelines('!!!!!!!!!!!!!!!!!!!!!!!!!!!!! LANDAU CLOSURE !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n')
-        fid.writelines('!!!!!!!!!!! LcA0: Landau closure 1\n')
-        fid.writelines('%f \n' % namelist['LcA0'])
-        fid.writelines('!!!!!!!!!!! LcA1: Landau closure 2\n')
-        fid.writelines('%f \n' % namelist['LcA1'])
-        fid.writelines('!!!!!!!!!!! LcA2: correction to the fast particle beta\n')
-        fid.writelines('%f \n' % namelist['LcA2'])
-        fid.writelines('!!!!!!!!!!! LcA3: correction to the ratio between fast particle thermal velocity and Alfven velocity\n')
-        fid.writelines('%f \n' % namelist['LcA3'])
-        fid.writelines('!!!!!!!!!!! LcA0alp: Landau closure 1 2nd species\n')
-        fid.writelines('%f \n' % namelist['LcA0alp'])
-        fid.writelines('!!!!!!!!!!! LcA1alp: Landau closure 2 2nd species\n')
-        fid.writelines('%f \n' % namelist['LcA1alp'])
-        fid.writelines('!!!!!!!!!!! LcA2alp: correction to the 2nd species fast particle beta\n')
-        fid.writelines('%f \n' % namelist['LcA2alp'])
-        fid.writelines('!!!!!!!!!!! LcA3alp: correction to the ratio between fast particle thermal velocity and Alfven velocity 2nd species\n')
-        fid.writelines('%f \n' % namelist['LcA3alp'])
-        fid.writelines('!!!!!!!!!!!!!!!!!!!!!!!!!!!!! DAMPINGS !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n')
-        fid.writelines('!!!!!!!!!!! omegar: eigenmode frequency without damping effects\n')
-        fid.writelines('%f \n' % namelist['omegar'])
-        fid.writelines('!!!!!!!!!!! iflr: thermal ions larmor radius normalized to the minor radius\n')
-        fid.writelines('%f \n' % namelist['iflr'])
-        fid.writelines('!!!!!!!!!!! r_epflr: energetic particle larmor radius normalized to the minor radius\n')
-        fid.writelines('%f \n' % namelist['r_epflr'])
-        fid.writelines('!!!!!!!!!!! r_epflralp: 2nd species energetic particle larmor radius normalized to the minor radius\n')
-        fid.writelines('%f \n' % namelist['r_epflralp'])
-        fid.writelines('!!!!!!!!!!!!!!!!!!!!!!!!!!!!! OUTPUT !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n')
-        fid.writelines('!!!!!!!!!!! lplots: number of eigenfunction modes in the output files\n')
-        fid.writelines('%i \n' % namelist['lplots'])
-        fid.writelines('!!!!!!!!!!! nprint: number of step for an output in farprt file\n')
-        fid.writelines('%i \n' % namelist['nprint'])
-        fid.writelines('!!!!!!!!!!! ndump: number of step for an output\n')
-        fid.writelines('%i \n' % namelist['ndump'])
-        fid.writelines('!!!!!!!!!!!!!!!!!!!!!!!!!!!!! OTHER PARAMETERS !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n')
-        fid.writelines('!!!!!!!!!!! DIIID_u: turn on to use the same units than TRANSP output in the external profiles (cm not m)\n')
-        fid.writelines('%i \n' % namelist['DIIID_u'])
-        fid.writelines('!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!\n')
-        fid.writelines('================================/ SELF PROFILES PARAMETERS \============================\n')
-        fid.writelines('!!!!!!!!!!! EP_dens_on: user defined fast particle density profile (if 1)\n')
-        fid.writelines('%i \n' % namelist['EP_dens_on'])
-        fid.writelines('!!!!!!!!!!! Adens: fast particle density profile flatness\n')
-        fid.writelines('%i \n' % namelist['Adens'])
-        fid.writelines('!!!!!!!!!!! Bdens: location of the fast particle density profile gradient\n')
-        fid.writelines('%f \n' % namelist['Bdens'])
-        fid.writelines('!!!!!!!!!!! Alpha_dens_on: user defined 2nd species fast particle density profile (if 1)\n')
-        fid.writelines('%i \n' % namelist['Alpha_dens_on'])
-        fid.writelines('!!!!!!!!!!! Adensalp: 2nd species fast particle density profile flatness\n')
-        fid.writelines('%i \n' % namelist['Adensalp'])
-        fid.writelines('!!!!!!!!!!! Bdensalp: location of the 2nd species fast particle density profile gradient\n')
-        fid.writelines('%f \n' % namelist['Bdensalp'])
-        fid.writelines('!!!!!!!!!!! EP_vel_on: user defined fast particle vth/vA0 profile (if 1)\n')
-        fid.writelines('%i \n' % namelist['EP_vel_on'])
-        fid.writelines('!!!!!!!!!!! Alpha_vel_on: user defined 2nd species fast particle vth/vA0 profile (if 1)\n')
-        fid.writelines('%i \n' % namelist['Alpha_vel_on'])
-        fid.writelines('!!!!!!!!!!! q_prof_on: the safety factor profile of the external profile is used (is 1)\n')
-        fid.writelines('%i \n' % namelist['q_prof_on'])
-        fid.writelines('!!!!!!!!!!! Eq_vel_on: the safety factor profile of the external profile is used (is 1)\n')
-        fid.writelines('%i \n' % namelist['Eq_vel_on'])
-        fid.writelines('!!!!!!!!!!! Eq_velp_on: the safety factor profile of the external profile is used (is 1)\n')
-        fid.writelines('%i \n' % namelist['Eq_velp_on'])
-        fid.writelines('!!!!!!!!!!! Eq_Presseq_on: the safety factor profile of the external profile is used (is 1)\n')
-        fid.writelines('%i \n' % namelist['Eq_Presseq_on'])
-        fid.writelines('!!!!!!!!!!! Eq_Presstot_on: the equilibrium + fast particle pressure profiles of the external profile is used (is 1)\n')
-        fid.writelines('%i \n' % namelist['Eq_Presstot_on'])
-        fid.writelines('!!!!!!!!!!! deltaq: safety factor displacement (only tokamak eq.)\n')
-        fid.writelines('%i \n' % namelist['deltaq'])
-        fid.writelines('!!!!!!!!!!! deltaiota: iota displacement (only stellarator eq.)\n')
-        fid.writelines('%i \n' % namelist['deltaiota'])
-        fid.writelines('!!!!!!!!!!! etascl: user defined constant resistivity (if ietaeq=2)\n')
-        fid.writelines('%i \n' % namelist['etascl'])
-        fid.writelines('!!!!!!!!!!! eta0: user defined resistivity profile (if ietaeq=3)\n')
-        fid.writelines('%i \n' % namelist['eta0'])
-        fid.writelines('!!!!!!!!!!! reta: user defined resistivity profile (if ietaeq=3)\n')
-        fid.writelines('%f \n' % namelist['reta'])
-        fid.writelines('!!!!!!!!!!! etalmb: user defined resistivity profile (if ietaeq=3)\n')
-        fid.writelines('%f \n' % namelist['etalmb'])
-        fid.writelines('!!!!!!!!!!! cnep: user defined thermal plasma density profile\n')
-        s = ''
-        for n in namelist['cnep']:
-            s += str(n) + ','
-        fid.writelines('%s \n' % s)
-        fid.writelines('!!!!!!!!!!! ctep: user defined thermal electron plasma temperature profile\n')
-        s = ''
-        for n in namelist['ctep']:
-            s += str(n) + ','
-        fid.writelines('%s \n' % s)
-        fid.writelines('!!!!!!!!!!! cnfp: user defined energetic particles density profile\n')
-        s = ''
-        for n in namelist['cnfp']:
-            s += str(n) + ','
-        fid.writelines('%s \n' % s)
-        fid.writelines('!!!!!!!!!!! cvep: user defined thermal ions parallel velocity profile (only for thermal ion FLR effects)\n')
-        s = ''
-        for n in namelist['cvep']:
-            s += str(n) + ','
-        fid.writelines('%s \n' % s)
-        fid.writelines('!!!!!!!!!!! cvfp: user defined energetic particles parallel velocity profile\n')
-        s = ''
-        for n in namelist['cvfp']:
-            s += str(n) + ','
-        fid.writelines('%s \n' % s)
-        fid.writelines('!!!!!!!!!!! cnfpalp: user defined 2nd species energetic particles density profile\n')
-        s = ''
-        for n in namelist['cnfpalp']:
-            s += str(n) + ','
-        fid.writelines('%s \n' % s)
-        fid.writelines('!!!!!!!!!!! cvfpalp: user defined 2nd species energetic particles parallel velocity profile\n')
-        s = ''
-        for n in namelist['cvfpalp']:
-            s += str(n) + ','
-        fid.writelines('%s \n' % s)
-        fid.writelines('!!!!!!!!!!! eqvt: user defined equilibrium thermal toroidal velocity profile\n')
-        s = ''
-        for n in namelist['eqvt']:
-            s += str(n) + ','
-        fid.writelines('%s \n' % s)
-        fid.writelines('!!!!!!!!!!! eqvp: user defined equilibrium thermal poloidal velocity profile\n')
-        s = ''
-        for n in namelist['eqvp']:
-            s += str(n) + ','
-        fid.writelines('%s \n' % s)
-        fid.writelines('!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!')
+        fid.write('\n'.join(_namelistLines(namelist)))
     return
 
 
+def _formatValue(entry: tuple, value):
+    """
+    Format the value of a field, as written in the file
+
+    :param entry: field of namelistSchema
+    :param value: value of the field
+    """
+    name, dtype, count, fmt, description = entry
+    if fmt is None:
+        return ''.join([str(n) + ',' for n in value]) + ' '
+    elif dtype is bool:
+        return faraux.parse_bool_Python_to_Fortran(value) + ' '
+    else:
+        return fmt % value + ' '
+
+
+def _namelistLines(namelist: dict):
+    """
+    Get the lines of the namelist file
+
+    The value of each field is in the line _valueLine[_planIndex[name]], so
+    the lines can be used as a template to write namelists which differ in a
+    few fields
+
+    :param namelist: dictionary containing all namelist fields
+
+    :return: list with the lines (without the end of line)
+    """
+    lines = []
+    for entry in namelistSchema:
+        if isinstance(entry, str):
+            lines.append(entry)
+            continue
+        lines.append('!!!!!!!!!!! %s: %s' % (entry[0], entry[4]))
+        lines.append(_formatValue(entry, namelist[entry[0]]))
+    return lines
+
+
 def plotNamelistProfile(namelist, name, ax=None):
     """
     Plot a profile using the parameters in the namelist
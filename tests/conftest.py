@@ -0,0 +1,13 @@
+"""
+Common settings of the tests
+
+The tests write small synthetic FAR3D outputs in temporal folders, so they
+do not need any simulation. Run them from the main folder of the suite with
+python -m pytest tests
+"""
+import os
+import sys
+import matplotlib
+
+matplotlib.use('Agg')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,89 @@
+"""
+Tests of the binary cache of the parsed outputs
+"""
+import os
+import numpy as np
+import pytest
+import xarray as xr
+import farpy
+import farpy._cache as cache
+from test_modes import writeRuns, countReads
+
+
+def sourceFiles(folder):
+    """
+    Write two source files and get their paths
+    """
+    files = [os.path.join(folder, 'a.dat'), os.path.join(folder, 'b.dat')]
+    for file in files:
+        with open(file, 'w') as fid:
+            fid.write('1.0\n')
+    return files
+
+
+def dataset():
+    return xr.Dataset({'x': (('i', 'j'), np.arange(12.0).reshape(3, 4))})
+
+
+def test_cache_invalidation(tmp_path):
+    folder = str(tmp_path)
+    files = sourceFiles(folder)
+    assert cache.readCache(folder, 'x', files) is None
+    cache.writeCache(dataset(), folder, 'x', files)
+    xr.testing.assert_identical(cache.readCache(folder, 'x', files),
+                                dataset())
+    # A change of size or modification time of any source file
+    with open(files[1], 'a') as fid:
+        fid.write('2.0\n')
+    assert cache.readCache(folder, 'x', files) is None
+    cache.writeCache(dataset(), folder, 'x', files)
+    stat = os.stat(files[0])
+    os.utime(files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert cache.readCache(folder, 'x', files) is None
+    # A different set of source files
+    cache.writeCache(dataset(), folder, 'x', files)
+    assert cache.readCache(folder, 'x', files[:1]) is None
+    # A corrupted file is ignored
+    with open(cache._cacheFile(folder, 'x'), 'w') as fid:
+        fid.write('garbage')
+    assert cache.readCache(folder, 'x', files) is None
+    cache.clearCache(folder)
+    assert not os.path.isdir(os.path.join(folder, cache.cacheFolderName))
+
+
+@pytest.mark.skipif(not cache._compression, reason='netCDF4 not installed')
+def test_cache_compression(tmp_path):
+    folder = str(tmp_path)
+    files = sourceFiles(folder)
+    for compress in (False, True):
+        cache.writeCache(dataset(), folder, 'x', files, compress=compress)
+        with xr.open_dataset(cache._cacheFile(folder, 'x')) as ds:
+            assert bool(ds['x'].encoding.get('zlib', False)) == compress
+        xr.testing.assert_identical(cache.readCache(folder, 'x', files),
+                                    dataset())
+
+
+def test_modes_cache(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    writeRuns(folder, range(3))
+    reference = farpy.Modes(path=folder, cache=False)
+    farpy.Modes(path=folder)
+    read = countReads(monkeypatch, '_read_harmonic_file')
+    cached = farpy.Modes(path=folder)
+    assert read == []
+    xr.testing.assert_equal(cached.data['psi'], reference.data['psi'])
+    # A selection is sliced from the cache
+    selected = farpy.Modes(path=folder, runs=['0001'], n=2, R_I='I')
+    assert read == []
+    xr.testing.assert_equal(
+        selected.data['psi'],
+        farpy.Modes(path=folder, runs=['0001'], n=2, R_I='I',
+                    cache=False).data['psi'])
+    # Rewriting a file invalidates the cache of its variable
+    writeRuns(folder, [1], seed=5)
+    del read[:]
+    changed = farpy.Modes(path=folder, lazy=True)
+    changed['psi']
+    assert 'psi_0001' in read
+    xr.testing.assert_equal(changed.data['psi'],
+                            farpy.Modes(path=folder, cache=False).data['psi'])
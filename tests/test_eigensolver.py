@@ -0,0 +1,273 @@
+"""
+Tests of the EigenSolver reader
+"""
+import os
+import numpy as np
+import xarray as xr
+import farpy
+import farpy._eigensolver as eigensolver
+
+
+# ------------------------------------------------------------------------------
+# --- Auxiliary functions
+# ------------------------------------------------------------------------------
+def writeEigenSolver(folder, nmat=60, mn_col=3, ns=20, widths='fixed',
+                     seed=0):
+    """
+    Write a synthetic egn_values.dat and egn_mode_asci.dat
+
+    :param folder: folder where to write the files
+    :param nmat: number of eigenvalues
+    :param mn_col: number of poloidal modes (positive m)
+    :param ns: number of radial points
+    :param widths: width of the lines of the eigenvectors. 'fixed', as
+        written by FAR3D, 'random', or 'padded', where all the lines have the
+        same width but one of the first eigenvector, which is one eigenvector
+        longer (so the next blocks are one eigenvector later than expected)
+    :param seed: seed of the random numbers
+    """
+    rng = np.random.default_rng(seed)
+    lines = [str(nmat), str(mn_col), str(ns)]
+    for m in range(1, mn_col + 1):
+        lines += [str(m), '1']
+    omega = rng.random(nmat)
+    lines += ['%.8e' % f for f in omega]
+    lines += ['%.8e' % r for r in np.linspace(0.0, 1.0, ns)]
+    values = rng.normal(size=nmat * ns * mn_col * 2)
+    if widths == 'random':
+        digits = rng.integers(2, 9, size=values.size)
+        vectorLines = ['%.*e' % (int(d), v) for d, v in zip(digits, values)]
+    else:
+        vectorLines = ['% .8e' % v for v in values]
+    if widths == 'padded':
+        blockBytes = 2 * mn_col * ns * (len(vectorLines[0]) + 1)
+        vectorLines[1] = '%0*.8e' % (len(vectorLines[1]) + blockBytes,
+                                     values[1])
+    lines += vectorLines
+    lines += ['extra line']
+    with open(os.path.join(folder, 'egn_mode_asci.dat'), 'w') as fid:
+        fid.write('\n'.join(lines) + '\n')
+    np.savetxt(os.path.join(folder, 'egn_values.dat'),
+               np.column_stack((omega, rng.normal(size=nmat))))
+
+
+# ------------------------------------------------------------------------------
+# --- Tests
+# ------------------------------------------------------------------------------
+def test_read_egn_mode_asci(tmp_path):
+    folder = str(tmp_path)
+    nmat, mn_col, ns = 50, 3, 20
+    writeEigenSolver(folder, nmat, mn_col, ns, widths='random')
+    eigen = farpy.EigenSolver(folder, 'test', cache=False)
+    eigen._read_egn_mode_asci()
+    # One number per line, after the header, eigenvalues and radial grid
+    with open(os.path.join(folder, 'egn_mode_asci.dat')) as fid:
+        lines = fid.read().split('\n')
+    first = 3 + 2 * mn_col + nmat
+    np.testing.assert_array_equal(
+        eigen.rho, np.array(lines[first:first + ns], dtype=float))
+    first += ns
+    values = np.array(lines[first:first + nmat * ns * mn_col * 2],
+                      dtype=float).reshape(nmat, ns, mn_col, 2)
+    amp = eigen._data['amp'].values
+    assert amp.shape == (nmat, 2 * mn_col, ns)
+    # The negative m are stored in reversed order, as in the header
+    np.testing.assert_array_equal(amp[:, :mn_col],
+                                  values[..., 0].transpose(0, 2, 1))
+    np.testing.assert_array_equal(amp[:, mn_col:],
+                                  values[:, :, ::-1, 1].transpose(0, 2, 1))
+    assert eigen.extraLines == ['extra line\n']
+
+
+def test_vector(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    writeEigenSolver(folder)
+    full = farpy.EigenSolver(folder, 'test', cache=False)
+    full._read_egn_mode_asci()
+    amp = full._data['amp']
+    read = []
+    original = eigensolver._read_egn_mode_asci_body
+
+    def counted(*args, **kwargs):
+        read.append(args[0])
+        return original(*args, **kwargs)
+    monkeypatch.setattr(eigensolver, '_read_egn_mode_asci_body', counted)
+    # First from the ASCII file, then from the memory mapped store
+    for i in range(2):
+        eigen = farpy.EigenSolver(folder, 'test')
+        for j in (0, 17, [3, 59, 4]):
+            vector = eigen.vector(j)
+            np.testing.assert_array_equal(vector.values,
+                                          amp.isel(j=j).values)
+            np.testing.assert_array_equal(vector.m.values,
+                                          full._data['m'].values)
+            np.testing.assert_array_equal(vector.r.values, full.rho)
+        # The ASCII file is parsed only the first time
+        assert len(read) == 1
+
+
+def checkLoadVectors(folder):
+    """
+    Compare the vectors of load_vectors with the ones of the full reader
+
+    Each eigenvector is read alone, with the position of the blocks found in
+    the first call
+    """
+    full = farpy.EigenSolver(folder, 'test', cache=False)
+    full.vector(0)
+    window = farpy.EigenSolver(folder, 'test', cache=False)
+    for j, omega in enumerate(full._data['omega'].values):
+        vector = window.load_vectors(omega_range=(omega, omega))
+        assert list(vector.j.values) == [j]
+        np.testing.assert_array_equal(vector.values[0],
+                                      full.vector(j).values)
+        np.testing.assert_array_equal(vector.r.values, full.rho)
+
+
+def test_load_vectors_fixed_width(tmp_path):
+    writeEigenSolver(str(tmp_path))
+    checkLoadVectors(str(tmp_path))
+
+
+def test_load_vectors_random_width(tmp_path):
+    writeEigenSolver(str(tmp_path), nmat=300, widths='random')
+    checkLoadVectors(str(tmp_path))
+
+
+def test_load_vectors_padded_width(tmp_path):
+    # Each block, at the position expected for fixed width lines, looks like
+    # a valid block, but it is the previous eigenvector
+    writeEigenSolver(str(tmp_path), widths='padded')
+    checkLoadVectors(str(tmp_path))
+
+
+def test_load_vectors_index(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    writeEigenSolver(folder, widths='random')
+    # Chunks smaller than a block, so most blocks end in other chunk
+    monkeypatch.setattr(eigensolver, '_chunkBytes', 1000)
+    checkLoadVectors(folder)
+    indexed = []
+    original = eigensolver._index_egn_mode_asci_blocks
+
+    def counted(*args, **kwargs):
+        indexed.append(args[0])
+        return original(*args, **kwargs)
+    monkeypatch.setattr(eigensolver, '_index_egn_mode_asci_blocks', counted)
+    # The index is built once, and then taken from the cache folder
+    for seed in (0, 0, 1):
+        if seed == 1:
+            # A new file is indexed again
+            writeEigenSolver(folder, widths='random', seed=seed)
+            filename = os.path.join(folder, 'egn_mode_asci.dat')
+            stat = os.stat(filename)
+            os.utime(filename, ns=(stat.st_atime_ns,
+                                   stat.st_mtime_ns + 10**9))
+        full = farpy.EigenSolver(folder, 'test', cache=False)
+        full.vector(0)
+        eigen = farpy.EigenSolver(folder, 'test')
+        for window in ((0.2, 0.6), (0.0, 1.0)):
+            vectors = eigen.load_vectors(omega_range=window)
+            np.testing.assert_array_equal(
+                vectors.values, full._data['amp'].sel(j=vectors.j).values)
+    assert len(indexed) == 2
+
+
+def test_characterize(tmp_path):
+    # Gaussian harmonics, exp(-(r - c)**2 / (4 s**2)), so the amplitude
+    # squared has rms width s and its integral is proportional to the
+    # amplitude squared
+    r = np.linspace(0.0, 1.0, 2001)
+    n = [1, 1, 2, 2]
+    m = [2, 3, 3, 4]
+    # (mode, amplitude, center, s) of the harmonics of each eigenvector
+    harmonics = [[(1, 2.0, 0.4, 0.05), (3, 1.0, 0.7, 0.05)],
+                 [(2, -3.0, 0.6, 0.03), (0, 1.0, 0.3, 0.03)]]
+    a = np.zeros((2, len(n), r.size))
+    for j, vector in enumerate(harmonics):
+        for mode, amplitude, center, s in vector:
+            a[j, mode] = amplitude * np.exp(-(r - center)**2 / (4 * s**2))
+    amp = xr.DataArray(a, dims=('j', 'mode', 'r'),
+                       coords={'j': [5, 9], 'r': r, 'n': ('mode', n),
+                               'm': ('mode', m), 'omega': ('j', [0.1, 0.2]),
+                               'gamma': ('j', [0.0, 0.01])})
+    table = farpy.EigenSolver(str(tmp_path), 'test').characterize(amp)
+    assert list(table.j.values) == [5, 9]
+    assert list(table['n'].values) == [1, 2]
+    assert list(table['m'].values) == [3, 3]
+    np.testing.assert_allclose(table['r_peak'].values, [0.4, 0.6])
+    np.testing.assert_allclose(table['width'].values, [0.05, 0.03],
+                               rtol=1e-4)
+    np.testing.assert_allclose(table['fraction'].values,
+                               [4.0 / 5.0, 9.0 / 10.0], rtol=1e-6)
+    np.testing.assert_array_equal(table['omega'].values, [0.1, 0.2])
+
+
+def spuriousVectors():
+    """
+    Get synthetic eigenvectors with known spurious metrics
+
+    :return: DataArray (j, mode, r) with 64 radial points and the modes
+        (m1, m2, -m2, -m1)
+    """
+    ns = 64
+    i = np.arange(ns)
+    a = np.zeros((4, 4, ns))
+    # Radial spectrum in bins 5 and 30 of 32, only +m1
+    a[0, 0] = np.cos(2 * np.pi * 5 * i / ns) + \
+        0.5 * np.cos(2 * np.pi * 30 * i / ns)
+    # Flat, with the same +m1 and -m1
+    a[1, 0] = 1.0
+    a[1, 3] = 1.0
+    # Grid scale oscillation, with 4 times the energy in -m2 than in +m2
+    a[2, 1] = (-1.0)**i
+    a[2, 2] = 2.0 * (-1.0)**i
+    # The last one is a null vector
+    return xr.DataArray(a, dims=('j', 'mode', 'r'),
+                        coords={'r': np.linspace(0.0, 1.0, ns)})
+
+
+def test_spurious_metrics(tmp_path):
+    metrics = farpy.EigenSolver(str(tmp_path), 'test').spuriousMetrics(
+        spuriousVectors())
+    # |rfft|**2 of A cos is (ns A / 2)**2 in its bin, the bins above 16 are
+    # the high k ones
+    np.testing.assert_allclose(metrics['highK'].values[:3],
+                               [0.25 / 1.25, 0.0, 1.0], atol=1e-12)
+    # The points at r >= 0.9 are the last 7 of the 64, with trapezoidal
+    # weights 6.5 dr of the total 63 dr
+    np.testing.assert_allclose(metrics['edge'].values[1:3], 6.5 / 63.0)
+    np.testing.assert_allclose(metrics['parity'].values[:3],
+                               [1.0, 0.0, 3.0 / 5.0])
+    assert np.isnan(metrics['highK'].values[3])
+
+
+def test_filter_spurious(tmp_path):
+    eigen = farpy.EigenSolver(str(tmp_path), 'test')
+
+    def load():
+        eigen._data = xr.Dataset({'amp': spuriousVectors(),
+                                  'omega': ('j', [0.1, 0.2, 0.3, 0.4]),
+                                  'gamma': ('j', np.zeros(4))})
+        eigen._data = eigen._data.assign_coords(j=np.arange(4))
+    # The null vector has NaN metrics, so it is spurious for any limit
+    load()
+    flag = eigen.filterSpurious(maxHighK=0.5, maxEdge=None)
+    assert list(flag.values) == [False, False, True, True]
+    load()
+    flag = eigen.filterSpurious(maxHighK=None, maxEdge=None, maxParity=0.5)
+    assert list(flag.values) == [True, False, True, True]
+    np.testing.assert_allclose(eigen._data['parity'].values[:3],
+                               [1.0, 0.0, 0.6])
+    load()
+    flag = eigen.filterSpurious(maxHighK=None, maxEdge=None,
+                                omega_range=(0.15, 0.35))
+    assert list(flag.values) == [True, False, False, True]
+    # Removed instead of marked
+    load()
+    flag = eigen.filterSpurious(maxHighK=None, maxEdge=None, maxParity=0.5,
+                                omega_range=(0.15, 0.35), drop=True)
+    assert list(flag.values) == [True, False, True, True]
+    assert list(eigen._data.j.values) == [1]
+    np.testing.assert_array_equal(eigen._data['amp'].values[0],
+                                  spuriousVectors().values[1])
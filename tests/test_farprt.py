@@ -0,0 +1,196 @@
+"""
+Tests of the farprt reader
+"""
+import re
+import numpy as np
+import pandas as pd
+import pytest
+import farpy
+from farpy._farprt import _missingE
+
+modes = ((1, 1), (2, 1), (3, 1), (2, 2))    # (m, n) of the harmonics
+# Columns of the energy block for alpha_on = 0 and 1. The names of the
+# columns of the second species are only illustrative: the reader takes them
+# from the header line of the block
+columns = {0: ('l', 'm', 'n', 'ke', 'me', 'vprlf', 'gamke', 'gamme',
+               'gamvpr'),
+           1: ('l', 'm', 'n', 'ke', 'me', 'vprlf', 'vprlfa', 'gamke',
+               'gamme', 'gamvpr', 'gamvpra')}
+
+
+def farprtContent(nblocks: int = 20, seed: int = 0, alpha_on: int = 0,
+                  growth=None):
+    """
+    Get the content of a synthetic farprt file
+
+    :param nblocks: number of print steps
+    :param seed: seed of the random numbers
+    :param alpha_on: 1 to write the columns of two fast particle species
+    :param growth: function of (step, var, m, n) giving the growth rate and
+        frequency of each line. If None, random values, whose n=2 growth
+        rates do not converge
+
+    :return: bytes with the content of the file
+    """
+    rng = np.random.default_rng(seed)
+    names = columns[alpha_on]
+    lines = ['header %i' % i for i in range(11)]
+    lines += ['', 'some other stuff']
+    for b in range(nblocks):
+        lines.append('energy:numrun=  12345, numruno= 00000, nstep=  %i, '
+                     'time=  %.4E, dt=  1.0E-02' % (100 * b, 1.0 * b))
+        lines.append('')
+        lines.append('  ' + ' '.join(['%6s' % name for name in names]))
+        for l, (m, n) in enumerate(modes):
+            values = rng.random(len(names) - 3)
+            if l == 0:
+                values[1] *= 10.0**-rng.integers(100, 300)
+            values = ['%.6E' % v for v in values]
+            # FAR3D drops the 'E' of the three digit exponents
+            values = [v.replace('E', '') if len(v.split('E')[1]) > 3 else v
+                      for v in values]
+            lines.append('  %3i %3i %3i  ' % (l + 1, m, n)
+                         + '  '.join(values))
+        lines.append('')
+        for var in ['psi', 'phi', 'pr', 'vth']:
+            for (m, n) in modes:
+                if growth is None:
+                    gamma = 0.01 * n**4 * (1.0 + (n - 1) * rng.random())
+                    omega = 0.2 * rng.random()
+                else:
+                    gamma, omega = growth(b, var, m, n)
+                lines.append(' %-6s: m= %3i n= %3i gamma= %.6E omega= %.6E'
+                             % (var, m, n, gamma, omega))
+    return ('\n'.join(lines) + '\n').encode()
+
+
+# ------------------------------------------------------------------------------
+# --- Energy block
+# ------------------------------------------------------------------------------
+def test_missing_exponent():
+    text = ' 1.0-280  2.5E-03  3.000000+101 -4.5-120\n  12  -7  1.0E+00\n'
+    values = np.array(_missingE.sub(r'E\1', text).split(), dtype=float)
+    np.testing.assert_array_equal(
+        values, [1.0e-280, 2.5e-3, 3.0e101, -4.5e-120, 12.0, -7.0, 1.0])
+
+
+@pytest.mark.parametrize('alpha_on', [0, 1])
+def test_energy_block(tmp_path, alpha_on):
+    content = farprtContent(alpha_on=alpha_on)
+    filename = str(tmp_path / 'farprt')
+    with open(filename, 'wb') as fid:
+        fid.write(content)
+    farprt = farpy.Farprt(filename, cache=False)
+    farprt.readEnergyBlock()
+    data = farprt.energyData
+    names = list(columns[alpha_on])
+    assert list(data.columns) == \
+        names + ['numrun', 'numruno', 'nstep', 'time', 'dt', 'te']
+    # The lines of the blocks, number by number
+    rows = [[float(re.sub(r'(\d)([+-]\d{3})$', r'\1E\2', value))
+             for value in line.split()]
+            for line in content.decode().split('\n')
+            if re.match(r'\s+\d+\s+\d+\s+\d+\s', line)]
+    assert len(rows) == 20 * len(modes)
+    np.testing.assert_array_equal(data[names].values, np.array(rows))
+    # The exponents without 'E' are read, not set to zero
+    assert (data['me'].values[::len(modes)] < 1.0e-99).all()
+    assert (data['me'].values > 0.0).all()
+    np.testing.assert_array_equal(data['nstep'].values[::len(modes)],
+                                  100 * np.arange(20))
+
+
+# ------------------------------------------------------------------------------
+# --- Growth rate block
+# ------------------------------------------------------------------------------
+def test_growth_rate(tmp_path):
+    names = ['psi', 'phi', 'pr', 'nfast', 'vfast', 'vth']
+
+    def growth(step, var, m, n):
+        # The growth rate of n=2 changes along the simulation
+        i = names.index(var)
+        return (0.01 * n + 0.001 * m + 1e-4 * i + 5e-3 * (n - 1) * step,
+                0.1 * m + 0.01 * step + 0.001 * i)
+    nsteps = 5
+    filename = str(tmp_path / 'farprt')
+    with open(filename, 'wb') as fid:
+        fid.write(farprtContent(nsteps, growth=growth))
+    farprt = farpy.Farprt(filename, cache=False)
+    farprt.readGrowthRate(convergency_level=0.1)
+    block = farprt.growthRateBlock
+    assert list(block['var'].values) == names
+    assert list(block['m'].values) == [1, 2, 3]
+    assert list(block['n'].values) == [1, 2]
+    # Values as printed in the file, NaN for the variables and harmonics
+    # which are not there
+    gamma = np.full((nsteps, 6, 3, 2), np.nan)
+    omega = np.full((nsteps, 6, 3, 2), np.nan)
+    for step in range(nsteps):
+        for i in (0, 1, 2, 5):
+            for (m, n) in modes:
+                values = growth(step, names[i], m, n)
+                gamma[step, i, m - 1, n - 1] = float('%.6E' % values[0])
+                omega[step, i, m - 1, n - 1] = float('%.6E' % values[1])
+    np.testing.assert_array_equal(block['gamma_step'].values, gamma)
+    np.testing.assert_array_equal(block['omega_step'].values, omega)
+    # The values of the last step, as (m, n, var)
+    np.testing.assert_array_equal(block['gamma'].values,
+                                  gamma[-1].transpose(1, 2, 0))
+    np.testing.assert_array_equal(block['omega'].values,
+                                  omega[-1].transpose(1, 2, 0))
+    # std/mean of all the growth rates of each n
+    convergence = [np.nanstd(gamma[..., 0]) / np.nanmean(gamma[..., 0]),
+                   np.nanstd(gamma[..., 1]) / np.nanmean(gamma[..., 1])]
+    np.testing.assert_allclose(block['convergence'].values, convergence)
+    assert convergence[0] < 0.1 < convergence[1]
+    assert list(block['converged'].values) == [True, False]
+
+
+# ------------------------------------------------------------------------------
+# --- Follow
+# ------------------------------------------------------------------------------
+def test_follow(tmp_path, monkeypatch):
+    content = farprtContent()
+    full = str(tmp_path / 'farprt_full')
+    with open(full, 'wb') as fid:
+        fid.write(content)
+    reference = farpy.Farprt(full, cache=False)
+    reference.readEnergyBlock()
+    reference.readGrowthRate()
+    # Follow the file while it is written, cut at random bytes. Each poll
+    # only adds the new lines to the growth rates, without ordering them all
+    # again
+    def ordered(*args, **kwargs):
+        raise Exception('All the growth rate lines were ordered again')
+    monkeypatch.setattr(farpy.Farprt, '_setGrowthRate', ordered)
+    growing = str(tmp_path / 'farprt')
+    following = farpy.Farprt(growing, cache=False)
+    rng = np.random.default_rng(1)
+    for cut in sorted(rng.integers(0, len(content), 15)) + [len(content)]:
+        with open(growing, 'wb') as fid:
+            fid.write(content[:cut])
+        following.follow()
+        if following.energyData is not None:
+            # Only complete energy blocks are taken
+            assert len(following.energyData) % len(modes) == 0
+    pd.testing.assert_frame_equal(following.energyData,
+                                  reference.energyData)
+    # The spread of the growth rates is accumulated poll by poll, so it is
+    # equal only to rounding
+    np.testing.assert_allclose(following.growthRateBlock['convergence'],
+                               reference.growthRateBlock['convergence'],
+                               rtol=1e-12, atol=1e-12)
+    assert following.growthRateBlock.drop_vars('convergence').identical(
+        reference.growthRateBlock.drop_vars('convergence'))
+    # The convergence level is applied also when nothing is new
+    converged = following.follow(convergency_level=0.1)
+    assert list(converged.values) == [True, False]
+    converged = following.follow(convergency_level=10.0)
+    assert list(converged.values) == [True, True]
+    # A shorter file (restarted simulation) is read from the beginning
+    with open(growing, 'wb') as fid:
+        fid.write(content[:len(content) // 3])
+    following.follow()
+    restarted = farpy.Farprt(growing, cache=False)
+    restarted.follow()
+    pd.testing.assert_frame_equal(following.energyData, restarted.energyData)
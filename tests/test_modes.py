@@ -0,0 +1,278 @@
+"""
+Tests of the Modes reader
+"""
+import os
+import numpy as np
+import pytest
+import farpy
+import farpy._modes as modes
+
+# ------------------------------------------------------------------------------
+# --- Synthetic model
+# ------------------------------------------------------------------------------
+n = [1, 1, 1, 2, 2, 2]      # toroidal mode numbers
+m = [1, 2, 3, 2, 3, 4]      # poloidal mode numbers
+nr = 30                     # Number of radial points
+
+
+def writeRuns(folder, runs, seed=0):
+    """
+    Write the harmonic and energy files of some runs with the FAR3D format
+
+    :param folder: folder where to write the files
+    :param runs: list with the number of the runs
+    :param seed: seed of the random numbers
+    """
+    rng = np.random.default_rng(seed)
+    r = np.linspace(0.0, 1.0, nr)
+    header = 'r R ' + ' '.join(['%i/ %i' % (mm, nn) for mm, nn in zip(m, n)])\
+        + ' I ' + ' '.join(['%i/ %i' % (mm, nn) for mm, nn in zip(m, n)])
+    headerE = 't ' + ' '.join(['%i/ %i' % (mm, nn) for mm, nn in zip(m, n)])
+    for irun in runs:
+        for name in modes.harmonicNames:
+            data = np.column_stack((r, rng.normal(size=(nr, 2 * len(n)))))
+            np.savetxt(os.path.join(folder, '%s_%04i' % (name, irun)), data,
+                       header=header, comments='', fmt='%.6e')
+        for name in modes.energyNames:
+            data = rng.random(len(n) + 1 if name.endswith('nc')
+                              else len(n) + 3)
+            data[0] = irun * 10.0
+            np.savetxt(os.path.join(folder, '%s_%04i' % (name, irun)),
+                       data[None, :], header=headerE, comments='',
+                       fmt='%.6e')
+
+
+def countReads(monkeypatch, function):
+    """
+    Count the files read by one of the reading functions of the module
+
+    :param monkeypatch: pytest fixture
+    :param function: name of the function, for example '_read_energy_file'
+
+    :return: list where the name of each file read is appended
+    """
+    read = []
+    original = getattr(modes, function)
+
+    def counted(filename, *args, **kwargs):
+        read.append(os.path.basename(filename))
+        return original(filename, *args, **kwargs)
+    monkeypatch.setattr(modes, function, counted)
+    return read
+
+
+# ------------------------------------------------------------------------------
+# --- Harmonics
+# ------------------------------------------------------------------------------
+def oldReading(folder, name, runs):
+    """
+    Read the harmonic files with one np.loadtxt per file and a python loop
+    over the columns, as done in farpy <= 0.0.6
+
+    :param folder: folder with the model
+    :param name: name of the variable
+    :param runs: list with the runs
+
+    :return: array (run, n, m, R_I, r)
+    """
+    nn = np.array(n)
+    mm = np.array(m)
+    unique_n = np.unique(nn)
+    unique_m = np.unique(mm)
+    indeces_n = np.array([np.where(unique_n == k)[0][0] for k in nn])
+    indeces_m = np.array([np.where(unique_m == k)[0][0] for k in mm])
+    dum = np.full((len(runs), unique_n.size, unique_m.size, 2, nr), np.nan)
+    for iis, s in enumerate(runs):
+        dummy = np.loadtxt(os.path.join(folder, name + '_' + s), skiprows=1)
+        for icolum in range(1, nn.size + 1):
+            dum[iis, indeces_n[icolum-1], indeces_m[icolum-1], 0, :] =\
+                dummy[:, icolum]
+            dum[iis, indeces_n[icolum-1], indeces_m[icolum-1], 1, :] =\
+                dummy[:, icolum + nn.size]
+    return dum
+
+
+def test_harmonics_as_old_reading(tmp_path):
+    folder = str(tmp_path)
+    writeRuns(folder, range(3))
+    data = farpy.Modes(path=folder, cache=False, workers=2)
+    for name in modes.harmonicNames:
+        old = oldReading(folder, name, ['0000', '0001', '0002'])
+        np.testing.assert_array_equal(data[name].values, old)
+    # With the sparse layout and complex numbers, the same values
+    sparse = farpy.Modes(path=folder, cache=False, layout='sparse',
+                         dtype='complex128')
+    dense = sparse.dense('phi').transpose('run', 'n', 'm', 'R_I', 'r')
+    np.testing.assert_array_equal(dense.values, data['phi'].values)
+
+
+def test_lazy(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    writeRuns(folder, range(3))
+    read = countReads(monkeypatch, '_read_harmonic_file')
+    lazy = farpy.Modes(path=folder, lazy=True, cache=False)
+    assert read == [] and len(lazy.data.keys()) == 0
+    phi = lazy['phi']
+    assert sorted(read) == ['phi_0000', 'phi_0001', 'phi_0002']
+    assert list(lazy.data.keys()) == ['phi']
+    np.testing.assert_array_equal(
+        phi.values, farpy.Modes(path=folder, cache=False)['phi'].values)
+
+
+selections = [
+    {},
+    {'runs': ['0001', '0003']},
+    {'runs': slice(-2, None), 'n': 2},
+    {'m': [2, 3], 'R_I': 'I'},
+    {'rlim': (0.25, 0.6), 'n': 1, 'm': 3},
+]
+
+
+@pytest.mark.parametrize('layout', ['dense', 'sparse'])
+@pytest.mark.parametrize('dtype', ['float64', 'float32', 'complex64'])
+@pytest.mark.parametrize('selection', selections)
+def test_selection(tmp_path, selection, dtype, layout):
+    folder = str(tmp_path)
+    writeRuns(folder, range(4))
+    full = farpy.Modes(path=folder, cache=False)
+    if dtype.startswith('complex') and 'R_I' in selection:
+        with pytest.raises(Exception):
+            farpy.Modes(path=folder, dtype=dtype, **selection)
+        return
+    # Read twice, to check both the ASCII reading and the cache
+    for i in range(2):
+        selected = farpy.Modes(path=folder, dtype=dtype, layout=layout,
+                               **selection)
+        for name in ('phi', 'eke'):
+            got = selected.dense(name)
+            dims = [d for d in full[name].dims if d in got.dims]
+            got = got.transpose(*dims)
+            expected = full[name].sel({d: got[d].values for d in dims
+                                       if d in got.coords})
+            assert got.shape == expected.shape
+            # The energies are always in double precision
+            single = dtype != 'float64' and name != 'eke'
+            assert got.dtype == (np.float32 if single else np.float64)
+            np.testing.assert_array_equal(
+                got.values, expected.values.astype(got.dtype))
+    # Only complete readings are saved in the cache
+    assert os.path.isfile(os.path.join(folder, '.farpy_cache', 'phi.nc')) \
+        == (selection == {} and dtype == 'float64')
+
+
+# ------------------------------------------------------------------------------
+# --- Energies
+# ------------------------------------------------------------------------------
+def test_energy_cube(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    writeRuns(folder, range(3))
+    cube = farpy.Modes(path=folder, lazy=True).energyCube()
+    assert cube.dims == ('time', 'n', 'm', 'quantity')
+    writeRuns(folder, range(3, 5), seed=1)
+    reference = farpy.Modes(path=folder, cache=False)
+    # Only the new runs are parsed to extend the cube
+    read = countReads(monkeypatch, '_read_energy_file')
+    cube = farpy.Modes(path=folder, lazy=True).energyCube()
+    assert sorted(set([f.split('_')[1] for f in read])) == ['0003', '0004']
+    np.testing.assert_array_equal(cube.time.values,
+                                  reference['time'].values)
+    for name in modes.energyNames:
+        np.testing.assert_array_equal(cube.sel(quantity=name).values,
+                                      reference[name].values)
+    # Only the runs whose files changed are parsed again
+    writeRuns(folder, [1], seed=2)
+    for name in modes.energyNames:
+        filename = os.path.join(folder, name + '_0001')
+        stat = os.stat(filename)
+        os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    reference = farpy.Modes(path=folder, cache=False)
+    del read[:]
+    assert farpy.Modes(path=folder, lazy=True)._readEnergyCube(
+        build=False) is None
+    cube = farpy.Modes(path=folder, lazy=True).energyCube()
+    assert sorted(set([f.split('_')[1] for f in read])) == ['0001']
+    for name in modes.energyNames:
+        np.testing.assert_array_equal(cube.sel(quantity=name).values,
+                                      reference[name].values)
+
+
+def test_energy_does_not_build_cube(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    writeRuns(folder, range(4))
+    reference = farpy.Modes(path=folder, cache=False)
+    read = countReads(monkeypatch, '_read_energy_file')
+    # A single energy, with a selection, only parses its own files
+    selected = farpy.Modes(path=folder, lazy=True, runs=slice(-2, None))
+    eke = selected['eke']
+    assert sorted(read) == ['eke_0002', 'eke_0003']
+    np.testing.assert_array_equal(
+        eke.values, reference['eke'].isel(run=slice(-2, None)).values)
+    assert selected._energyCube is None
+    assert not os.path.isfile(os.path.join(folder, '.farpy_cache',
+                                           'energies.npy'))
+    # Once the cube is built, the energies are taken from it
+    cube = farpy.Modes(path=folder, lazy=True).energyCube()
+    assert cube.sizes['time'] == 4
+    del read[:]
+    fromCube = farpy.Modes(path=folder, lazy=True)
+    for name in ('eke', 'ekenc'):
+        np.testing.assert_array_equal(fromCube[name].values,
+                                      reference[name].values)
+    assert read == []
+
+
+# ------------------------------------------------------------------------------
+# --- Reconstruction
+# ------------------------------------------------------------------------------
+def test_reconstruct(tmp_path):
+    folder = str(tmp_path)
+    writeRuns(folder, range(2))
+    data = farpy.Modes(path=folder, cache=False)
+    theta = np.linspace(0.0, 2.0 * np.pi, 17)
+    phis = np.array([0.0, 0.7])
+    out = data.reconstruct('phi', theta=theta, phi=phis)
+    assert out.dims == ('run', 'r', 'theta', 'phi')
+    # Direct sum over the harmonics of the files
+    expected = np.zeros((2, nr, theta.size, phis.size))
+    for nn, mm in zip(n, m):
+        real = data['phi'].sel(n=nn, m=mm, R_I='R').values[:, :, None, None]
+        imag = data['phi'].sel(n=nn, m=mm, R_I='I').values[:, :, None, None]
+        angle = mm * theta[:, None] - nn * phis[None, :]
+        expected += real * np.cos(angle) + imag * np.sin(angle)
+    np.testing.assert_allclose(out.values, expected, rtol=1e-12, atol=1e-12)
+    # One run and toroidal angle, from the sparse layout in single precision
+    sparse = farpy.Modes(path=folder, cache=False, layout='sparse',
+                         dtype='complex64')
+    single = sparse.reconstruct('phi', run='0001', theta=theta, phi=0.7)
+    assert single.dims == ('run', 'r', 'theta')
+    np.testing.assert_allclose(single.values[0], expected[1, :, :, 1],
+                               rtol=1e-4, atol=1e-4)
+
+
+# ------------------------------------------------------------------------------
+# --- Refresh
+# ------------------------------------------------------------------------------
+def test_refresh(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    writeRuns(folder, range(3))
+    following = farpy.Modes(path=folder)
+    cacheFile = os.path.join(folder, '.farpy_cache', 'phi.nc')
+    stamp = os.stat(cacheFile).st_mtime_ns
+    assert following.refresh() == []
+    writeRuns(folder, range(3, 5), seed=1)
+    read = countReads(monkeypatch, '_read_harmonic_file')
+    assert following.refresh() == ['0003', '0004']
+    # Only the new runs are parsed, and the cache is not rewritten
+    assert sorted(set([f.split('_')[1] for f in read])) == ['0003', '0004']
+    assert os.stat(cacheFile).st_mtime_ns == stamp
+    reference = farpy.Modes(path=folder, cache=False)
+    for name in ('phi', 'eke', 'time'):
+        np.testing.assert_array_equal(following[name].values,
+                                      reference[name].values)
+    # Once updated, the cache is used with all the runs
+    following.updateCache()
+    del read[:]
+    cached = farpy.Modes(path=folder, lazy=True)
+    np.testing.assert_array_equal(cached['phi'].values,
+                                  reference['phi'].values)
+    assert read == []
@@ -0,0 +1,98 @@
+"""
+Tests of the namelist reader and writer
+"""
+import os
+import io
+import numpy as np
+import farpy
+import farpy._namelist as nml
+
+
+def makeNamelist(ldim: int = 3, leqdim: int = 2):
+    """
+    Get a namelist with a different value in each field
+
+    :param ldim: number of modes of the simulation
+    :param leqdim: number of modes of the equilibrium
+    """
+    out = {}
+    for i, entry in enumerate([e for e in nml.namelistSchema
+                               if not isinstance(e, str)]):
+        name, dtype, count, fmt, description = entry
+        if fmt is None:
+            if isinstance(count, str):
+                count = {'ldim': ldim, 'leqdim': leqdim}[count]
+            out[name] = (np.arange(count) + i).astype(dtype)
+        elif dtype is str:
+            out[name] = '%05i' % i      # the leading zeros matter
+        elif dtype is bool:
+            out[name] = False
+        elif dtype is int:
+            out[name] = {'ldim': ldim, 'leqdim': leqdim}.get(name, i)
+        else:
+            out[name] = 0.25 * i
+    return out
+
+
+def assertSameNamelist(a, b):
+    assert a.keys() == b.keys()
+    for k in a.keys():
+        np.testing.assert_array_equal(a[k], b[k])
+        assert type(a[k]) is type(b[k]) or isinstance(a[k], np.ndarray)
+
+
+def test_round_trip(tmp_path):
+    filename = str(tmp_path / 'Input_Model')
+    namelist = makeNamelist()
+    farpy.writeNamelist(filename, namelist)
+    read = farpy.readNamelist(filename, cache=False)
+    assertSameNamelist(read, namelist)
+    assert read['matrix_out'] is False
+    # Writing what was read gives the same file
+    other = str(tmp_path / 'other')
+    farpy.writeNamelist(other, read)
+    with open(filename, 'rb') as a, open(other, 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_open_file(tmp_path):
+    filename = str(tmp_path / 'farprt')
+    farpy.writeNamelist(filename, makeNamelist())
+    with open(filename) as fid:
+        text = fid.read()
+    fid = io.StringIO('header 1\nheader 2\n' + text + '\nafter\n')
+    assertSameNamelist(farpy.readNamelist(fid, header=2), makeNamelist())
+    # The file is left after the last field (before the closing line)
+    assert fid.read().split('\n')[1:] == ['after', '']
+
+
+def test_parse_cache(tmp_path):
+    filename = str(tmp_path / 'Input_Model')
+    farpy.writeNamelist(filename, makeNamelist())
+    first = farpy.readNamelist(filename)
+    # The namelists given are copies of the one in memory
+    first['mm'][0] = -1
+    first['bet0_f'] = -1.0
+    assertSameNamelist(farpy.readNamelist(filename), makeNamelist())
+    # A change of the file is seen
+    changed = makeNamelist(ldim=5)
+    farpy.writeNamelist(filename, changed)
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assertSameNamelist(farpy.readNamelist(filename), changed)
+
+
+def test_peek(tmp_path):
+    namelist = makeNamelist()
+    for i, key in enumerate(namelist.keys()):
+        # A new file each time, so the parsed namelists are not used
+        filename = str(tmp_path / ('Input_Model_%i' % i))
+        farpy.writeNamelist(filename, namelist)
+        peek = farpy.peekNamelist(filename, key)
+        assert list(peek.keys()) == [key]
+        np.testing.assert_array_equal(peek[key], namelist[key])
+    # Several keys, from the parsed namelist
+    farpy.readNamelist(filename)
+    peek = farpy.peekNamelist(filename, ['cvfp', 'ldim', 'numrun'])
+    assertSameNamelist(peek, {k: namelist[k]
+                              for k in ['cvfp', 'ldim', 'numrun']})
@@ -0,0 +1,58 @@
+"""
+Tests of the input profiles reader
+"""
+import numpy as np
+import pytest
+import farpy._Profiles.profiles as profiles
+
+
+def writeProfiles(filename, seed: int = 0):
+    """
+    Write a synthetic input profiles file
+
+    :param filename: name of the file
+    :param seed: seed of the random numbers
+
+    :return: array with the table of the file
+    """
+    header = profiles.profilesOrderInputs[0][0]
+    ncolumns = max([v['i'] for v in header.values()]) + 1
+    table = np.random.default_rng(seed).random((50, ncolumns))
+    table[:, header['rho']['i']] = np.linspace(0.0, 1.0, 50)
+    lines = ['Profiles', 'BT0', ' 1.75', 'RMAJR', ' 1.7', 'RMINR', ' 0.6',
+             'KAPPA', ' 1.8', 'DELTA', ' 0.3', 'IMPURITY', 'Carbon', 'MI',
+             ' 2.0', ' beta0= 0.01, Rmax= 2.3', 'Table', 'rho q ...']
+    with open(filename, 'w') as fid:
+        fid.write('\n'.join(lines) + '\n')
+        np.savetxt(fid, table, fmt='%.7e')
+    # The values as written in the file
+    return np.loadtxt(filename, skiprows=18)
+
+
+def test_profiles(tmp_path):
+    profiles._profilesCache.clear()
+    table = writeProfiles(str(tmp_path / 'a'))
+    writeProfiles(str(tmp_path / 'b'))
+    a = profiles.ProfilesInput(str(tmp_path / 'a'))
+    header = profiles.profilesOrderInputs[0][0]
+    np.testing.assert_array_equal(a['q'].values, table[:, header['q']['i']])
+    np.testing.assert_array_equal(a['q'].rho.values, table[:, 0])
+    assert float(a['bt0']) == 1.75 and float(a['Rmax']) == 2.3
+    assert float(a['beta0']) == 0.01
+    assert a['Rmax'].attrs['units'] == 'm'
+    # Same content: parsed once, shared and read-only
+    b = profiles.ProfilesInput(str(tmp_path / 'b'))
+    assert len(profiles._profilesCache) == 1
+    assert np.shares_memory(a['q'].values, b['q'].values)
+    with pytest.raises(ValueError):
+        b['q'].values[0] = 1.0
+    # But each object has its own dataset
+    b.data['new'] = b['q'] * 2
+    assert 'new' not in a.data
+    # Other content, or no cache
+    writeProfiles(str(tmp_path / 'c'), seed=1)
+    c = profiles.ProfilesInput(str(tmp_path / 'c'))
+    assert not np.array_equal(c['q'].values, a['q'].values)
+    d = profiles.ProfilesInput(str(tmp_path / 'a'), cache=False)
+    d['q'].values[0] = 1.0
+    assert a['q'].values[0] == table[0, header['q']['i']]
@@ -0,0 +1,278 @@
+"""
+Tests of the scans
+"""
+import os
+import numpy as np
+import pytest
+import farpy
+import farpy._namelist as nml
+from test_namelist import makeNamelist
+
+
+# ------------------------------------------------------------------------------
+# --- Auxiliary functions
+# ------------------------------------------------------------------------------
+def writeEigenPoint(folder, vectors, omega):
+    """
+    Write the EigenSolver outputs of a point of the scan
+
+    :param folder: folder of the point
+    :param vectors: array (j, r, m, 2) with the eigenvectors
+    :param omega: frequency of each eigenvector
+    """
+    os.makedirs(folder, exist_ok=True)
+    nmat, ns, mn_col = vectors.shape[:3]
+    lines = [str(nmat), str(mn_col), str(ns)]
+    for m in range(1, mn_col + 1):
+        lines += [str(m), '1']
+    lines += ['%.8e' % f for f in omega]
+    lines += ['%.8e' % r for r in np.linspace(0.0, 1.0, ns)]
+    lines += ['% .8e' % v for v in vectors.ravel()]
+    with open(os.path.join(folder, 'egn_mode_asci.dat'), 'w') as fid:
+        fid.write('\n'.join(lines) + '\n')
+    np.savetxt(os.path.join(folder, 'egn_values.dat'),
+               np.column_stack((omega, np.zeros(nmat))))
+
+
+def writeNamelistPoints(folders, namelist, key, values):
+    """
+    Write the Input_Model of the points of a scan
+
+    :param folders: folder of each point
+    :param namelist: namelist of the points
+    :param key: namelist field changed along the scan
+    :param values: value of the field at each point
+    """
+    for folder, value in zip(folders, values):
+        os.makedirs(folder, exist_ok=True)
+        namelist = dict(namelist, **{key: value})
+        farpy.writeNamelist(os.path.join(folder, 'Input_Model'), namelist)
+
+
+# ------------------------------------------------------------------------------
+# --- Creation of the scans
+# ------------------------------------------------------------------------------
+def test_build(tmp_path):
+    parent = str(tmp_path / 'scan')
+    shared = str(tmp_path / 'Eq_test')
+    with open(shared, 'w') as fid:
+        fid.write('equilibrium\n')
+    namelist = makeNamelist()
+    beta = [0.001, 0.002, 0.003]
+    folders = farpy.scan.build(parent, namelist, {'bet0_f': beta},
+                               shared=[shared])
+    assert len(folders) == 3
+    scan = farpy.scan.Scan1D(parent)
+    np.testing.assert_allclose(scan.vars[0].values, beta)
+    for folder, value in zip(folders, beta):
+        # The namelist is the one written by writeNamelist
+        reference = str(tmp_path / 'reference')
+        farpy.writeNamelist(reference, dict(namelist, bet0_f=value))
+        with open(reference) as a, \
+                open(os.path.join(folder, 'Input_Model')) as b:
+            assert a.read() == b.read()
+        assert os.path.samefile(shared, os.path.join(folder, 'Eq_test'))
+
+
+def test_build_2D(tmp_path):
+    # Both variable names contain '_'
+    parent = str(tmp_path / 'scan')
+    namelist = makeNamelist()
+    beta = [0.001, 0.002]
+    edge = [10, 20, 30]
+    folders = farpy.scan.build(parent, namelist,
+                               {'bet0_f': beta, 'edge_p': edge},
+                               decimals={'bet0_f': 3, 'edge_p': 0},
+                               link='copy')
+    assert len(folders) == 6
+    assert os.path.relpath(folders[1], parent) == \
+        os.path.join('bet0_f_0.001', 'edge_p_20')
+    scan = farpy.scan.Scan2D(parent)
+    assert [v.attrs['long_name'] for v in scan.vars] == ['bet0_f', 'edge_p']
+    np.testing.assert_allclose(scan.vars[0].values, beta)
+    np.testing.assert_allclose(scan.vars[1].values, edge)
+    read = farpy.readNamelist(os.path.join(folders[5], 'Input_Model'))
+    assert read['bet0_f'] == beta[1] and read['edge_p'] == edge[2]
+
+
+@pytest.mark.parametrize('field', ['cvfp', 'mm', 'ldim', 'leqdim', 'numrun'])
+def test_build_rejected_fields(tmp_path, field):
+    # Arrays, array sizes and strings can not be changed in a single line
+    with pytest.raises(Exception, match=field):
+        farpy.scan.build(str(tmp_path), makeNamelist(), {field: [1, 2]})
+    assert os.listdir(str(tmp_path)) == []
+
+
+# ------------------------------------------------------------------------------
+# --- Namelist
+# ------------------------------------------------------------------------------
+def test_namelist_table(tmp_path, monkeypatch):
+    namelist = makeNamelist()
+    beta = [0.001, 0.002, 0.003]
+    writeNamelistPoints([str(tmp_path / '1D' / ('bet0_f_%.3f' % b))
+                         for b in beta], namelist, 'bet0_f', beta)
+    omcy = [1.5, 2.5]
+    ni = [10, 20, 30]
+    for o in omcy:
+        writeNamelistPoints([str(tmp_path / '2D' / ('omcy_%.1f' % o) /
+                                 ('ni_%i' % i)) for i in ni],
+                            dict(namelist, omcy=o), 'ni', ni)
+    # The fields before the first array are taken from their own lines
+    calls = []
+    parse = nml._parseNamelist
+    monkeypatch.setattr(nml, '_parseNamelist',
+                        lambda *args: calls.append(args) or parse(*args))
+    scan = farpy.scan.Scan1D(str(tmp_path / '1D'))
+    table = scan.namelistTable(['numrun', 'ldim'])
+    assert set(table.variables) == {'bet0_f', 'numrun', 'ldim'}
+    assert list(table['numrun'].values) == [namelist['numrun']] * 3
+    assert list(table['ldim'].values) == [namelist['ldim']] * 3
+    assert len(calls) == 0
+    # The arrays have their own dimension
+    table = scan.namelistTable(['bet0_f', 'cvfp'])
+    assert set(table.variables) == {'bet0_f', 'cvfp'}
+    np.testing.assert_allclose(table['bet0_f'].values, beta)
+    assert table['cvfp'].dims == ('bet0_f', 'cvfp_index')
+    np.testing.assert_array_equal(table['cvfp'].values,
+                                  [namelist['cvfp']] * 3)
+    scan = farpy.scan.Scan2D(str(tmp_path / '2D'))
+    table = scan.namelistTable(['omcy', 'ni', 'cvfp'])
+    assert set(table.variables) == {'omcy', 'ni', 'cvfp'}
+    assert table['ni'].dims == ('omcy', 'ni')
+    assert table['cvfp'].dims == ('omcy', 'ni', 'cvfp_index')
+    np.testing.assert_allclose(table['omcy'].values,
+                               np.repeat(omcy, 3).reshape(2, 3))
+    np.testing.assert_array_equal(table['ni'].values, [ni, ni])
+    assert table['cvfp'].shape == (2, 3, namelist['cvfp'].size)
+
+
+# ------------------------------------------------------------------------------
+# --- Namelist index
+# ------------------------------------------------------------------------------
+def test_points(tmp_path):
+    # The folders of the points, with the prefix of 1D scans and nested for
+    # 2D scans, are the ones written by build
+    namelist = makeNamelist()
+    parent = str(tmp_path / '1D')
+    folders = farpy.scan.build(parent, namelist, {'bet0_f': [0.01, 0.02]},
+                               decimals=3, prefix='41091_')
+    points = farpy.scan.Scan1D(parent, prefix='41091_')._points()
+    assert [os.path.join(parent, f) for f, v in points] == folders
+    assert [v for f, v in points] == [{'bet0_f': 0.01}, {'bet0_f': 0.02}]
+    parent = str(tmp_path / '2D')
+    folders = farpy.scan.build(parent, namelist, {'bet0_f': [0.01, 0.02],
+                                                  'omcy': [1.0, 2.0, 3.0]},
+                               decimals={'bet0_f': 2, 'omcy': 1})
+    points = farpy.scan.Scan2D(parent)._points()
+    assert [os.path.join(parent, f) for f, v in points] == folders
+    assert points[4][1] == {'bet0_f': 0.02, 'omcy': 2.0}
+
+
+def test_namelist_index(tmp_path, monkeypatch):
+    import farpy._Scan._General_scan_class as general
+    parent = str(tmp_path)
+    namelist = makeNamelist()
+    farpy.scan.build(parent, namelist, {'bet0_f': [0.01, 0.02, 0.03],
+                                        'omcy': [1.0, 2.0]})
+    read = []
+
+    def counted(file, *args, **kwargs):
+        read.append(file)
+        return farpy.readNamelist(file, *args, **kwargs)
+    monkeypatch.setattr(general, 'readNamelist', counted)
+    scan = farpy.scan.Scan2D(parent)
+    index = scan.namelistIndex()
+    assert len(index) == 6 and len(read) == 6
+    np.testing.assert_array_equal(index['cvfp_3'], namelist['cvfp'][3])
+    assert (index['matrix_out'] == 0).all()
+    # Query strings and functions
+    points = scan.selectPoints('bet0_f > 0.015 and omcy < 1.5')
+    assert sorted(points['bet0_f']) == [0.02, 0.03]
+    assert (points['omcy'] == 1.0).all()
+    points = scan.selectPoints(lambda t: t['bet0_f'] == 0.01)
+    assert sorted(points['omcy']) == [1.0, 2.0]
+    # A new object takes the table from the disk, without the namelists
+    del read[:]
+    other = farpy.scan.Scan2D(parent)
+    assert len(other.selectPoints('omcy == 2.0')) == 3
+    assert read == []
+    # Only the changed namelists are read again
+    changed = os.path.join(parent, points['folder'][0], 'Input_Model')
+    namelist = farpy.readNamelist(changed)
+    farpy.writeNamelist(changed, dict(namelist, ni=1234))
+    stat = os.stat(changed)
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    index = other.namelistIndex()
+    assert read == [changed]
+    assert len(index) == 6
+    assert list(other.selectPoints('ni == 1234')['folder']) == \
+        [points['folder'][0]]
+
+
+# ------------------------------------------------------------------------------
+# --- Eigenmodes
+# ------------------------------------------------------------------------------
+def test_track(tmp_path):
+    rng = np.random.default_rng(0)
+    nmat, ns, mn_col = 8, 40, 3
+    r = np.linspace(0.0, 1.0, ns)
+    # Smooth eigenvectors, shuffled and with a random sign at each point
+    k = rng.integers(1, 4, size=(nmat, mn_col, 2))
+    base = np.sin(np.pi * k[:, None] * r[None, :, None, None]) * \
+        rng.normal(size=(nmat, 1, mn_col, 2))
+    omega = rng.random(nmat)
+    beta = [0.1, 0.2, 0.3]
+    order = []
+    for b in beta:
+        perm = rng.permutation(nmat)
+        sign = rng.choice([-1.0, 1.0], size=nmat)[:, None, None, None]
+        writeEigenPoint(str(tmp_path / ('beta_%.1f' % b)),
+                        sign * base[perm], omega[perm])
+        order.append(perm)
+    scan = farpy.scan.Scan1D(str(tmp_path))
+    branches = scan.trackEigenmodes()
+    assert branches.branch.size == nmat
+    j = branches['j'].values
+    np.testing.assert_allclose(branches['overlap'].values[:, 1:], 1.0)
+    # Each branch follows the same eigenvector along the scan
+    tracked = np.array([order[i][j[:, i]] for i in range(len(beta))])
+    assert (tracked == tracked[0]).all()
+
+
+def test_track_dropped_spurious(tmp_path):
+    rng = np.random.default_rng(0)
+    nmat, ns, mn_col = 8, 40, 3
+    r = np.linspace(0.0, 1.0, ns)
+    # Smooth eigenvectors, the first two of each point localised at the edge
+    k = rng.integers(1, 4, size=(nmat, mn_col, 2))
+    base = np.sin(np.pi * k[:, None] * r[None, :, None, None]) * \
+        rng.normal(size=(nmat, 1, mn_col, 2))
+    base[:2] = np.exp(-(r[None, :, None, None] - 1.0)**2 / 0.002) * \
+        rng.normal(size=(2, 1, mn_col, 2))
+    omega = rng.random(nmat)
+    beta = [0.1, 0.2, 0.3]
+    order = []
+    for b in beta:
+        # The spurious ones first, and the rest shuffled
+        perm = np.concatenate(([0, 1], 2 + rng.permutation(nmat - 2)))
+        writeEigenPoint(str(tmp_path / ('beta_%.1f' % b)), base[perm],
+                        omega[perm])
+        order.append(perm)
+    scan = farpy.scan.Scan1D(str(tmp_path))
+    scan.readEigensolver(loadModes=True)
+    nbad = scan.filterSpurious(drop=True, maxHighK=None, maxEdge=0.2)
+    assert list(nbad.values) == [2, 2, 2]
+    branches = scan.trackEigenmodes()
+    assert branches.branch.size == nmat - 2
+    j = branches['j'].values
+    assert (j >= 2).all()
+    for i, eigen in enumerate(scan.eigen):
+        # The j are the indices in the files, usable with vector(j)
+        np.testing.assert_array_equal(
+            eigen._data['omega'].sel(j=j[:, i]).values,
+            branches['omega'].values[:, i])
+        np.testing.assert_array_equal(eigen.vector(j[:, i]).j.values,
+                                      j[:, i])
+    # Each branch follows the same eigenvector along the scan
+    tracked = np.array([order[i][j[:, i]] for i in range(len(beta))])
+    assert (tracked == tracked[0]).all()